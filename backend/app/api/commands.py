@@ -1,13 +1,15 @@
 from fastapi import APIRouter
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from app.services.mock_commands import execute_command
+from app.services.session_registry import DEFAULT_SESSION_ID, SESSION_ID_PATTERN, get_session_registry
 
 router = APIRouter()
 
 
 class CommandRequest(BaseModel):
     command: str
+    session_id: str = Field(DEFAULT_SESSION_ID, pattern=SESSION_ID_PATTERN)
 
 
 class CommandResponseModel(BaseModel):
@@ -17,7 +19,10 @@ class CommandResponseModel(BaseModel):
 
 
 @router.post("/api/commands", response_model=CommandResponseModel)
-def run_command(req: CommandRequest):
+async def run_command(req: CommandRequest):
+    # Commands are simulated and never reach the student's tmux session: only
+    # record activity, don't create one.
+    get_session_registry().touch(req.session_id)
     result = execute_command(req.command)
     return CommandResponseModel(
         output=result.output,
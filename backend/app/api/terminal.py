@@ -0,0 +1,107 @@
+"""Terminal event endpoints.
+
+GET /api/terminal/events streams a student's terminal events (see
+terminal_events) as Server-Sent Events: `event:` is the event type, `id:` its
+per-session id, so a reconnecting EventSource resumes through Last-Event-ID.
+WS /api/terminal/events/ws sends the same events as JSON messages
+{"id", "type", "at", "data"}. Both end after a `closed` event.
+"""
+
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, Header, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from app.services.session_registry import DEFAULT_SESSION_ID, SESSION_ID_PATTERN
+from app.services.terminal_events import Subscription, TerminalEvent, get_terminal_watchers
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/terminal", tags=["terminal"])
+
+KEEPALIVE = 15.0  # seconds between SSE comments on a quiet stream
+
+
+def _payload(event: TerminalEvent) -> dict:
+    return {"id": event.id, "type": event.type, "at": event.at, "data": event.data}
+
+
+@router.get("/events")
+async def terminal_events(
+    session_id: str = Query(DEFAULT_SESSION_ID, pattern=SESSION_ID_PATTERN),
+    last_event_id: int | None = Header(None),
+):
+    """Stream a student's terminal events as Server-Sent Events."""
+    return StreamingResponse(
+        _stream_events(session_id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _stream_events(session_id: str, after: int | None) -> AsyncIterator[str]:
+    try:
+        async with get_terminal_watchers().subscribe(session_id, after) as sub:
+            yield "retry: 1000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(sub.get(), KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                data = json.dumps({"at": event.at, **event.data}, ensure_ascii=False)
+                yield f"id: {event.id}\nevent: {event.type}\ndata: {data}\n\n"
+                if event.type == "closed":
+                    return
+    except Exception as e:
+        logger.error(f"[EVENTS] Stream error ({session_id}): {e!r}")
+        yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+
+
+@router.websocket("/events/ws")
+async def terminal_events_ws(
+    websocket: WebSocket,
+    session_id: str = Query(DEFAULT_SESSION_ID, pattern=SESSION_ID_PATTERN),
+    after: int | None = None,
+):
+    """Send a student's terminal events over a WebSocket."""
+    await websocket.accept()
+    try:
+        async with get_terminal_watchers().subscribe(session_id, after) as sub:
+            sender = asyncio.create_task(_send_events(websocket, sub))
+            receiver = asyncio.create_task(_until_disconnect(websocket))
+            done, pending = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+            if sender in done:
+                sender.result()
+                await websocket.close()
+    except Exception as e:
+        logger.error(f"[EVENTS] WebSocket error ({session_id}): {e!r}")
+        await websocket.close(code=1011)
+
+
+async def _send_events(websocket: WebSocket, sub: Subscription) -> None:
+    while True:
+        event = await sub.get()
+        await websocket.send_json(_payload(event))
+        if event.type == "closed":
+            return
+
+
+async def _until_disconnect(websocket: WebSocket) -> None:
+    """Read (and ignore) client messages so a disconnect is noticed while idle."""
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+
+
+@router.get("/stats")
+def terminal_stats():
+    """Sessions being watched and events published."""
+    return get_terminal_watchers().snapshot()
@@ -0,0 +1,82 @@
+"""Tutor chat endpoint.
+
+POST /api/tutor/chat runs one TutorAgent turn for the student's session and
+streams it as Server-Sent Events while the agent loop runs:
+
+- `token`: {"text"} model output as it is generated
+- `tool_start` / `tool_end`: {"id", "name", "args"} / {"id", "name", "ms", "output"}
+- `final`: {"content"} the tutor's complete reply
+- `error`: {"detail"} the turn failed; nothing more follows
+
+GET /api/tutor/history searches the student's indexed terminal commands and
+tutor conversation (see history_index).
+"""
+
+import json
+import logging
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from app.services import terminal_reader
+from app.services.history_index import MAX_RESULTS, get_history_index
+from app.services.session_registry import DEFAULT_SESSION_ID, SESSION_ID_PATTERN
+from app.services.tutor_pool import get_tutor_pool
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/tutor", tags=["tutor"])
+
+
+class TutorChatRequest(BaseModel):
+    message: str = Field(min_length=1)
+    session_id: str = Field(DEFAULT_SESSION_ID, pattern=SESSION_ID_PATTERN)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/chat")
+async def tutor_chat(request: TutorChatRequest):
+    """Stream one tutor turn as Server-Sent Events."""
+    return StreamingResponse(
+        _stream_turn(request.session_id, request.message),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _stream_turn(session_id: str, message: str) -> AsyncIterator[str]:
+    logger.info(f"[TUTOR] Chat ({session_id}): '{message[:80]}'")
+    try:
+        async with get_tutor_pool().session(session_id) as agent:
+            async for event, data in agent.astream_chat(message):
+                yield _sse(event, data)
+    except Exception as e:
+        logger.error(f"[TUTOR] Chat error ({session_id}): {e!r}")
+        yield _sse("error", {"detail": str(e)})
+
+
+@router.get("/history")
+def tutor_history(
+    q: str = "",
+    session_id: str = Query(DEFAULT_SESSION_ID, pattern=SESSION_ID_PATTERN),
+    kind: str | None = Query(None, pattern=r"^(command|student|tutor)$"),
+    since: float | None = None,
+    failed: bool = False,
+    limit: int = Query(10, ge=1, le=MAX_RESULTS),
+):
+    """Full-text search over a student's commands and tutor turns; `since` is a Unix time."""
+    return {"results": get_history_index().search(q, session_id, kind, since, failed, limit)}
+
+
+@router.get("/stats")
+def tutor_stats():
+    """Agent pool counters and ReadTerminal timings."""
+    return {
+        "pool": get_tutor_pool().snapshot(),
+        "read_terminal": terminal_reader.stats.snapshot(),
+    }
@@ -2,14 +2,36 @@
 
 Receives raw STT transcript, corrects it using Grok LLM,
 returns cleaned text for the chat input.
+
+/correct/stream is the streaming variant (Server-Sent Events): `delta`
+events carry text as the LLM produces it, then one `done` event carries the
+full correction. /correct stays as the fallback.
+
+Both go through llm_resilience: past the latency budget, or while the circuit
+breaker is open, the raw transcript is returned instead of waiting on x.ai.
+With `correction_batching` on, concurrent /correct calls are micro-batched
+into one multi-item request (see correction_batcher). The batcher sits in
+front of llm_resilience, so a batch is one call there: one budget, one
+breaker outcome, and a hedge repeats the whole batch request.
 """
 
+import hashlib
+import json
 import logging
-import os
+from collections.abc import AsyncIterator
+from dataclasses import asdict, dataclass
 
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from openai import OpenAI
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from app.config import settings
+from app.services.correction_batcher import CorrectionBatcher
+from app.services.correction_cache import cache_key, get_correction_cache
+from app.services.llm_client import get_llm_client
+from app.services.llm_resilience import CircuitOpen, get_llm_resilience
+from app.services.precorrect import PreCorrection, precorrect
+from app.services.session_registry import DEFAULT_SESSION_ID, SESSION_ID_PATTERN, get_session_registry
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +40,7 @@ router = APIRouter(prefix="/api/voice", tags=["voice"])
 
 class CorrectionRequest(BaseModel):
     transcript: str
+    session_id: str = Field(DEFAULT_SESSION_ID, pattern=SESSION_ID_PATTERN)
 
 
 class CorrectionResponse(BaseModel):
@@ -39,34 +62,280 @@ Your job:
 4. If the text is already correct, return it as-is
 5. Output ONLY the corrected text, nothing else"""
 
+BATCH_PROMPT = CORRECTION_PROMPT + """
+
+You will receive a JSON object {"transcripts": [...]} holding several independent transcripts.
+Correct each one separately by the rules above and reply with ONLY a JSON object
+{"corrections": [...]} containing exactly one corrected string per transcript, in the same order."""
+
+CORRECTION_MODEL = "grok-4-fast-non-reasoning"
+PROMPT_VERSION = hashlib.sha256(f"{CORRECTION_MODEL}\n{CORRECTION_PROMPT}".encode()).hexdigest()[:12]
+
+
+@dataclass
+class PrecorrectStats:
+    local: int = 0
+    llm: int = 0
+
+
+_precorrect_stats = PrecorrectStats()
+
+
+def _try_local(transcript: str) -> PreCorrection | None:
+    """The local pre-correction if it is confident enough to skip the LLM."""
+    pre = precorrect(transcript)
+    if pre.confidence >= settings.precorrect_threshold:
+        _precorrect_stats.local += 1
+        logger.info(f"[VOICE] Local correction ({pre.reason}, {pre.confidence}): '{pre.text[:80]}'")
+        return pre
+    _precorrect_stats.llm += 1
+    return None
+
+
+def _completion_args(transcript: str) -> dict:
+    return {
+        "model": CORRECTION_MODEL,
+        "messages": [
+            {"role": "system", "content": CORRECTION_PROMPT},
+            {"role": "user", "content": transcript},
+        ],
+        "temperature": 0.1,
+        "max_tokens": 1024,
+    }
+
+
+async def _correct_batch(transcripts: list[str]) -> list[str]:
+    """One LLM request for several transcripts; a single one uses the plain prompt."""
+    client = get_llm_client()
+    if len(transcripts) == 1:
+        response = await client.chat.completions.create(**_completion_args(transcripts[0]))
+        return [response.choices[0].message.content.strip()]
+
+    response = await client.chat.completions.create(
+        model=CORRECTION_MODEL,
+        messages=[
+            {"role": "system", "content": BATCH_PROMPT},
+            {"role": "user", "content": json.dumps({"transcripts": transcripts}, ensure_ascii=False)},
+        ],
+        temperature=0.1,
+        max_tokens=min(8192, 1024 * len(transcripts)),
+        response_format={"type": "json_object"},
+    )
+    corrections = json.loads(response.choices[0].message.content)["corrections"]
+    if not isinstance(corrections, list) or not all(isinstance(c, str) for c in corrections):
+        raise ValueError("Batch correction is not a list of strings")
+    if len(corrections) != len(transcripts):
+        raise ValueError(f"Batch returned {len(corrections)} corrections for {len(transcripts)} transcripts")
+    return [c.strip() for c in corrections]
+
+
+async def _correct_batch_resilient(transcripts: list[str]) -> list[str]:
+    return await get_llm_resilience().call(lambda: _correct_batch(transcripts), kind="batch")
+
+
+_batcher: CorrectionBatcher | None = None
+
+
+def _get_batcher() -> CorrectionBatcher | None:
+    global _batcher
+    if not settings.correction_batching:
+        return None
+    if _batcher is None:
+        _batcher = CorrectionBatcher(
+            _correct_batch_resilient,
+            max_batch=settings.correction_batch_max,
+            max_wait=settings.correction_batch_wait,
+        )
+    return _batcher
+
+
+async def _request_correction(client, transcript: str) -> str:
+    response = await client.chat.completions.create(**_completion_args(transcript))
+    return response.choices[0].message.content.strip()
+
+
+async def _correct(client, transcript: str) -> str:
+    """One transcript through the batcher when batching is on, else its own resilient call."""
+    batcher = _get_batcher()
+    if batcher is not None:
+        return await batcher.submit(transcript)
+    return await get_llm_resilience().call(lambda: _request_correction(client, transcript))
+
+
+async def _open_stream(client, transcript: str):
+    """Start a streaming completion and wait for its first text chunk.
+
+    Returns (stream, first_text); the budget and hedging in llm_resilience
+    apply to this time-to-first-token (its own "first_token" latency window),
+    and a hedge that loses after opening its stream is closed by `_close_stream`.
+    """
+    stream = await client.chat.completions.create(**_completion_args(transcript), stream=True)
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                return stream, chunk.choices[0].delta.content
+    except BaseException:
+        # Includes cancellation of the losing hedge: release its connection.
+        await stream.close()
+        raise
+    return stream, ""
+
+
+async def _close_stream(opened) -> None:
+    stream, _ = opened
+    await stream.close()
+
+
+async def _stream_text(first: str, stream) -> AsyncIterator[str]:
+    if first:
+        yield first
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
 
 @router.post("/correct", response_model=CorrectionResponse)
 async def correct_transcript(request: CorrectionRequest):
     """Correct a raw STT transcript using Grok LLM."""
-    api_key = os.environ.get("XAI_API_KEY")
-    if not api_key:
+    client = get_llm_client()
+    if client is None:
         raise HTTPException(status_code=500, detail="XAI_API_KEY not configured")
 
+    get_session_registry().touch(request.session_id)
+
     if not request.transcript.strip():
         return CorrectionResponse(corrected="")
 
+    local = _try_local(request.transcript)
+    if local is not None:
+        return CorrectionResponse(corrected=local.text)
+
+    cache = get_correction_cache()
+    key = cache_key(request.transcript, PROMPT_VERSION)
+    cached = cache.get(key)
+    if cached is not None:
+        logger.info(f"[VOICE] Cache hit: '{request.transcript[:80]}'")
+        return CorrectionResponse(corrected=cached)
+
     logger.info(f"[VOICE] Correcting: '{request.transcript[:80]}...'")
 
     try:
-        client = OpenAI(api_key=api_key, base_url="https://api.x.ai/v1")
-        response = client.chat.completions.create(
-            model="grok-4-fast-non-reasoning",
-            messages=[
-                {"role": "system", "content": CORRECTION_PROMPT},
-                {"role": "user", "content": request.transcript},
-            ],
-            temperature=0.1,
-            max_tokens=1024,
-        )
-        corrected = response.choices[0].message.content.strip()
+        corrected = await _correct(client, request.transcript)
         logger.info(f"[VOICE] Corrected: '{corrected[:80]}...'")
+        if corrected:
+            cache.put(key, corrected)
         return CorrectionResponse(corrected=corrected)
+    except CircuitOpen:
+        logger.info("[VOICE] LLM circuit open, returning raw transcript")
+        return CorrectionResponse(corrected=request.transcript)
     except Exception as e:
         logger.error(f"[VOICE] Correction error: {e}")
         # Fallback: return original transcript
         return CorrectionResponse(corrected=request.transcript)
+
+
+@router.post("/correct/stream")
+async def correct_transcript_stream(request: CorrectionRequest):
+    """Stream a corrected transcript as Server-Sent Events."""
+    client = get_llm_client()
+    if client is None:
+        raise HTTPException(status_code=500, detail="XAI_API_KEY not configured")
+
+    get_session_registry().touch(request.session_id)
+
+    return StreamingResponse(
+        _stream_correction(client, request.transcript),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _stream_correction(client, transcript: str) -> AsyncIterator[str]:
+    if not transcript.strip():
+        yield _sse("done", {"corrected": ""})
+        return
+
+    local = _try_local(transcript)
+    if local is not None:
+        yield _sse("delta", {"text": local.text})
+        yield _sse("done", {"corrected": local.text, "local": True})
+        return
+
+    cache = get_correction_cache()
+    key = cache_key(transcript, PROMPT_VERSION)
+    cached = cache.get(key)
+    if cached is not None:
+        logger.info(f"[VOICE] Cache hit: '{transcript[:80]}'")
+        yield _sse("delta", {"text": cached})
+        yield _sse("done", {"corrected": cached, "cached": True})
+        return
+
+    logger.info(f"[VOICE] Streaming correction: '{transcript[:80]}...'")
+    try:
+        stream, first = await get_llm_resilience().call(
+            lambda: _open_stream(client, transcript), kind="first_token", discard=_close_stream
+        )
+    except Exception as e:
+        if isinstance(e, CircuitOpen):
+            logger.info("[VOICE] LLM circuit open, returning raw transcript")
+        else:
+            logger.error(f"[VOICE] Streaming correction error: {e!r}")
+        yield _sse("done", {"corrected": transcript, "fallback": True})
+        return
+
+    parts: list[str] = []
+    # Whitespace is held back until more text follows: the client types
+    # deltas straight into a terminal, where a trailing newline would submit.
+    pending = ""
+    try:
+        async for content in _stream_text(first, stream):
+            text = pending + content
+            if not parts:
+                text = text.lstrip()
+            emit = text.rstrip()
+            pending = text[len(emit):]
+            if emit:
+                parts.append(emit)
+                yield _sse("delta", {"text": emit})
+    except Exception as e:
+        logger.error(f"[VOICE] Streaming correction error: {e}")
+        if not parts:
+            # Nothing typed yet: fall back to the raw transcript.
+            yield _sse("done", {"corrected": transcript, "fallback": True})
+        else:
+            yield _sse("error", {"detail": str(e)})
+        return
+    finally:
+        await stream.close()
+
+    corrected = "".join(parts)
+    logger.info(f"[VOICE] Corrected: '{corrected[:80]}...'")
+    if corrected:
+        cache.put(key, corrected)
+    yield _sse("done", {"corrected": corrected})
+
+
+@router.get("/cache/stats")
+def correction_cache_stats():
+    """Hit/miss/eviction counters for sizing the correction cache."""
+    return get_correction_cache().snapshot()
+
+
+@router.get("/stats")
+def voice_stats():
+    """Local vs LLM correction counts, cache counters, LLM budget/hedge/breaker and batching state."""
+    total = _precorrect_stats.local + _precorrect_stats.llm
+    return {
+        "precorrect": {
+            **asdict(_precorrect_stats),
+            "skip_rate": round(_precorrect_stats.local / total, 4) if total else 0.0,
+            "threshold": settings.precorrect_threshold,
+        },
+        "cache": get_correction_cache().snapshot(),
+        "llm": get_llm_resilience().snapshot(),
+        "batching": _batcher.snapshot() if _batcher is not None else None,
+    }
@@ -4,6 +4,42 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     port: int = 17066
     cors_origins: str = "http://localhost:3343"
+    max_sessions: int = 200
+    session_idle_timeout: float = 1800.0
+    xai_base_url: str = "https://api.x.ai/v1"
+    llm_max_connections: int = 50
+    llm_max_keepalive: int = 20
+    llm_keepalive_expiry: float = 60.0
+    llm_timeout: float = 30.0
+    llm_budget: float = 3.0  # seconds before voice correction falls back to the raw transcript
+    llm_hedge: bool = True
+    llm_hedge_min_samples: int = 20  # latencies recorded before hedging at the observed p95
+    llm_breaker_failures: int = 5  # consecutive failures that open the circuit
+    llm_breaker_reset: float = 30.0  # seconds open before a half-open probe
+    correction_cache_size: int = 2048
+    correction_cache_ttl: float = 86400.0
+    precorrect_threshold: float = 0.8  # skip the LLM at or above this local confidence; >1 disables
+    correction_cache_db: str = ""  # SQLite path for the persistent tier; empty = memory only
+    correction_cache_db_rows: int = 50000  # rows the persistent tier keeps; the oldest are pruned
+    correction_batching: bool = False  # micro-batch concurrent /api/voice/correct calls (classroom mode)
+    correction_batch_max: int = 8
+    correction_batch_wait: float = 0.02  # seconds the first transcript waits for others to join
+    tutor_context_budget: int = 16000  # estimated tokens of tutor history sent per model call
+    tutor_keep_turns: int = 6  # recent turns never folded into the rolling summary
+    tutor_tool_keep_turns: int = 2  # turns whose tool outputs are kept verbatim
+    tutor_pool_size: int = 200  # live TutorAgents; least recently used are serialized out
+    tutor_idle_timeout: float = 1800.0
+    tutor_pool_memory_mb: int = 256  # estimated conversation memory across all agents
+    tutor_store_dir: str = ""  # where evicted conversations are written; empty = in memory
+    tutor_log_db: str = ""  # SQLite append-only conversation log (survives restarts); overrides tutor_store_dir
+    tutor_snapshot_every: int = 200  # logged messages after which the compacted conversation is snapshotted
+    terminal_snapshot_ttl: float = 2.0  # seconds one ReadTerminal fetch serves later reads in the same turn
+    terminal_diff_reads: bool = True  # ReadTerminal elides lines the agent has already been shown
+    shell_marks_dir: str = "~/tutor-workspace/.terminal"  # raw STUDENT pane logs with OSC 133 marks (tmux pipe-pane)
+    scrollback_bytes: int = 65536  # raw STUDENT pane output kept per terminal for ReadTerminal (buffer is 2x); 0 = read via the terminal service
+    history_index_db: str = "~/tutor-workspace/.terminal/history.db"  # SQLite FTS5 index of student commands and tutor turns; empty = in memory
+    terminal_long_running: float = 30.0  # seconds before a still-running student command is reported as long_running
+    warm_imports: bool = True  # after startup, load the LLM SDKs in a thread so the first tutor/voice request skips it
 
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8", "extra": "ignore"}
 
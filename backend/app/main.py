@@ -1,15 +1,65 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.commands import router as commands_router
+from app.api.terminal import router as terminal_router
+from app.api.tutor import router as tutor_router
 from app.api.voice import router as voice_router
 from app.config import settings
-from app.services.tmux_service import session_exists
+from app.services.correction_cache import get_correction_cache
+from app.services.history_index import get_history_index
+from app.services.llm_client import close_llm_client, get_llm_client
+from app.services.session_registry import get_session_registry
+from app.services.terminal_events import get_terminal_watchers
+from app.services.terminal_reader import close_clients as close_terminal_clients
+from app.services.tmux_service import SESSION_NAME, get_control_client, get_session_cache, session_exists
+from app.services.tutor_pool import get_tutor_pool
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_imports() -> None:
+    """Load the deferred SDKs (openai, langchain) once the server is already answering."""
+    get_llm_client()
+    import app.services.tutor_agent  # noqa: F401
+
+
+def _warmed(future: asyncio.Future) -> None:
+    # Nobody awaits the warm-up; without this a failed import would go unreported
+    # until the first request hits it.
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"[STARTUP] Warming imports failed: {future.exception()!r}")
 
-app = FastAPI(title="AI Software Advisor API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    control = get_control_client()
+    control.start()
+    if settings.warm_imports:
+        asyncio.get_running_loop().run_in_executor(None, _warm_imports).add_done_callback(_warmed)
+    evictor = asyncio.create_task(get_session_registry().run_evictor())
+    tutor_evictor = asyncio.create_task(get_tutor_pool().run_evictor())
+    yield
+    evictor.cancel()
+    tutor_evictor.cancel()
+    await get_terminal_watchers().close_all()
+    get_tutor_pool().close_all()
+    await close_llm_client()
+    await close_terminal_clients()
+    get_correction_cache().close()
+    get_history_index().close()
+    control.close()
+
+
+app = FastAPI(title="AI Software Advisor API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,8 +71,35 @@ app.add_middleware(
 
 app.include_router(commands_router)
 app.include_router(voice_router)
+app.include_router(tutor_router)
+app.include_router(terminal_router)
 
 
 @app.get("/health")
 def health():
-    return {"status": "healthy", "tmux_session": session_exists()}
+    """Liveness: reports the control client and cached session state without starting tmux."""
+    return {
+        "status": "healthy",
+        "tmux_session": get_session_cache().known(SESSION_NAME),
+        "tmux_control": {"connected": get_control_client().connected},
+    }
+
+
+@app.get("/health/detail")
+def health_detail():
+    """Pane/window inventory from the session cache (no tmux forks)."""
+    cache = get_session_cache()
+    control = get_control_client()
+    sessions = cache.sessions()
+    return {
+        "status": "healthy",
+        "tmux_session": session_exists(),
+        "tmux_control": {"connected": control.connected},
+        "cache": {
+            "age_seconds": round(cache.age, 3),
+            "ttl_seconds": cache.ttl,
+            "refreshes": cache.refreshes,
+            "invalidations": cache.invalidations,
+        },
+        "sessions": [asdict(s) for s in sessions.values()],
+    }
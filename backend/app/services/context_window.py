@@ -0,0 +1,299 @@
+"""Token-budgeted message history for the tutor agent.
+
+Every tutor turn re-sends the whole history: the system prompt, the tutor
+prompt and every earlier terminal dump. `ContextWindow` keeps that bounded
+before each new turn:
+
+- token counts are estimated once per message and cached
+- ToolMessage payloads from turns older than `tool_keep_turns` are replaced
+  with a one-line marker (the tool_call_id stays, so pairing with the
+  AIMessage's tool_calls is intact)
+- when the history is still over `budget`, the oldest whole turns are folded
+  into one rolling summary message placed right after the pinned prefix;
+  the most recent `keep_turns` turns are always kept verbatim
+
+The first `pinned` messages (system prompt + tutor prompt) are never touched.
+Counts are estimates (UTF-8 bytes / 4), not tokenizer-exact, which is close
+enough for budgeting; provider-reported input tokens are tracked alongside.
+"""
+
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_OVERHEAD = 4  # role and framing tokens per message
+SUMMARY_HEADER = "[Summary of the earlier part of this lesson]\n"
+
+Summarizer = Callable[[str | None, list[Any]], str]
+AsyncSummarizer = Callable[[str | None, list[Any]], Awaitable[str]]
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text.encode("utf-8")) + 3) // 4
+
+
+def _content_text(message: Any) -> str:
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+
+
+def _usage(message: Any, key: str) -> int:
+    usage = getattr(message, "usage_metadata", None) or {}
+    return usage.get(key, 0) or 0
+
+
+def _cached_tokens(message: Any) -> int:
+    usage = getattr(message, "usage_metadata", None) or {}
+    return (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+
+
+def render_transcript(messages: list[Any], max_tool_chars: int = 400) -> str:
+    """Plain-text transcript of messages, as input for a summarizer."""
+    lines = []
+    for message in messages:
+        text = _content_text(message).strip()
+        if isinstance(message, ToolMessage):
+            if len(text) > max_tool_chars:
+                text = text[:max_tool_chars] + " ..."
+            lines.append(f"Tool result: {text}")
+        elif isinstance(message, AIMessage):
+            for call in message.tool_calls:
+                lines.append(f"Tutor called {call['name']}({call['args']})")
+            if text:
+                lines.append(f"Tutor: {text}")
+        elif text.startswith(SUMMARY_HEADER):
+            lines.append(text[len(SUMMARY_HEADER):])
+        else:
+            lines.append(f"Student: {text}")
+    return "\n".join(lines)
+
+
+def extractive_summary(previous: str | None, messages: list[Any], max_chars: int = 2000) -> str:
+    """Summary without an LLM: the transcript, keeping the most recent part."""
+    text = "\n".join(filter(None, [previous, render_transcript(messages, max_tool_chars=120)]))
+    return text if len(text) <= max_chars else "..." + text[-max_chars:]
+
+
+@dataclass
+class ContextStats:
+    turns: int = 0
+    llm_calls: int = 0
+    last_turn_tokens: int = 0
+    max_context_tokens: int = 0
+    prompt_tokens: int = 0
+    reported_input_tokens: int = 0
+    cached_input_tokens: int = 0
+    elided_tool_messages: int = 0
+    elided_tokens: int = 0
+    summaries: int = 0
+    folded_messages: int = 0
+
+    # Model call latency, split by whether the provider served part of the
+    # prompt from its prefix cache (recorded by TutorAgent.achat).
+    cached_calls: int = 0
+    cached_call_seconds: float = 0.0
+    uncached_calls: int = 0
+    uncached_call_seconds: float = 0.0
+
+    @property
+    def tokens_per_turn(self) -> float:
+        return self.prompt_tokens / self.turns if self.turns else 0.0
+
+    @property
+    def cached_token_ratio(self) -> float:
+        return self.cached_input_tokens / self.reported_input_tokens if self.reported_input_tokens else 0.0
+
+
+class ContextWindow:
+    def __init__(
+        self,
+        budget: int = 16000,
+        pinned: int = 2,
+        keep_turns: int = 6,
+        tool_keep_turns: int = 2,
+        elide_over: int = 200,
+    ):
+        self.budget = budget
+        self.pinned = pinned
+        self.keep_turns = keep_turns
+        self.tool_keep_turns = tool_keep_turns
+        self.elide_over = elide_over
+        self.summary: str | None = None
+        self.stats = ContextStats()
+        # id(message) -> (message, tokens); the message is held so its id
+        # cannot be reused while the entry exists.
+        self._counts: dict[int, tuple[Any, int]] = {}
+        self._summary_message: HumanMessage | None = None
+
+    # ── counting ──
+
+    def count(self, message: Any) -> int:
+        entry = self._counts.get(id(message))
+        if entry is not None and entry[0] is message:
+            return entry[1]
+        tokens = MESSAGE_OVERHEAD + estimate_tokens(_content_text(message))
+        if isinstance(message, AIMessage) and message.tool_calls:
+            tokens += sum(estimate_tokens(f"{c['name']}{c['args']}") for c in message.tool_calls)
+        self._counts[id(message)] = (message, tokens)
+        return tokens
+
+    def total(self, messages: list[Any]) -> int:
+        return sum(self.count(m) for m in messages)
+
+    # ── fitting ──
+
+    def fit(self, messages: list[Any], summarize: Summarizer | None = None) -> list[Any]:
+        """The history to start the next turn with; call before appending its HumanMessage."""
+        messages = self._elide(messages)
+        plan = self._plan_fold(messages)
+        if plan is None:
+            return self._finish(messages)
+        head, fold, keep = plan
+        try:
+            summary = (summarize or extractive_summary)(self.summary, fold)
+        except Exception as e:
+            logger.warning(f"[TUTOR] Summarization failed, using extractive summary: {e}")
+            summary = extractive_summary(self.summary, fold)
+        return self._finish(self._apply(head, fold, keep, summary))
+
+    async def afit(self, messages: list[Any], summarize: AsyncSummarizer | None = None) -> list[Any]:
+        """Async fit, for summarizers that call an LLM with ainvoke."""
+        messages = self._elide(messages)
+        plan = self._plan_fold(messages)
+        if plan is None:
+            return self._finish(messages)
+        head, fold, keep = plan
+        try:
+            summary = await summarize(self.summary, fold) if summarize else extractive_summary(self.summary, fold)
+        except Exception as e:
+            logger.warning(f"[TUTOR] Summarization failed, using extractive summary: {e}")
+            summary = extractive_summary(self.summary, fold)
+        return self._finish(self._apply(head, fold, keep, summary))
+
+    def reset(self) -> None:
+        self.summary = None
+        self._summary_message = None
+        self._counts.clear()
+
+    def restore_summary(self, summary: str) -> HumanMessage:
+        """Make `summary` the current rolling summary and return its message."""
+        self.summary = summary
+        self._summary_message = HumanMessage(content=SUMMARY_HEADER + summary)
+        return self._summary_message
+
+    def _turn_starts(self, body: list[Any]) -> list[int]:
+        return [i for i, m in enumerate(body) if isinstance(m, HumanMessage) and m is not self._summary_message]
+
+    def split(self, messages: list[Any]) -> tuple[list[Any], list[Any]]:
+        """(pinned prefix + current summary message, conversation body)."""
+        head_len = self.pinned
+        if len(messages) > head_len and messages[head_len] is self._summary_message:
+            head_len += 1
+        return messages[:head_len], messages[head_len:]
+
+    def _elide(self, messages: list[Any]) -> list[Any]:
+        head, body = self.split(messages)
+        starts = self._turn_starts(body)
+        if len(starts) <= self.tool_keep_turns:
+            return messages
+        stale_end = starts[-self.tool_keep_turns] if self.tool_keep_turns else len(body)
+        out = list(body)
+        for i in range(stale_end):
+            message = out[i]
+            if not isinstance(message, ToolMessage):
+                continue
+            tokens = self.count(message)
+            if tokens <= self.elide_over:
+                continue
+            name = f" {message.name}" if message.name else ""
+            out[i] = ToolMessage(
+                content=f"[{tokens} tokens of stale{name} output elided]",
+                tool_call_id=message.tool_call_id,
+                name=message.name,
+            )
+            self.stats.elided_tool_messages += 1
+            self.stats.elided_tokens += tokens - self.count(out[i])
+        return head + out
+
+    def _plan_fold(self, messages: list[Any]) -> tuple[list[Any], list[Any], list[Any]] | None:
+        if self.total(messages) <= self.budget:
+            return None
+        head, body = self.split(messages)
+        pinned = head[: self.pinned]
+        starts = self._turn_starts(body)
+        if len(starts) <= 1:
+            return None
+        # Keep as many recent turns (up to keep_turns, at least one) as fit.
+        keep_from = starts[-1]
+        for n in range(min(self.keep_turns, len(starts) - 1), 0, -1):
+            candidate = starts[-n]
+            if self.total(pinned) + self.total(body[candidate:]) + self.elide_over * 2 <= self.budget:
+                keep_from = candidate
+                break
+        return pinned, body[:keep_from], body[keep_from:]
+
+    def _apply(self, pinned: list[Any], fold: list[Any], keep: list[Any], summary: str) -> list[Any]:
+        for message in fold:
+            self._counts.pop(id(message), None)
+        self.restore_summary(summary)
+        self.stats.summaries += 1
+        self.stats.folded_messages += len(fold)
+        logger.info(f"[TUTOR] Folded {len(fold)} messages into a {self.count(self._summary_message)}-token summary")
+        return pinned + [self._summary_message] + keep
+
+    def _finish(self, messages: list[Any]) -> list[Any]:
+        live = {id(m) for m in messages}
+        for key in [k for k in self._counts if k not in live]:
+            del self._counts[key]
+        return messages
+
+    # ── metrics ──
+
+    def record_turn(self, messages: list[Any], start: int) -> None:
+        """Account the model calls of a turn whose messages begin at index `start`."""
+        turn_tokens = 0
+        for i in range(start, len(messages)):
+            message = messages[i]
+            if not isinstance(message, AIMessage):
+                continue
+            context = self.total(messages[:i])
+            turn_tokens += context
+            self.stats.llm_calls += 1
+            self.stats.max_context_tokens = max(self.stats.max_context_tokens, context)
+            self.stats.reported_input_tokens += _usage(message, "input_tokens")
+            self.stats.cached_input_tokens += _cached_tokens(message)
+        self.stats.turns += 1
+        self.stats.last_turn_tokens = turn_tokens
+        self.stats.prompt_tokens += turn_tokens
+        logger.info(
+            f"[TUTOR] Turn {self.stats.turns}: {turn_tokens} prompt tokens, context {self.total(messages)}, "
+            f"cached ratio {self.stats.cached_token_ratio:.2f}"
+        )
+
+    def record_call(self, response: Any, seconds: float) -> None:
+        """Account one model call's latency under cached or uncached."""
+        if _cached_tokens(response):
+            self.stats.cached_calls += 1
+            self.stats.cached_call_seconds += seconds
+        else:
+            self.stats.uncached_calls += 1
+            self.stats.uncached_call_seconds += seconds
+
+    def snapshot(self) -> dict:
+        s = self.stats
+        return {
+            **asdict(s),
+            "tokens_per_turn": round(s.tokens_per_turn, 1),
+            "cached_token_ratio": round(s.cached_token_ratio, 4),
+            "mean_cached_call_seconds": round(s.cached_call_seconds / s.cached_calls, 4) if s.cached_calls else None,
+            "mean_uncached_call_seconds": round(s.uncached_call_seconds / s.uncached_calls, 4) if s.uncached_calls else None,
+            "budget": self.budget,
+            "has_summary": self.summary is not None,
+        }
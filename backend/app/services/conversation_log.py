@@ -0,0 +1,129 @@
+"""Durable append-only log of tutor conversations (SQLite, WAL).
+
+Every message a turn adds (user input, model responses, tool results) is
+appended as one row keyed by (session_id, seq), in one transaction per turn.
+With WAL and synchronous=NORMAL a commit is a sequential append to the WAL
+file without an fsync; a crash can lose at most the last few commits, never
+corrupt the log.
+
+Rows are never rewritten. Instead, a snapshot of the compacted conversation
+(the state tutor_pool serializes: pinned tutor message, rolling summary and
+the kept body) is stored with the seq it covers; tutor_pool writes one when
+the ContextWindow folds history, when the tail grows past
+`tutor_snapshot_every` messages, and on eviction. Resume loads
+the latest snapshot plus the rows after it, so its cost depends on the tail,
+not on the length of the whole session.
+
+The log implements the ConversationStore interface used by tutor_pool
+(`save` writes a snapshot, `load` reads snapshot + tail) plus `append`.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    session_id TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class ConversationLog:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        # session_id -> (last seq written, seq covered by the latest snapshot)
+        self._positions: dict[str, tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(DISTINCT session_id) FROM messages").fetchone()[0]
+
+    def _position(self, session_id: str) -> tuple[int, int]:
+        position = self._positions.get(session_id)
+        if position is None:
+            last = self._db.execute("SELECT MAX(seq) FROM messages WHERE session_id = ?", (session_id,)).fetchone()[0]
+            snap = self._db.execute("SELECT seq FROM snapshots WHERE session_id = ?", (session_id,)).fetchone()
+            position = (last if last is not None else -1, snap[0] if snap else -1)
+            self._positions[session_id] = position
+        return position
+
+    def append(self, session_id: str, messages: list[dict]) -> int:
+        """Append message dicts (messages_to_dict); returns how many rows now follow the latest snapshot."""
+        if not messages:
+            return self.tail_length(session_id)
+        now = time.time()
+        rows = [json.dumps(m, ensure_ascii=False) for m in messages]
+        with self._lock:
+            last, snap = self._position(session_id)
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(
+                    "INSERT INTO messages (session_id, seq, message, created_at) VALUES (?, ?, ?, ?)",
+                    [(session_id, last + 1 + i, row, now) for i, row in enumerate(rows)],
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            last += len(rows)
+            self._positions[session_id] = (last, snap)
+        return last - snap
+
+    def tail_length(self, session_id: str) -> int:
+        with self._lock:
+            last, snap = self._position(session_id)
+        return last - snap
+
+    def save(self, session_id: str, state: dict) -> None:
+        """Snapshot `state` as covering every message appended so far."""
+        data = json.dumps(state, ensure_ascii=False)
+        with self._lock:
+            last, _ = self._position(session_id)
+            self._db.execute(
+                "INSERT OR REPLACE INTO snapshots (session_id, seq, state, created_at) VALUES (?, ?, ?, ?)",
+                (session_id, last, data, time.time()),
+            )
+            self._positions[session_id] = (last, last)
+
+    def load(self, session_id: str) -> dict | None:
+        """Latest snapshot with the messages appended after it, or None for a new session."""
+        with self._lock:
+            snap = self._db.execute("SELECT seq, state FROM snapshots WHERE session_id = ?", (session_id,)).fetchone()
+            after = snap[0] if snap else -1
+            tail = self._db.execute(
+                "SELECT message FROM messages WHERE session_id = ? AND seq > ? ORDER BY seq", (session_id, after)
+            ).fetchall()
+        if snap is None and not tail:
+            return None
+        state = json.loads(snap[1]) if snap else {"summary": None, "messages": []}
+        state["messages"].extend(json.loads(row[0]) for row in tail)
+        return state
+
+    def history(self, session_id: str, since: int = 0) -> list[dict]:
+        """Every logged message of a session from seq `since` on, as message dicts."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT message FROM messages WHERE session_id = ? AND seq >= ? ORDER BY seq", (session_id, since)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
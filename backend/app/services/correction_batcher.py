@@ -0,0 +1,105 @@
+"""Micro-batching for concurrent voice corrections.
+
+In classroom mode many students dictate at once. Instead of one LLM request
+per transcript, corrections arriving within `max_wait` of each other are
+collected (up to `max_batch`) and handed to `correct_many` as one list; the
+results are fanned back out to the waiting callers in order. A batch that
+fails fails every caller in it, and each falls back on its own.
+
+`correct_many` is expected to carry the latency budget, hedging and circuit
+breaker (voice wraps the batch request in llm_resilience): callers must not
+each wrap `submit` in a ResilientCaller, or one failed batch of N would count
+as N breaker failures, and a hedged caller would queue its transcript into
+the same batch twice.
+
+Only the non-streaming /correct route batches: streamed deltas are typed
+into the terminal as they arrive and cannot be shared across students.
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchStats:
+    items: int = 0
+    batches: int = 0
+    full_batches: int = 0
+    failed_batches: int = 0
+    largest_batch: int = 0
+
+    @property
+    def mean_batch(self) -> float:
+        return self.items / self.batches if self.batches else 0.0
+
+
+class CorrectionBatcher:
+    def __init__(
+        self,
+        correct_many: Callable[[list[str]], Awaitable[list[str]]],
+        max_batch: int = 8,
+        max_wait: float = 0.02,
+    ):
+        self.correct_many = correct_many
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.stats = BatchStats()
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, transcript: str) -> str:
+        """Queue a transcript for the next batch and wait for its correction."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((transcript, future))
+        if len(self._pending) >= self.max_batch:
+            self.stats.full_batches += 1
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def snapshot(self) -> dict:
+        return {
+            **asdict(self.stats),
+            "mean_batch": round(self.stats.mean_batch, 2),
+            "max_batch": self.max_batch,
+            "max_wait_seconds": self.max_wait,
+        }
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # Callers that gave up (deadline, disconnect) are dropped before sending.
+        batch = [(t, f) for t, f in self._pending if not f.done()]
+        self._pending = []
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        self.stats.batches += 1
+        self.stats.items += len(batch)
+        self.stats.largest_batch = max(self.stats.largest_batch, len(batch))
+        try:
+            results = await self.correct_many([t for t, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"Batch returned {len(results)} results for {len(batch)} transcripts")
+        except Exception as e:
+            self.stats.failed_batches += 1
+            logger.warning(f"[VOICE] Batch of {len(batch)} failed: {e!r}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
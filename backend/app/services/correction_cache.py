@@ -0,0 +1,209 @@
+"""LRU + TTL cache for transcript corrections.
+
+Students repeat the same short phrases ("xong", "chạy lại đi", "ls") all the
+time, so corrections are cached under a normalized transcript (Unicode NFC,
+case-folded, whitespace collapsed) prefixed with the prompt version; changing
+the prompt or model simply stops matching old entries.
+
+The in-process tier is an OrderedDict LRU. An optional SQLite tier (set
+`correction_cache_db`) survives restarts; memory misses fall through to it and
+hits are promoted back into memory. Writes to it are behind: `put` only queues
+the row, and a writer thread with its own connection commits the queue in one
+transaction every FLUSH_INTERVAL seconds, so no commit runs on the event loop.
+The same thread deletes rows older than `ttl` and trims the table to `max_rows`
+(oldest first) at startup and every PRUNE_EVERY written rows.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 1.0  # seconds between commits of queued rows
+PRUNE_EVERY = 512  # rows written between prunes of the SQLite tier
+
+
+def normalize_transcript(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text).casefold().split())
+
+
+def cache_key(transcript: str, prompt_version: str) -> str:
+    return f"{prompt_version}:{normalize_transcript(transcript)}"
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    disk_hits: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    disk_writes: int = 0
+    disk_pruned: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class CorrectionCache:
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl: float = 86400.0,
+        db_path: str | None = None,
+        max_rows: int = 50000,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None  # reads, under _lock
+        self._queued: dict[str, tuple[str, float]] = {}  # rows not yet written, under _lock
+        self._wake = threading.Event()
+        self._closing = False
+        self._writer: threading.Thread | None = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS corrections (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS corrections_stored_at ON corrections (stored_at)")
+            self._db.commit()
+            self._writer = threading.Thread(
+                target=self._write_behind, args=(db_path,), name="correction-cache", daemon=True
+            )
+            self._writer.start()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if now - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    return value
+                del self._entries[key]
+                self.stats.expirations += 1
+            row = self._queued.get(key)
+            if row is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, stored_at FROM corrections WHERE key = ?", (key,)
+                ).fetchone()
+            if row and now - row[1] < self.ttl:
+                self._insert(key, row[0], row[1])
+                self.stats.hits += 1
+                self.stats.disk_hits += 1
+                return row[0]
+            self.stats.misses += 1
+            return None
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._insert(key, value, now)
+            if self._writer is not None and self._writer.is_alive():
+                self._queued[key] = (value, now)
+
+    def snapshot(self) -> dict:
+        return {
+            **asdict(self.stats),
+            "hit_rate": round(self.stats.hit_rate, 4),
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "persistent": self._db is not None,
+            "max_rows": self.max_rows,
+        }
+
+    def close(self) -> None:
+        """Write what is queued, then close both connections."""
+        if self._writer is not None:
+            self._closing = True
+            self._wake.set()
+            self._writer.join()
+            self._writer = None
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _write_behind(self, db_path: str) -> None:
+        db = sqlite3.connect(db_path)
+        try:
+            self._prune(db)
+            since_prune = 0
+            while not self._closing:
+                self._wake.wait(FLUSH_INTERVAL)
+                since_prune += self._flush(db)
+                if since_prune >= PRUNE_EVERY:
+                    self._prune(db)
+                    since_prune = 0
+            self._flush(db)
+        except sqlite3.Error as e:
+            logger.error(f"[CACHE] Correction cache writer stopped: {e}")
+        finally:
+            db.close()
+
+    def _flush(self, db: sqlite3.Connection) -> int:
+        with self._lock:
+            rows = [(key, value, stored_at) for key, (value, stored_at) in self._queued.items()]
+        if not rows:
+            return 0
+        with db:
+            db.executemany("INSERT OR REPLACE INTO corrections (key, value, stored_at) VALUES (?, ?, ?)", rows)
+        with self._lock:
+            for key, value, stored_at in rows:
+                if self._queued.get(key) == (value, stored_at):
+                    del self._queued[key]  # unless put again meanwhile
+            self.stats.disk_writes += len(rows)
+        return len(rows)
+
+    def _prune(self, db: sqlite3.Connection) -> None:
+        """Delete expired rows, then the oldest beyond max_rows."""
+        with db:
+            expired = db.execute("DELETE FROM corrections WHERE stored_at < ?", (time.time() - self.ttl,)).rowcount
+            excess = db.execute(
+                "DELETE FROM corrections WHERE key IN "
+                "(SELECT key FROM corrections ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,),
+            ).rowcount
+        with self._lock:
+            self.stats.disk_pruned += expired + excess
+
+    def _insert(self, key: str, value: str, stored_at: float) -> None:
+        self._entries[key] = (value, stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+
+_cache: CorrectionCache | None = None
+
+
+def get_correction_cache() -> CorrectionCache:
+    global _cache
+    if _cache is None:
+        _cache = CorrectionCache(
+            max_entries=settings.correction_cache_size,
+            ttl=settings.correction_cache_ttl,
+            db_path=settings.correction_cache_db or None,
+            max_rows=settings.correction_cache_db_rows,
+        )
+    return _cache
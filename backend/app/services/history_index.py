@@ -0,0 +1,258 @@
+"""Full-text index over student terminal history and tutor conversations.
+
+Questions like "has the student ever run git init?" or "what error did they
+hit yesterday?" should not need old terminal lines in the model's context.
+HistoryIndex keeps one SQLite FTS5 table of documents, each tagged with its
+session and time:
+
+- `command`: a finished command from the student's shell-integration log
+  (see shell_marks), with its exit status and the rendered tail of its
+  output. Indexed incrementally: `sync_terminal` adds only the records after
+  the log offset where the last indexed one ended (kept per session and log
+  inode in `sources`, so a restarted server resumes where it stopped). When
+  the CommandIndex starts over (a new setup truncated the log in place) the
+  position starts over with it;
+- `student` / `tutor`: the text of each turn's human and AI messages, added
+  by tutor_pool as turns are logged. Tool output is not indexed again (the
+  commands already are).
+
+The unicode61 tokenizer with remove_diacritics folds Vietnamese accents, so
+"loi" finds "lỗi". `search` turns free text into a safe FTS5 query (all
+words, then any word if nothing has all of them), ranks by bm25 and returns
+snippets of the matching text with the hits in [brackets]. An empty query lists the newest matching documents,
+e.g. failed commands since yesterday.
+
+The index is a file next to the terminal logs by default, so turns from
+earlier days stay searchable across restarts. With `history_index_db` empty
+it lives in memory for this process; tutor_pool then re-indexes a student's
+logged turns when it restores their conversation (see `has_turns`).
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from itertools import takewhile
+
+from app.config import settings
+from app.services import shell_marks
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS documents USING fts5(
+    command, body, session,
+    kind UNINDEXED, session_id UNINDEXED, at UNINDEXED, exit_status UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS sources (
+    session_id TEXT NOT NULL,
+    source TEXT NOT NULL,
+    inode INTEGER,
+    position INTEGER NOT NULL,  -- log offset where the last indexed command ended
+    PRIMARY KEY (session_id, source)
+) WITHOUT ROWID;
+"""
+
+KINDS = ("command", "student", "tutor")
+MAX_RESULTS = 20
+SNIPPET_TOKENS = 16
+_WORD = re.compile(r"\w+")
+
+
+def _session_token(session_id: str) -> str:
+    """One alphanumeric token per session id, so MATCH can narrow to a student first."""
+    return "s" + session_id.encode().hex()
+
+
+def _match_query(text: str, any_word: bool = False) -> str | None:
+    """Free text as an FTS5 query of quoted words (AND by default)."""
+    words = _WORD.findall(text)
+    if not words:
+        return None
+    return (" OR " if any_word else " ").join(f'"{w}"' for w in words)
+
+
+class HistoryIndex:
+    def __init__(self, db_path: str = ""):
+        if db_path:
+            db_path = os.path.expanduser(db_path)
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.db_path = db_path or ":memory:"
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        if db_path:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._generations: dict[str, int] = {}  # CommandIndex generation at the last sync
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def has_turns(self, session_id: str) -> bool:
+        """Whether any of the student's conversation is indexed."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT 1 FROM documents WHERE documents MATCH ? AND kind != 'command' LIMIT 1",
+                (f"session : {_session_token(session_id)}",),
+            ).fetchone() is not None
+
+    # ─── Indexing ─────────────────────────────────────────────────────────
+
+    def add_messages(self, session_id: str, messages: list[dict], at: float | None = None) -> int:
+        """Index the text of human / AI message dicts (messages_to_dict); returns documents added."""
+        at = at if at is not None else time.time()
+        rows = []
+        for message in messages:
+            kind = {"human": "student", "ai": "tutor"}.get(message.get("type"))
+            content = message.get("data", {}).get("content")
+            if kind and isinstance(content, str) and content.strip():
+                rows.append(("", content, _session_token(session_id), kind, session_id, at, None))
+        if rows:
+            self._insert(rows)
+        return len(rows)
+
+    def sync_terminal(self, session_id: str) -> int:
+        """Index the student's commands finished since the last sync; returns documents added."""
+        index = shell_marks.get_command_index(session_id)
+        index.refresh()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT inode, position FROM sources WHERE session_id = ? AND source = 'terminal'", (session_id,)
+            ).fetchone()
+        # A stored position is the log offset where the last indexed command
+        # ended. It holds for the same log (inode) not yet reset since the last
+        # sync; the first sync after a restart trusts it while the log is at
+        # least that long.
+        generation = self._generations.setdefault(session_id, index.generation)
+        last = 0
+        if row and row[0] == index.inode and row[1] <= index.offset:
+            last = row[1]
+        if generation != index.generation:
+            self._generations[session_id] = index.generation
+            last = 0
+            self._insert([], (session_id, "terminal", index.inode, 0))
+        new = list(takewhile(lambda r: r.output_end > last, reversed(index.records)))[::-1]
+        if not new:
+            return 0
+        rows = []
+        for record in new:
+            output, _ = index.output(record)
+            at = record.finished_at or record.started_at or time.time()
+            rows.append((record.command, output, _session_token(session_id), "command", session_id, at, record.exit_status))
+        self._insert(rows, (session_id, "terminal", index.inode, new[-1].output_end))
+        return len(rows)
+
+    def _insert(self, rows: list[tuple], source: tuple | None = None) -> None:
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(
+                    "INSERT INTO documents (command, body, session, kind, session_id, at, exit_status) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                if source is not None:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO sources (session_id, source, inode, position) VALUES (?, ?, ?, ?)",
+                        source,
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    # ─── Queries ──────────────────────────────────────────────────────────
+
+    def search(
+        self,
+        query: str = "",
+        session_id: str | None = None,
+        kind: str | None = None,
+        since: float | None = None,
+        failed: bool = False,
+        limit: int = 10,
+    ) -> list[dict]:
+        """Best matches for `query` (newest documents when empty), filtered by session/kind/time."""
+        if kind is not None and kind not in KINDS:
+            raise ValueError(f"kind must be one of {', '.join(KINDS)}")
+        if session_id is not None:
+            self.sync_terminal(session_id)
+        filters, params = [], []
+        for clause, value in (("session_id = ?", session_id), ("kind = ?", kind), ("at >= ?", since)):
+            if value is not None:
+                filters.append(clause)
+                params.append(value)
+        if failed:
+            filters.append("exit_status IS NOT NULL AND exit_status != 0")
+        limit = max(1, min(int(limit), MAX_RESULTS))
+        scope = f"session : {_session_token(session_id)}" if session_id is not None else None
+
+        words = _match_query(query)
+        if words is None:
+            where = " AND ".join((["documents MATCH ?"] if scope else []) + filters) or "1"
+            return self._rows(
+                f"SELECT kind, session_id, at, exit_status, command, substr(body, 1, 200) FROM documents "
+                f"WHERE {where} ORDER BY at DESC LIMIT ?",
+                ((scope,) if scope else ()) + (*params, limit),
+            )
+        where = " AND ".join(["documents MATCH ?", *filters])
+        for any_word in (False, True):
+            match = f"{{command body}} : ({_match_query(query, any_word)})"
+            results = self._rows(
+                f"SELECT kind, session_id, at, exit_status, command, "
+                f"snippet(documents, 1, '[', ']', '…', {SNIPPET_TOKENS}) "
+                f"FROM documents WHERE {where} ORDER BY bm25(documents, 2.0, 1.0, 0.0) LIMIT ?",
+                (f"{scope} AND {match}" if scope else match, *params, limit),
+            )
+            if results:
+                return results
+        return []
+
+    def _rows(self, sql: str, params: tuple) -> list[dict]:
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        now = time.time()
+        results = []
+        for kind, session_id, at, exit_status, command, text in rows:
+            item = {"kind": kind, "session_id": session_id, "hours_ago": round((now - at) / 3600, 2)}
+            if kind == "command":
+                item.update(command=command, exit_status=exit_status, output=text)
+            else:
+                item["text"] = text
+            results.append(item)
+        return results
+
+
+_index: HistoryIndex | None = None
+
+
+def get_history_index() -> HistoryIndex:
+    global _index
+    if _index is None:
+        _index = HistoryIndex(settings.history_index_db)
+    return _index
+
+
+def search_history(
+    session_id: str,
+    query: str = "",
+    kind: str = "all",
+    failed_only: bool = False,
+    since_hours: float = 0,
+    limit: int = 5,
+) -> str:
+    """A student's matching history as a JSON list (see HistoryIndex.search)."""
+    since = time.time() - since_hours * 3600 if since_hours > 0 else None
+    results = get_history_index().search(
+        query, session_id, None if kind in ("", "all") else kind, since, failed_only, limit
+    )
+    if not results:
+        return "No matching history."
+    return json.dumps(results, ensure_ascii=False, indent=1)
@@ -0,0 +1,55 @@
+"""Shared async client for the x.ai (OpenAI-compatible) API.
+
+One AsyncOpenAI instance with a pooled keep-alive httpx client is opened on
+first use (or by the startup warm-up in main) and reused by every request, so
+concurrent calls overlap on the event loop and reuse TLS connections instead
+of handshaking each time. The openai SDK is imported only then.
+"""
+
+import logging
+import os
+from typing import TYPE_CHECKING
+
+from app.config import settings
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+_client: "AsyncOpenAI | None" = None
+
+
+def _build_client(api_key: str) -> "AsyncOpenAI":
+    import httpx
+    from openai import AsyncOpenAI
+
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_keepalive,
+            keepalive_expiry=settings.llm_keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(settings.llm_timeout, connect=5.0),
+    )
+    # Retries are left to llm_resilience, which hedges within a latency budget.
+    return AsyncOpenAI(api_key=api_key, base_url=settings.xai_base_url, http_client=http_client, max_retries=0)
+
+
+def get_llm_client() -> "AsyncOpenAI | None":
+    """The shared client, or None when XAI_API_KEY is not configured."""
+    global _client
+    if _client is None:
+        api_key = os.environ.get("XAI_API_KEY")
+        if not api_key:
+            return None
+        _client = _build_client(api_key)
+        logger.info(f"[LLM] Opened pooled client for {settings.xai_base_url}")
+    return _client
+
+
+async def close_llm_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
@@ -0,0 +1,249 @@
+"""Latency budgets, hedged requests and a circuit breaker for LLM calls.
+
+Voice correction has a cheap fallback (the raw transcript), so waiting for a
+slow provider is worse than giving up early:
+
+- every call gets a latency budget; past it the caller falls back
+- once enough latencies are recorded, a second identical request is fired
+  when the first has not answered by the observed p95 (or has already
+  failed), and whichever succeeds first wins; a loser that still produced a
+  result (e.g. an open stream) is handed to the caller's `discard`
+- latencies are tracked per `kind` of call, so a streaming call's
+  time-to-first-token and a full completion get their own hedge delay
+- consecutive failures open a circuit breaker; while open, calls fail
+  immediately with CircuitOpen until a half-open probe succeeds
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from typing import TypeVar
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitOpen(RuntimeError):
+    """The provider is considered unhealthy; use the fallback."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """The call did not finish within its latency budget."""
+
+
+class LatencyTracker:
+    def __init__(self, window: int = 200):
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> float | None:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True  # let exactly one probe through
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logger.info("[LLM] Circuit closed")
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def release(self) -> None:
+        """A call ended without an outcome (cancelled); allow another probe."""
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._probing:
+                logger.warning(f"[LLM] Circuit open after {self.failures} failures")
+            self.opened_at = time.monotonic()
+            self._probing = False
+
+
+@dataclass
+class ResilienceStats:
+    calls: int = 0
+    successes: int = 0
+    failures: int = 0
+    deadline_exceeded: int = 0
+    short_circuited: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+
+
+class ResilientCaller:
+    def __init__(
+        self,
+        budget: float = 3.0,
+        hedge: bool = True,
+        hedge_min_samples: int = 20,
+        hedge_percentile: float = 0.95,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.budget = budget
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_percentile = hedge_percentile
+        self.breaker = breaker or CircuitBreaker()
+        self.latency: dict[str, LatencyTracker] = {}
+        self.stats = ResilienceStats()
+        self._discarding: set[asyncio.Task] = set()
+
+    def hedge_delay(self, kind: str = "call") -> float | None:
+        latency = self.latency.get(kind)
+        if not self.hedge or latency is None or len(latency) < self.hedge_min_samples:
+            return None
+        return latency.percentile(self.hedge_percentile)
+
+    async def call(
+        self,
+        make_call: Callable[[], Awaitable[T]],
+        budget: float | None = None,
+        kind: str = "call",
+        discard: Callable[[T], Awaitable[None]] | None = None,
+    ) -> T:
+        """Run make_call() under the budget, hedging once if it is slow or fails.
+
+        `kind` selects the latency window the hedge delay comes from. Every
+        result that is not returned (a hedge that also succeeded, or finished
+        while being cancelled) is passed to `discard`, if given.
+        """
+        self.stats.calls += 1
+        if not self.breaker.allow():
+            self.stats.short_circuited += 1
+            raise CircuitOpen("LLM circuit breaker is open")
+
+        budget = self.budget if budget is None else budget
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        hedge_at = self.hedge_delay(kind)
+        pending = {asyncio.ensure_future(make_call())}
+        first = next(iter(pending))
+        tasks = [first]
+        winner = None
+        hedged = False
+        last_error: BaseException | None = None
+        try:
+            while pending:
+                remaining = budget - (loop.time() - start)
+                if remaining <= 0:
+                    raise DeadlineExceeded(f"LLM call exceeded {budget:.2f}s budget")
+                wait = remaining
+                if not hedged and hedge_at is not None:
+                    wait = min(wait, max(0.0, hedge_at - (loop.time() - start)))
+                done, pending = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        elapsed = loop.time() - start
+                        self.latency.setdefault(kind, LatencyTracker()).record(elapsed)
+                        self.breaker.record_success()
+                        self.stats.successes += 1
+                        if task is not first:
+                            self.stats.hedge_wins += 1
+                        winner = task
+                        return task.result()
+                    last_error = task.exception()
+                if not hedged and hedge_at is not None and (done or loop.time() - start >= hedge_at):
+                    hedged = True
+                    self.stats.hedges += 1
+                    tasks.append(asyncio.ensure_future(make_call()))
+                    pending.add(tasks[-1])
+            raise last_error
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except DeadlineExceeded:
+            self.stats.deadline_exceeded += 1
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            self.stats.failures += 1
+            self.breaker.record_failure()
+            raise
+        finally:
+            for task in pending:
+                task.cancel()
+            if discard is not None:
+                for task in tasks:
+                    if task is not winner:
+                        task.add_done_callback(lambda t: self._discard(t, discard))
+
+    def _discard(self, task: asyncio.Future, discard: Callable[[T], Awaitable[None]]) -> None:
+        """Release the result of a call that lost (or outlived) its race."""
+        if task.cancelled() or task.exception() is not None:
+            return
+        cleanup = asyncio.ensure_future(discard(task.result()))
+        self._discarding.add(cleanup)
+        cleanup.add_done_callback(self._discarding.discard)
+
+    def snapshot(self) -> dict:
+        latency = {}
+        for kind, tracker in self.latency.items():
+            p50 = tracker.percentile(0.5)
+            p95 = tracker.percentile(0.95)
+            latency[kind] = {
+                "samples": len(tracker),
+                "hedge_delay_seconds": self.hedge_delay(kind),
+                "p50_seconds": round(p50, 4) if p50 is not None else None,
+                "p95_seconds": round(p95, 4) if p95 is not None else None,
+            }
+        return {
+            **asdict(self.stats),
+            "budget_seconds": self.budget,
+            "latency": latency,
+            "breaker": {"state": self.breaker.state, "consecutive_failures": self.breaker.failures},
+        }
+
+
+_caller: ResilientCaller | None = None
+
+
+def get_llm_resilience() -> ResilientCaller:
+    global _caller
+    if _caller is None:
+        _caller = ResilientCaller(
+            budget=settings.llm_budget,
+            hedge=settings.llm_hedge,
+            hedge_min_samples=settings.llm_hedge_min_samples,
+            breaker=CircuitBreaker(settings.llm_breaker_failures, settings.llm_breaker_reset),
+        )
+    return _caller
@@ -0,0 +1,115 @@
+"""Incremental pane capture driven by tmux history-size tracking.
+
+A pane's rows have absolute indices: history rows first, then the visible
+screen. `history_size + cursor_y` is the index of the cursor row, so every row
+below it is complete. A cursor token records that index plus a fingerprint of
+the last few complete rows (the anchor). The next read fetches only the anchor
+and the rows appended after it; when nothing moved that is one tiny
+display-message and a capture of at most ANCHOR_ROWS rows.
+
+The anchor catches the cases where indices alone lie: once history reaches
+history-limit old rows are dropped and indices stop growing, and `clear`
+moves the cursor back up. Then the tail window is searched for the anchor; if
+it is gone the caller gets the window with `reset=True`.
+
+Rows are physical (not joined with -J) so indices stay consistent.
+"""
+
+import asyncio
+import hashlib
+from dataclasses import dataclass
+
+from app.services.tmux_control import TmuxControlClient, quote
+
+ANCHOR_ROWS = 3
+
+
+@dataclass
+class PaneDelta:
+    lines: list[str]
+    token: str
+    changed: bool
+    reset: bool = False  # continuity lost: `lines` is the tail window, not a delta
+
+
+def _fingerprint(rows: list[str]) -> str:
+    return hashlib.blake2b("\n".join(rows).encode(), digest_size=8).hexdigest()
+
+
+def _make_token(pos: int, rows: list[str]) -> str:
+    anchor = rows[-min(ANCHOR_ROWS, pos):] if pos else []
+    return f"{pos}:{len(anchor)}:{_fingerprint(anchor)}"
+
+
+def _parse_token(token: str | None) -> tuple[int, int, str] | None:
+    try:
+        pos, k, digest = token.split(":")
+        return int(pos), int(k), digest
+    except (AttributeError, ValueError):
+        return None
+
+
+def _find_anchor(rows: list[str], k: int, digest: str) -> int | None:
+    """Index just past the last occurrence of the anchor in rows."""
+    for end in range(len(rows), k - 1, -1):
+        if _fingerprint(rows[end - k:end]) == digest:
+            return end
+    return None
+
+
+async def read_delta(
+    client: TmuxControlClient,
+    pane_target: str,
+    token: str | None = None,
+    max_lines: int = 100,
+) -> PaneDelta:
+    """Rows appended to a pane since `token`. Runs on the control client loop."""
+    target = quote(pane_target)
+    info = await client.execute(f"display-message -p -t {target} '#{{history_size}} #{{cursor_y}}'")
+    hs, cy = (int(v) for v in info[0].split())
+    pos = hs + cy
+
+    async def rows(start: int, end: int) -> list[str]:
+        # Absolute indices -> capture-pane coordinates (0 = top of screen).
+        if end < start:
+            return []
+        return await client.execute(f"capture-pane -p -e -t {target} -S {start - hs} -E {end - hs}")
+
+    prev = _parse_token(token)
+    if prev:
+        prev_pos, k, digest = prev
+        if prev_pos - k >= 0 and prev_pos <= pos and pos - prev_pos <= max_lines:
+            fetched = await rows(prev_pos - k, pos - 1)
+            if _fingerprint(fetched[:k]) == digest:
+                new = fetched[k:]
+                return PaneDelta(new, _make_token(pos, fetched), changed=bool(new))
+
+    window = await rows(max(0, pos - max_lines), pos - 1)
+    if prev:
+        _, k, digest = prev
+        end = _find_anchor(window, k, digest) if k else None
+        if end is not None:
+            new = window[end:]
+            return PaneDelta(new, _make_token(pos, window), changed=bool(new))
+    return PaneDelta(window, _make_token(pos, window), changed=True, reset=True)
+
+
+class PaneCursor:
+    """Server-side cursor for one consumer of one pane."""
+
+    def __init__(self, client: TmuxControlClient, pane_target: str, max_lines: int = 100):
+        self.client = client
+        self.pane_target = pane_target
+        self.max_lines = max_lines
+        self.token: str | None = None
+
+    def read(self) -> PaneDelta:
+        delta = self.client.submit(read_delta(self.client, self.pane_target, self.token, self.max_lines)).result()
+        self.token = delta.token
+        return delta
+
+    async def aread(self) -> PaneDelta:
+        coro = read_delta(self.client, self.pane_target, self.token, self.max_lines)
+        delta = await asyncio.wrap_future(self.client.submit(coro))
+        self.token = delta.token
+        return delta
@@ -0,0 +1,235 @@
+"""Local pre-correction for voice transcripts.
+
+Most dictations are short commands ("git status"), one-word replies ("xong")
+or Vietnamese that Soniox already transcribed with correct diacritics. Those
+do not need an LLM round trip. `precorrect` applies a technical-term
+dictionary and rule-based punctuation, then scores how confident it is that
+the result is final; the voice route only calls Grok below the threshold.
+
+Confidence rules, highest first:
+- shell command: 0.95, text kept verbatim. The first word must be a known
+  command, a tool's subcommand must be known ("git push", "npm run"), and the
+  arguments must look typed rather than spoken: paths, flags and file names,
+  at most a couple of plain words, no "dash" / "dot" and no spoken term the
+  dictionary would rewrite ("git hub is down" is a sentence, not a command)
+- single word reply: 0.9
+- Vietnamese with any word missing its tone marks, whether the whole
+  sentence ("chay lai di") or one word of it ("chạy lai đi"): 0.1, the LLM
+  must restore them
+- English sentence: 0.6; STT homophones ("make the bored bigger") are
+  spelled correctly and no local rule can catch them
+- short Vietnamese sentence with diacritics: 0.85 when it already ends with
+  punctuation, 0.8 when the rules added it; longer sentences fall off with
+  length since STT errors accumulate
+
+bench_precorrect fails unless every transcript in its corpus that scores at
+or above the threshold comes out exactly as expected; extend the corpus with
+each new rule.
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+
+# First words that are unambiguous commands (no "open", "find", "which", ...:
+# those start ordinary English sentences too).
+SHELL_COMMANDS = frozenset({
+    "ls", "cd", "pwd", "mkdir", "rmdir", "touch", "cat", "cp", "mv", "rm",
+    "clear", "git", "npm", "npx", "pnpm", "yarn", "node", "python", "python3",
+    "pip", "uv", "tmux", "claude", "grep", "chmod", "curl", "wget", "nano", "vim",
+})
+
+# Tools whose first argument is a subcommand; anything else there ("git hub",
+# "npm is slow") is speech.
+SUBCOMMANDS = {
+    "git": frozenset({
+        "init", "status", "add", "commit", "push", "pull", "clone", "log", "diff", "checkout",
+        "switch", "branch", "merge", "remote", "restore", "reset", "stash", "fetch", "rebase",
+        "show", "config", "tag", "rm", "mv",
+    }),
+    "npm": frozenset({"install", "i", "run", "start", "test", "init", "ci", "uninstall", "update", "exec"}),
+    "pnpm": frozenset({"install", "i", "add", "remove", "run", "dev", "build", "start", "test", "init", "exec"}),
+    "yarn": frozenset({"install", "add", "remove", "run", "dev", "build", "start", "test", "init"}),
+    "pip": frozenset({"install", "uninstall", "list", "show", "freeze"}),
+    "uv": frozenset({"run", "add", "remove", "sync", "pip", "venv", "init"}),
+    "tmux": frozenset({"new", "attach", "a", "ls", "kill-session", "kill-server", "new-session", "attach-session"}),
+}
+
+# Syntax read out loud: a typed command never contains these words.
+SPOKEN_SYNTAX = frozenset({"dash", "dot", "slash", "tilde", "star", "underscore", "minus", "space"})
+
+# English function words: an argument list containing them is a sentence.
+ENGLISH_WORDS = frozenset({
+    "a", "an", "the", "is", "are", "was", "to", "of", "and", "or", "it", "this", "that",
+    "in", "on", "for", "with", "not", "my", "me", "you", "right", "please", "do", "does",
+})
+
+# Plain (non-path, non-flag) argument words a command may have after its
+# subcommand ("git push origin main", "cd game").
+MAX_PLAIN_ARGS = 2
+
+# Spoken or mis-cased forms -> canonical spelling. Matched on word boundaries,
+# case-insensitively; multi-word keys catch STT splitting one term in two.
+TECH_TERMS = {
+    "git hub": "GitHub",
+    "get hub": "GitHub",
+    "github": "GitHub",
+    "git lab": "GitLab",
+    "gitlab": "GitLab",
+    "n p m": "npm",
+    "npm": "npm",
+    "p n p m": "pnpm",
+    "t mux": "tmux",
+    "tee mux": "tmux",
+    "tmux": "tmux",
+    "claude code": "Claude Code",
+    "cloud code": "Claude Code",
+    "claude": "Claude",
+    "java script": "JavaScript",
+    "javascript": "JavaScript",
+    "type script": "TypeScript",
+    "typescript": "TypeScript",
+    "node js": "Node.js",
+    "nodejs": "Node.js",
+    "next js": "Next.js",
+    "nextjs": "Next.js",
+    "react": "React",
+    "python": "Python",
+    "html": "HTML",
+    "css": "CSS",
+    "api": "API",
+    "json": "JSON",
+    "vs code": "VS Code",
+    "vscode": "VS Code",
+    "localhost": "localhost",
+    "fast api": "FastAPI",
+    "fastapi": "FastAPI",
+    "sơ vơ": "server",
+}
+
+# Frequent Vietnamese words as STT emits them when tone marks are lost.
+VIETNAMESE_WITHOUT_DIACRITICS = frozenset({
+    "khong", "duoc", "roi", "chay", "lai", "di", "cua", "nhung", "minh", "toi",
+    "ban", "lam", "nay", "sao", "nao", "gi", "va", "voi", "cho", "mot",
+    "hai", "bon", "nam", "sau", "bay", "chin", "muoi", "xem", "giup", "em",
+    "anh", "chi", "tao", "sua", "loi", "thu", "muc", "tiep", "theo", "bai",
+    "hoc", "hieu", "chua", "dang", "phai", "nhe",
+})
+
+# Of those, the ones that are also everyday words without marks ("cho em
+# xem", "di chuyển"); any other one inside a sentence that has diacritics
+# means STT dropped that word's tone marks ("chạy lai đi", "tao thư mục").
+VIETNAMESE_UNMARKED_OK = frozenset({
+    "cho", "em", "anh", "hai", "xem", "theo", "sau", "nam", "bay", "di", "chi",
+})
+
+SHORT_REPLIES = frozenset({
+    "xong", "done", "ok", "okay", "yes", "no", "next", "tiếp", "được", "rồi",
+    "có", "không", "vâng", "dạ", "ừ", "thanks", "cảm ơn",
+})
+
+# A sentence is a question when it ends with a particle, contains an
+# interrogative, or starts with an English question word.
+QUESTION_ENDINGS = frozenset({"không", "chưa", "à", "hả", "nhỉ", "chứ"})
+QUESTION_ANYWHERE = frozenset({"sao", "gì", "nào", "đâu", "bao", "mấy"})
+QUESTION_STARTS = frozenset({
+    "what", "why", "how", "where", "when", "which", "who", "can", "could",
+    "is", "are", "do", "does", "should",
+})
+
+# A term inside a file name or path ("index.html", "src/css", "json.loads")
+# is left as spoken: only a free-standing word is rewritten.
+_TERM_RE = re.compile(
+    r"(?<![\w./\\~-])("
+    + "|".join(re.escape(k) for k in sorted(TECH_TERMS, key=len, reverse=True))
+    + r")(?![\w/\\]|[.-]\w)",
+    re.IGNORECASE,
+)
+_WORD_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+_DIACRITIC_RE = re.compile(r"[^\x00-\x7f]")
+_SHELL_WORD_RE = re.compile(r"[-./~=*$:@\\\d]")
+
+
+@dataclass
+class PreCorrection:
+    text: str
+    confidence: float
+    reason: str
+
+
+def _apply_terms(text: str) -> str:
+    text = _TERM_RE.sub(lambda m: TECH_TERMS[m.group(1).lower()], text)
+    return re.sub(r"\bi\b", "I", text) if text.isascii() else text
+
+
+def _is_command(words: list[str]) -> bool:
+    """True when the words read as a typed shell command rather than speech."""
+    first = words[0].lower()
+    if first not in SHELL_COMMANDS or len(words) > 8:
+        return False
+    args = [w.lower() for w in words[1:]]
+    if not SPOKEN_SYNTAX.isdisjoint(args):
+        return False
+    if first in SUBCOMMANDS and args:
+        if args[0] not in SUBCOMMANDS[first]:
+            return False
+        args = args[1:]
+    plain = 0
+    for arg in args:
+        if arg in ("-m", "--message"):
+            return True  # the rest is a commit message, free text by design
+        if _SHELL_WORD_RE.search(arg):
+            continue
+        if arg in ENGLISH_WORDS:
+            return False
+        plain += 1
+    return plain <= MAX_PLAIN_ARGS
+
+
+def _punctuate(text: str) -> tuple[str, bool]:
+    """Capitalize and add end punctuation. Returns (text, changed)."""
+    if text[-1] in ".?!…:":
+        return text[0].upper() + text[1:], False
+    words = _WORD_RE.findall(text.lower())
+    question = bool(words) and (
+        words[-1] in QUESTION_ENDINGS
+        or words[0] in QUESTION_STARTS
+        or not QUESTION_ANYWHERE.isdisjoint(words)
+    )
+    return text[0].upper() + text[1:] + ("?" if question else "."), True
+
+
+def precorrect(transcript: str) -> PreCorrection:
+    text = " ".join(unicodedata.normalize("NFC", transcript).split())
+    if not text:
+        return PreCorrection("", 1.0, "empty")
+
+    words = text.split()
+    termed = _apply_terms(text)
+    # Terms that only change case leave a command alone; a spoken term the
+    # dictionary rewrites ("git hub", "n p m") means this is speech.
+    if text.isascii() and termed.lower() == text.lower() and _is_command(words):
+        return PreCorrection(text, 0.95, "shell-command")
+
+    if len(words) <= 2 and text.lower().strip(".!?") in SHORT_REPLIES:
+        return PreCorrection(text, 0.9, "short-reply")
+
+    letters = _WORD_RE.findall(text.lower())
+    bare_vietnamese = [w for w in letters if w in VIETNAMESE_WITHOUT_DIACRITICS]
+    if letters and not _DIACRITIC_RE.search(text):
+        if len(bare_vietnamese) >= max(1, len(letters) // 3):
+            return PreCorrection(text, 0.1, "missing-diacritics")
+    elif any(w not in VIETNAMESE_UNMARKED_OK for w in bare_vietnamese):
+        return PreCorrection(text, 0.1, "partial-diacritics")
+
+    if len(words) == 1:
+        return PreCorrection(termed, 0.9, "single-word")
+
+    english = text.isascii()
+    text, added = _punctuate(termed)
+    if english:
+        return PreCorrection(text, 0.6, "english-sentence")
+    confidence = 0.8 if added else 0.85
+    if len(words) > 6:
+        confidence -= min(0.5, 0.05 * (len(words) - 6))
+    return PreCorrection(text, round(confidence, 2), "rules")
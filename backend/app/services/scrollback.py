@@ -0,0 +1,180 @@
+"""Bounded per-pane scrollback with a line index.
+
+ReadTerminal used to get a pane's recent output from the terminal service,
+which keeps a 50 KB JS string per terminal and splits all of it on every
+`/read`; terminal_reader then split the reply again. A Scrollback keeps a
+pane's raw output in one preallocated bytearray instead, together with an
+array of where each line starts, both updated as output is appended:
+
+- memory is bounded: the buffer is 2 x `capacity` bytes and holds the last
+  `capacity` bytes of output. Appends write after the live window; when they
+  reach the end, the window is moved back to the front in one memmove, so
+  every byte is copied at most once more (amortized O(1)). The window is
+  never split, so any line range is one contiguous slice;
+- `tail(n)` and `lines(first, last)` index the line array in O(1) and return
+  a memoryview of the buffer: no split, no copy. A view is only valid until
+  the next append (which may move the window); `text()` copies.
+
+PaneScrollback follows the STUDENT pane's pipe-pane log (see shell_marks),
+reading only the bytes appended since its last refresh. On first use it reads
+only the last `capacity` bytes of the log, so start-up cost does not grow
+with the lesson. terminal_reader serves reads from it when the log exists
+and falls back to the terminal service otherwise.
+"""
+
+import os
+import threading
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, count, islice
+from operator import add
+
+from app.config import settings
+from app.services import shell_marks
+
+
+class Scrollback:
+    """The last `capacity` bytes of a byte stream, indexed by line."""
+
+    def __init__(self, capacity: int = settings.scrollback_bytes):
+        self.capacity = capacity
+        self._buf = bytearray(2 * capacity)
+        self.clear()
+
+    def clear(self) -> None:
+        self._lo = 0  # live window is _buf[_lo:_hi]
+        self._hi = 0
+        self._base = 0  # stream position of _buf[0]
+        # Stream positions where a line starts (just after each "\n");
+        # entries before _first have scrolled out.
+        self._starts = array("q")
+        self._first = 0
+        self.written = 0  # bytes appended over the stream's life
+        self.newlines = 0
+
+    def __len__(self) -> int:
+        return self._hi - self._lo
+
+    @property
+    def start(self) -> int:
+        """Stream position of the oldest byte held."""
+        return self._base + self._lo
+
+    @property
+    def line_count(self) -> int:
+        """Lines held, counting a partial first and last line (as str.split does)."""
+        return len(self._starts) - self._first + 1
+
+    def append(self, data: bytes) -> None:
+        n = len(data)
+        if not n:
+            return
+        parts = data.split(b"\n")
+        if len(parts) > 1:
+            # Line i+1 starts after the first i+1 parts and their newlines;
+            # C-level iterators, no Python loop per line.
+            ends = map(add, accumulate(map(len, parts)), count(self.written + 1))
+            self._starts.extend(islice(ends, len(parts) - 1))
+            self.newlines += len(parts) - 1
+        self.written += n
+        if n >= self.capacity:
+            data = data[-self.capacity:]
+            n = self.capacity
+            self._base = self.written - n
+            self._lo, self._hi = 0, 0
+        elif self._hi + n > len(self._buf):
+            keep = min(self._hi - self._lo, self.capacity - n)
+            self._buf[:keep] = self._buf[self._hi - keep:self._hi]
+            self._base += self._hi - keep
+            self._lo, self._hi = 0, keep
+        self._buf[self._hi:self._hi + n] = data
+        self._hi += n
+        self._lo = max(self._lo, self._hi - self.capacity)
+        self._trim()
+
+    def _trim(self) -> None:
+        first = self._first = bisect_right(self._starts, self.start, self._first)
+        if first > 4096 and first * 2 > len(self._starts):
+            del self._starts[:first]
+            self._first = 0
+
+    def _line_start(self, k: int) -> int:
+        """Stream position of held line k (0 = oldest, possibly partial)."""
+        return self.start if k == 0 else self._starts[self._first + k - 1]
+
+    def _view(self, start: int, end: int) -> memoryview:
+        return memoryview(self._buf)[start - self._base:end - self._base]
+
+    def tail(self, n: int) -> memoryview:
+        """The last `n` lines (everything held if n <= 0), like "\n".join(text.split("\n")[-n:])."""
+        held = self.line_count
+        if n <= 0 or n >= held:
+            return self._view(self.start, self.written)
+        return self._view(self._line_start(held - n), self.written)
+
+    def lines(self, first: int, last: int) -> memoryview:
+        """Held lines [first, last) by absolute line number (see first_line)."""
+        k0 = max(first - self.first_line, 0)
+        k1 = min(last - self.first_line, self.line_count)
+        if k1 <= k0:
+            return self._view(self.written, self.written)
+        end = self.written if k1 == self.line_count else self._line_start(k1) - 1
+        return self._view(self._line_start(k0), end)
+
+    @property
+    def first_line(self) -> int:
+        """Absolute number of the oldest held line (lines ever started before it)."""
+        return self.newlines - (self.line_count - 1)
+
+    def text(self, n: int) -> str:
+        """tail(n) decoded; a copy."""
+        return str(self.tail(n), "utf-8", "replace")
+
+
+class PaneScrollback(Scrollback):
+    """Scrollback kept up to date from a pane's pipe-pane log."""
+
+    def __init__(self, path: str, capacity: int = settings.scrollback_bytes):
+        super().__init__(capacity)
+        self.path = path
+        self.offset = 0  # bytes of the log consumed
+        self._inode: int | None = None
+        self._lock = threading.Lock()
+
+    def refresh(self) -> bool:
+        """Append what the log gained since the last call; False if there is no log."""
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                return False
+            if st.st_ino != self._inode or st.st_size < self.offset:
+                self.clear()  # first use, or the log was recreated / truncated by a new setup
+                self._inode = st.st_ino
+                self.offset = max(st.st_size - self.capacity, 0)
+            if st.st_size > self.offset:
+                with open(self.path, "rb") as f:
+                    f.seek(self.offset)
+                    data = f.read(st.st_size - self.offset)
+                self.offset += len(data)
+                self.append(data)
+            return True
+
+    def read(self, n: int) -> str | None:
+        """The last `n` lines of the pane as text, or None without a log."""
+        if not self.refresh():
+            return None
+        with self._lock:
+            return self.text(n)
+
+
+_panes: dict[str, PaneScrollback] = {}
+
+
+def get_scrollback(session_id: str) -> PaneScrollback:
+    from app.services.session_registry import tmux_session_name
+
+    pane = _panes.get(session_id)
+    if pane is None:
+        pane = _panes[session_id] = PaneScrollback(shell_marks.log_path(tmux_session_name(session_id)))
+    return pane
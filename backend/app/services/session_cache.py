@@ -0,0 +1,184 @@
+"""Cached tmux session/window/pane inventory.
+
+The inventory is loaded with one `list-panes -a` over the control connection
+and kept until tmux says something changed: session and window notifications
+from the control client (`%sessions-changed`, `%session-closed`,
+`%window-add`, ...) mark it dirty and schedule a refresh right away, so reads
+are normally a dict lookup. Notifications do not cover every change (pane
+splits in sessions the control client is not attached to), hence the TTL.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+
+from app.services.tmux_control import TmuxControlClient, TmuxCommandError
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL = 30.0
+
+INVALIDATING = (
+    "%sessions-changed",
+    "%session-closed",
+    "%session-renamed",
+    "%session-window-changed",
+    "%window-add",
+    "%window-close",
+    "%window-renamed",
+    "%unlinked-window-add",
+    "%unlinked-window-close",
+    "%unlinked-window-renamed",
+    "%layout-change",
+    "%pane-mode-changed",
+    "%exit",
+)
+
+PANE_FORMAT = "\t".join([
+    "#{session_name}",
+    "#{window_index}",
+    "#{window_name}",
+    "#{window_active}",
+    "#{pane_index}",
+    "#{pane_id}",
+    "#{pane_title}",
+    "#{pane_current_command}",
+    "#{pane_width}",
+    "#{pane_height}",
+    "#{pane_active}",
+    "#{pane_dead}",
+])
+
+
+@dataclass
+class PaneInfo:
+    target: str
+    pane_id: str
+    title: str
+    command: str
+    width: int
+    height: int
+    active: bool
+    dead: bool
+
+
+@dataclass
+class WindowInfo:
+    index: int
+    name: str
+    active: bool
+    panes: list[PaneInfo] = field(default_factory=list)
+
+
+@dataclass
+class SessionInfo:
+    name: str
+    windows: list[WindowInfo] = field(default_factory=list)
+
+
+def _parse(lines: list[str]) -> dict[str, SessionInfo]:
+    sessions: dict[str, SessionInfo] = {}
+    windows: dict[tuple[str, int], WindowInfo] = {}
+    for line in lines:
+        parts = line.split("\t")
+        if len(parts) != 12:
+            continue
+        sess, w_idx, w_name, w_active, p_idx, p_id, title, cmd, width, height, p_active, dead = parts
+        session = sessions.setdefault(sess, SessionInfo(sess))
+        key = (sess, int(w_idx))
+        if key not in windows:
+            windows[key] = WindowInfo(int(w_idx), w_name, w_active == "1")
+            session.windows.append(windows[key])
+        windows[key].panes.append(PaneInfo(
+            target=f"{sess}:{w_idx}.{p_idx}",
+            pane_id=p_id,
+            title=title,
+            command=cmd,
+            width=int(width),
+            height=int(height),
+            active=p_active == "1",
+            dead=dead == "1",
+        ))
+    return sessions
+
+
+class SessionStateCache:
+    def __init__(self, client: TmuxControlClient, ttl: float = CACHE_TTL):
+        self.client = client
+        self.ttl = ttl
+        self.refreshes = 0
+        self.invalidations = 0
+        self._sessions: dict[str, SessionInfo] = {}
+        self._loaded_at = 0.0
+        self._dirty = True
+        self._refresh_task: asyncio.Task | None = None
+        client.add_listener(self._on_notification)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self._loaded_at if self._loaded_at else float("inf")
+
+    @property
+    def fresh(self) -> bool:
+        return not self._dirty and self.age < self.ttl
+
+    def sessions(self) -> dict[str, SessionInfo]:
+        """Current inventory, refreshed over the control connection if stale."""
+        if not self.fresh:
+            self.client.submit(self.refresh()).result()
+        return self._sessions
+
+    def has_session(self, name: str) -> bool:
+        return name in self.sessions()
+
+    def known(self, name: str) -> bool | None:
+        """Whether the inventory as last loaded has a session; None if never loaded. Never touches tmux."""
+        return name in self._sessions if self._loaded_at else None
+
+    def pane(self, target: str) -> PaneInfo | None:
+        """A pane ("session:window.pane") from the inventory as last loaded; never waits on tmux."""
+        if not self.fresh:
+            self.client.loop.call_soon_threadsafe(self._refresh_soon)
+        session = self._sessions.get(target.partition(":")[0])
+        for window in session.windows if session else ():
+            for pane in window.panes:
+                if pane.target == target:
+                    return pane
+        return None
+
+    async def refresh(self) -> None:
+        """Reload the inventory. Runs on the control client loop."""
+        self._dirty = False
+        try:
+            lines = await self.client.execute(f"list-panes -a -F '{PANE_FORMAT}'")
+        except TmuxCommandError:
+            lines = []  # "no server running" / no sessions
+        except Exception:
+            self._dirty = True
+            raise
+        self._sessions = {
+            name: info for name, info in _parse(lines).items() if name != self.client.session
+        }
+        self._loaded_at = time.monotonic()
+        self.refreshes += 1
+
+    def _on_notification(self, line: str) -> None:
+        if not line.startswith(INVALIDATING):
+            return
+        self._dirty = True
+        self.invalidations += 1
+        if line == "%exit":
+            return  # the next read reconnects and reloads
+        self._refresh_soon()
+
+    def _refresh_soon(self) -> None:
+        """Start a background reload unless one is running. Runs on the client loop thread."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = self.client.loop.create_task(self._background_refresh())
+
+    async def _background_refresh(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.warning(f"[TMUX] Session cache refresh failed: {e}")
@@ -0,0 +1,240 @@
+"""Registry mapping student session ids to tmux sessions.
+
+The "default" id is the classic single-student setup created by
+scripts/setup-tutor.sh: it is never created or evicted here. Every other id
+gets its own tmux session (`guided_ai_coding_<id>`, window 0 STUDENT running
+bash with shell integration and its output piped to shell_marks, window 1
+TUTOR), created lazily over the control connection on first use and
+killed again after `idle_timeout` seconds without activity or when the
+registry is full and it is the least recently used unlocked session.
+
+Callers work on a session inside `async with registry.session(id)`, which
+serializes requests for the same student while different students proceed in
+parallel. Only paths that drive the tmux session should acquire it; others
+call `touch`, which never creates one. A creation reserves its slot under a
+lock, so concurrent creates never exceed `max_sessions`. A session that is
+`hold`-ed (e.g. its terminal events are being watched) is not evicted, however
+long it goes without a request.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+from app.config import settings
+from app.services import shell_marks
+from app.services.tmux_control import TmuxCommandError, TmuxControlClient, quote
+from app.services.tmux_service import (
+    SESSION_NAME,
+    STUDENT_PANE,
+    TUTOR_PANE,
+    get_control_client,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION_ID = "default"
+SESSION_ID_PATTERN = r"^[A-Za-z0-9_-]{1,64}$"
+WINDOW_WIDTH = 220
+WINDOW_HEIGHT = 50
+
+_session_id_re = re.compile(SESSION_ID_PATTERN)
+
+
+class RegistryFull(RuntimeError):
+    """Every session slot is in use by a locked session."""
+
+
+@dataclass
+class StudentSession:
+    session_id: str
+    tmux_session: str
+    student_pane: str
+    tutor_pane: str
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+    holds: int = 0  # long-lived users (terminal event watchers) keeping it alive
+
+    @property
+    def pinned(self) -> bool:
+        return self.session_id == DEFAULT_SESSION_ID
+
+    @property
+    def evictable(self) -> bool:
+        return not self.pinned and not self.holds and not self.lock.locked()
+
+    def touch(self) -> None:
+        self.last_used = time.monotonic()
+
+    def hold(self) -> None:
+        self.holds += 1
+        self.touch()
+
+    def release(self) -> None:
+        """End a `hold`; the idle timeout counts from here."""
+        self.holds = max(self.holds - 1, 0)
+        self.touch()
+
+
+def tmux_session_name(session_id: str) -> str:
+    if not _session_id_re.match(session_id):
+        raise ValueError(f"Invalid session id: {session_id!r}")
+    if session_id == DEFAULT_SESSION_ID:
+        return SESSION_NAME
+    return f"{SESSION_NAME}_{session_id}"
+
+
+class SessionRegistry:
+    def __init__(
+        self,
+        client: TmuxControlClient,
+        max_sessions: int = settings.max_sessions,
+        idle_timeout: float = settings.session_idle_timeout,
+    ):
+        self.client = client
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions: OrderedDict[str, StudentSession] = OrderedDict()
+        self._creating: dict[str, asyncio.Future] = {}
+        self._slots = asyncio.Lock()  # held across the capacity check and the reservation
+        self._reserved = 0  # sessions being created, counted against max_sessions
+        self._sessions[DEFAULT_SESSION_ID] = StudentSession(
+            DEFAULT_SESSION_ID, SESSION_NAME, STUDENT_PANE, TUTOR_PANE
+        )
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: str) -> StudentSession | None:
+        return self._sessions.get(session_id)
+
+    def touch(self, session_id: str) -> None:
+        """Record activity for a known session without creating it."""
+        sess = self._sessions.get(session_id)
+        if sess is not None:
+            self._sessions.move_to_end(session_id)  # LRU eviction goes by activity
+            sess.touch()
+
+    async def acquire(self, session_id: str) -> StudentSession:
+        """Return the session for an id, creating its tmux session on first use."""
+        sess = self._sessions.get(session_id)
+        if sess is None:
+            if session_id in self._creating:
+                sess = await asyncio.shield(self._creating[session_id])
+            else:
+                creating = asyncio.get_running_loop().create_future()
+                self._creating[session_id] = creating
+                try:
+                    sess = await self._create(session_id)
+                except Exception as e:
+                    creating.set_exception(e)
+                    creating.exception()  # mark retrieved when nobody else waits
+                    raise
+                except BaseException:
+                    creating.cancel()
+                    raise
+                else:
+                    creating.set_result(sess)
+                finally:
+                    del self._creating[session_id]
+        self._sessions.move_to_end(session_id)
+        sess.touch()
+        return sess
+
+    @asynccontextmanager
+    async def session(self, session_id: str = DEFAULT_SESSION_ID):
+        """Hold a student's session exclusively for the duration of the block."""
+        sess = await self.acquire(session_id)
+        async with sess.lock:
+            sess.touch()
+            try:
+                yield sess
+            finally:
+                sess.touch()
+
+    async def evict_idle(self) -> list[str]:
+        """Kill tmux sessions idle for longer than idle_timeout."""
+        cutoff = time.monotonic() - self.idle_timeout
+        idle = [
+            s for s in self._sessions.values()
+            if s.evictable and s.last_used < cutoff
+        ]
+        for sess in idle:
+            await self._evict(sess)
+        return [s.session_id for s in idle]
+
+    async def close_all(self) -> None:
+        for sess in [s for s in self._sessions.values() if not s.pinned]:
+            await self._evict(sess)
+
+    async def run_evictor(self, interval: float = 60.0) -> None:
+        """Background task: periodically evict idle sessions."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                logger.warning(f"[SESSIONS] Idle eviction failed: {e}")
+
+    async def _create(self, session_id: str) -> StudentSession:
+        name = tmux_session_name(session_id)
+        # Check and reserve under the lock, so concurrent creates cannot all
+        # pass the check; the tmux commands themselves still run in parallel.
+        async with self._slots:
+            if len(self._sessions) + self._reserved >= self.max_sessions:
+                await self._evict_lru()
+            self._reserved += 1
+        try:
+            return await self._start(session_id, name)
+        finally:
+            self._reserved -= 1
+
+    async def _start(self, session_id: str, name: str) -> StudentSession:
+        target = quote(name)
+        try:
+            await self.client.acommand(
+                f"new-session -d -s {target} -x {WINDOW_WIDTH} -y {WINDOW_HEIGHT} -n STUDENT "
+                f"{quote(shell_marks.STUDENT_SHELL)}"
+            )
+            await self.client.acommand(f"new-window -d -t {quote(name + ':1')} -n TUTOR")
+            await self.client.acommand(f"set-option -t {target} status off")
+            shell_marks.reset_log(name)  # not for an adopted session, whose log is live
+            await self.client.acommand(shell_marks.pipe_command(f"{name}:0.0", name))
+            logger.info(f"[SESSIONS] Created tmux session '{name}'")
+        except TmuxCommandError as e:
+            # Survived a backend restart: adopt it.
+            if "duplicate session" not in str(e):
+                raise
+        return self._sessions.setdefault(
+            session_id, StudentSession(session_id, name, f"{name}:0.0", f"{name}:1.0")
+        )
+
+    async def _evict_lru(self) -> None:
+        for sess in self._sessions.values():  # oldest first
+            if sess.evictable:
+                await self._evict(sess)
+                return
+        raise RegistryFull(f"All {self.max_sessions} sessions are busy")
+
+    async def _evict(self, sess: StudentSession) -> None:
+        self._sessions.pop(sess.session_id, None)
+        try:
+            await self.client.acommand(f"kill-session -t {quote(sess.tmux_session)}")
+        except TmuxCommandError:
+            pass  # already gone
+        logger.info(f"[SESSIONS] Evicted '{sess.session_id}'")
+
+
+_registry: SessionRegistry | None = None
+
+
+def get_session_registry() -> SessionRegistry:
+    global _registry
+    if _registry is None:
+        _registry = SessionRegistry(get_control_client())
+    return _registry
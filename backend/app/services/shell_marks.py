@@ -0,0 +1,307 @@
+"""Command records from OSC 133 shell-integration marks.
+
+scripts/shell-integration.bash makes the student's bash mark its output:
+`ESC]133;C;cmdline_url=<cmd>;t=<epoch>` when a command starts and
+`ESC]133;D;<exit status>;t=<epoch>` when it finishes (plus A/B around the
+prompt). tmux keeps these from the web terminal, so setup-tutor.sh and
+session_registry pipe the STUDENT pane's raw output into
+`<shell_marks_dir>/<tmux session>.log` with `tmux pipe-pane -O`.
+
+A CommandIndex follows one such log. `refresh` parses only the bytes appended
+since the previous call (a mark split across reads is carried over) and turns
+every C...D pair into a CommandRecord: command line, exit status, start and
+finish time, and the byte span of its output in the log. `last(k)` takes the
+newest k records from a deque, O(k) however long the lesson has run; output
+text is read from a record's span and rendered only when asked for, and only
+the tail of a long output.
+"""
+
+import json
+import os
+import re
+import shlex
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from itertools import islice
+from urllib.parse import unquote
+
+from app.config import settings
+from app.services.terminal_screen import needs_screen, render_terminal
+
+INTEGRATION_SCRIPT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "..", "scripts", "shell-integration.bash")
+)
+STUDENT_SHELL = f"bash --rcfile {shlex.quote(INTEGRATION_SCRIPT)} -i"
+MAX_RECORDS = 5000
+MAX_COMMANDS = 20  # per LastCommands call
+OUTPUT_TAIL_BYTES = 16 * 1024
+OUTPUT_TAIL_LINES = 30
+TAIL_CHECK = 64  # last bytes consumed, re-read to notice a log rewritten in place
+MAX_CARRY = 8192  # longest partial mark kept between reads
+
+_MARK = re.compile(rb"\x1b\]133;([A-D])([^\x07\x1b]*)(?:\x07|\x1b\\)")
+_MARK_PREFIX = b"\x1b]133;"
+
+
+@dataclass
+class Mark:
+    kind: str  # "A".."D"
+    positional: list[str]
+    keyed: dict[str, str]
+    start: int  # byte span of the escape sequence in the scanned buffer
+    end: int
+
+
+@dataclass
+class CommandRecord:
+    seq: int
+    command: str  # "" when the shell could not recover it (line kept out of history)
+    started_at: float | None
+    output_start: int
+    output_end: int | None = None  # None while the command is running
+    exit_status: int | None = None
+    finished_at: float | None = None
+
+    @classmethod
+    def started(cls, seq: int, mark: Mark, output_start: int) -> "CommandRecord":
+        return cls(
+            seq=seq,
+            command=unquote(mark.keyed.get("cmdline_url", "")),
+            started_at=_float(mark.keyed.get("t")),
+            output_start=output_start,
+        )
+
+    def finish(self, mark: Mark, output_end: int) -> None:
+        status = mark.positional[0] if mark.positional else ""
+        self.output_end = output_end
+        self.exit_status = int(status) if status.isdigit() else None
+        self.finished_at = _float(mark.keyed.get("t"))
+
+    @property
+    def running(self) -> bool:
+        return self.output_end is None
+
+    @property
+    def duration(self) -> float | None:
+        end = self.finished_at if not self.running else time.time()
+        if self.started_at is None or end is None:
+            return None
+        return max(end - self.started_at, 0.0)
+
+
+def _fields(raw: bytes) -> tuple[list[str], dict[str, str]]:
+    """Split `;a;b;key=value` mark parameters into positional and keyed."""
+    positional, keyed = [], {}
+    for part in raw.decode("ascii", "replace").split(";")[1:]:
+        key, sep, value = part.partition("=")
+        if sep:
+            keyed[key] = value
+        else:
+            positional.append(part)
+    return positional, keyed
+
+
+def _float(value: str | None) -> float | None:
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def _carry_from(buf: bytes) -> int:
+    """Index where an unterminated mark starts at the end of `buf`, else len(buf)."""
+    start = buf.rfind(b"\x1b", max(0, len(buf) - MAX_CARRY))
+    if start == -1:
+        return len(buf)
+    tail = buf[start:]
+    if not _MARK_PREFIX.startswith(tail[: len(_MARK_PREFIX)]):
+        return len(buf)
+    if b"\x07" in tail or b"\x1b\\" in tail[1:]:
+        return len(buf)
+    return start
+
+
+def scan_marks(buf: bytes) -> tuple[list[Mark], int]:
+    """Complete marks in `buf`, and where an unterminated one at its end starts (else len(buf))."""
+    end = _carry_from(buf)
+    marks = []
+    for m in _MARK.finditer(buf, 0, end):
+        kind = m.group(1).decode()
+        positional, keyed = _fields(m.group(2)) if kind in "CD" else ([], {})
+        marks.append(Mark(kind, positional, keyed, m.start(), m.end()))
+    return marks, end
+
+
+def render_output(
+    raw: bytes, cut: bool = False, max_lines: int = OUTPUT_TAIL_LINES, cols: int | None = None
+) -> tuple[str, bool]:
+    """(rendered tail of raw command output, whether it was cut); `cut` if `raw` already is."""
+    lines = [line.rstrip() for line in render_terminal(raw.decode("utf-8", "replace"), cols)]
+    lines = [line for line in lines if line.strip()]
+    return "\n".join(lines[-max_lines:]), cut or len(lines) > max_lines
+
+
+def describe(record: CommandRecord, output: str, truncated: bool) -> dict:
+    """JSON-ready view of a record, as LastCommands and terminal events show it."""
+    duration = record.duration
+    item = {
+        "command": record.command,
+        "exit_status": record.exit_status,
+        "running": record.running,
+        "duration_s": round(duration, 3) if duration is not None else None,
+        "output": output,
+    }
+    if truncated:
+        item["output_truncated"] = True
+    if record.finished_at is not None:
+        item["seconds_ago"] = round(max(time.time() - record.finished_at, 0.0), 1)
+    return item
+
+
+class CommandIndex:
+    """Incremental command index over one pane's raw output log."""
+
+    def __init__(self, path: str, max_records: int = MAX_RECORDS, pane: str | None = None):
+        self.path = path
+        self.pane = pane  # tmux target the log comes from, for its width
+        self.records: deque[CommandRecord] = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+        self.generation = -1
+        self._reset(None)
+
+    def _reset(self, inode: int | None) -> None:
+        # Bumped whenever the records start over; seq numbers and offsets
+        # from another generation mean nothing (setup-tutor.sh truncates the
+        # log in place, which keeps its inode).
+        self.generation += 1
+        self.records.clear()
+        self.offset = 0  # bytes of the log consumed
+        self._tail = b""  # its last TAIL_CHECK bytes, to notice an in-place rewrite
+        self.running: CommandRecord | None = None
+        self._carry = b""
+        self._seq = 0
+        self._inode = inode
+
+    @property
+    def inode(self) -> int | None:
+        """Inode of the log the records come from (None before the first refresh)."""
+        return self._inode
+
+    def refresh(self) -> int:
+        """Parse what was appended to the log since the last call; returns new records."""
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                return 0
+            if st.st_ino != self._inode or st.st_size < self.offset:
+                self._reset(st.st_ino)  # recreated or truncated by a new setup
+            if st.st_size == self.offset:
+                return 0
+            with open(self.path, "rb") as f:
+                f.seek(self.offset - len(self._tail))
+                data = f.read(st.st_size - self.offset + len(self._tail))
+                if not data.startswith(self._tail):
+                    # Truncated and written past our offset since the last
+                    # refresh: the bytes we consumed are gone.
+                    self._reset(st.st_ino)
+                    f.seek(0)
+                    data = f.read(st.st_size)
+                else:
+                    data = data[len(self._tail):]
+            before = self._seq
+            self._feed(data)
+            return self._seq - before
+
+    def _feed(self, data: bytes) -> None:
+        base = self.offset - len(self._carry)
+        buf = self._carry + data
+        self.offset += len(data)
+        self._tail = buf[-TAIL_CHECK:]
+        marks, end = scan_marks(buf)
+        self._carry = buf[end:]
+        for mark in marks:
+            if mark.kind == "C":
+                self._seq += 1
+                self.running = CommandRecord.started(self._seq, mark, base + mark.end)
+            elif mark.kind == "D" and self.running is not None:
+                self.running.finish(mark, base + mark.start)
+                self.records.append(self.running)
+                self.running = None
+
+    def last(self, k: int) -> list[CommandRecord]:
+        """The newest k commands, oldest first; a still-running command counts as newest."""
+        newest = [self.running] if self.running is not None and k > 0 else []
+        newest += islice(reversed(self.records), max(k - len(newest), 0))
+        return newest[::-1]
+
+    def output(self, record: CommandRecord, max_lines: int = OUTPUT_TAIL_LINES) -> tuple[str, bool]:
+        """(rendered tail of the command's output, whether it was cut)."""
+        end = record.output_end if record.output_end is not None else self.offset
+        start = max(record.output_start, end - OUTPUT_TAIL_BYTES)
+        if end <= start:
+            return "", False
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            raw = f.read(end - start)
+        cols = None
+        if self.pane is not None and needs_screen(raw.decode("utf-8", "replace")):
+            from app.services.tmux_service import pane_width
+
+            cols = pane_width(self.pane)
+        return render_output(raw, start > record.output_start, max_lines, cols)
+
+    def to_dict(self, record: CommandRecord) -> dict:
+        return describe(record, *self.output(record))
+
+
+def log_path(tmux_session: str) -> str:
+    return os.path.join(os.path.expanduser(settings.shell_marks_dir), f"{tmux_session}.log")
+
+
+def reset_log(tmux_session: str) -> None:
+    """Empty a session's marks log, as setup-tutor.sh does for its own session.
+
+    The log only ever grows while its session lives; a new session starts it
+    over (readers see the truncation and start a new generation).
+    """
+    path = log_path(tmux_session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "wb").close()
+
+
+def pipe_command(pane: str, tmux_session: str) -> str:
+    """tmux command that appends the pane's raw output to its marks log."""
+    from app.services.tmux_control import quote
+
+    path = log_path(tmux_session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return f"pipe-pane -O -t {quote(pane)} {quote('cat >> ' + shlex.quote(path))}"
+
+
+_indexes: dict[str, CommandIndex] = {}
+
+
+def get_command_index(session_id: str) -> CommandIndex:
+    from app.services.session_registry import tmux_session_name
+
+    index = _indexes.get(session_id)
+    if index is None:
+        name = tmux_session_name(session_id)
+        index = _indexes[session_id] = CommandIndex(log_path(name), pane=f"{name}:0.0")
+    return index
+
+
+def last_commands(session_id: str, k: int = 1) -> str:
+    """The last k commands of a student's terminal as a JSON list, oldest first."""
+    index = get_command_index(session_id)
+    index.refresh()
+    if index.offset == 0:
+        return (
+            "No command history: shell integration is not active for this terminal. "
+            "Use ReadTerminal instead."
+        )
+    k = max(1, min(int(k), MAX_COMMANDS))
+    return json.dumps([index.to_dict(r) for r in index.last(k)], ensure_ascii=False, indent=1)
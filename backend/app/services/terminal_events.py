@@ -0,0 +1,382 @@
+"""Push events from the student's terminal.
+
+Without this, consumers learn what the student did by polling
+`capture-pane` or by waiting for the student to type "xong". A PaneWatcher
+instead attaches its own `tmux -C attach-session -f ignore-size,read-only`
+client to the student's tmux session: tmux pushes every byte the STUDENT pane
+prints as a `%output` notification (control mode only delivers output of the
+session it is attached to, hence one client per watched session; ignore-size
+keeps it from resizing the student's window). The watcher scans that stream
+for the shell-integration marks (see shell_marks) and publishes, on an
+asyncio EventBus:
+
+- `command_started`: {"command"}
+- `output`: {"command", "bytes", "tail"} a running command printed and then
+  went quiet for BURST_QUIET seconds (or kept printing for BURST_MAX_AGE)
+- `long_running`: {"command", "elapsed_s"} still running after
+  `terminal_long_running` seconds; once per command
+- `command_finished`: the command as LastCommands shows it (exit status,
+  duration, rendered output tail)
+- `closed`: {} the tmux session went away; the watcher has stopped
+
+Watchers run only while someone is subscribed (plus WATCH_GRACE seconds so a
+reconnecting client resumes from its Last-Event-ID), entirely on the app
+event loop: no threads and no periodic tmux commands. A running watcher holds
+its session in the registry, so the idle sweep does not kill the tmux
+session under a subscriber that only listens.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+from app.config import settings
+from app.services import shell_marks
+from app.services.session_registry import SessionRegistry, StudentSession, get_session_registry
+from app.services.tmux_control import READ_LIMIT, quote
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE = 256  # events buffered per subscriber; the oldest are dropped beyond
+HISTORY = 256  # recent events per session kept for Last-Event-ID resume
+BURST_QUIET = 0.3  # seconds without output that end an output burst
+BURST_MAX_AGE = 2.0  # continuous output is still reported this often
+BURST_TAIL_LINES = 5
+WATCH_GRACE = 30.0  # seconds a watcher outlives its last subscriber
+ATTACH_TIMEOUT = 2.0
+
+_ESCAPED = re.compile(rb"\\([0-7]{3})")
+
+
+def _unescape(data: bytes) -> bytes:
+    """Undo control mode's octal escaping of %output data."""
+    if b"\\" not in data:
+        return data
+    return _ESCAPED.sub(lambda m: bytes([int(m.group(1), 8)]), data)
+
+
+@dataclass
+class TerminalEvent:
+    id: int  # increasing per session
+    session_id: str
+    type: str
+    data: dict
+    at: float = field(default_factory=time.time)
+
+
+class Subscription:
+    """One consumer's bounded event queue."""
+
+    def __init__(self, session_id: str, maxsize: int = SUBSCRIBER_QUEUE):
+        self.session_id = session_id
+        self.queue: asyncio.Queue[TerminalEvent] = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def put(self, event: TerminalEvent) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()  # a slow consumer loses the oldest, never blocks the watcher
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self) -> TerminalEvent:
+        return await self.queue.get()
+
+
+class EventBus:
+    """Per-session pub/sub with a short replay history. Event loop only."""
+
+    def __init__(self, history: int = HISTORY):
+        self.history = history
+        self._subscribers: dict[str, set[Subscription]] = {}
+        self._recent: dict[str, deque[TerminalEvent]] = {}
+        self._ids: dict[str, int] = {}
+        self.published = 0
+
+    def publish(self, session_id: str, type: str, data: dict) -> TerminalEvent:
+        event_id = self._ids[session_id] = self._ids.get(session_id, 0) + 1
+        event = TerminalEvent(event_id, session_id, type, data)
+        recent = self._recent.get(session_id)
+        if recent is None:
+            recent = self._recent[session_id] = deque(maxlen=self.history)
+        recent.append(event)
+        for sub in self._subscribers.get(session_id, ()):
+            sub.put(event)
+        self.published += 1
+        return event
+
+    def subscribe(self, session_id: str, after: int | None = None) -> Subscription:
+        """New subscription; with `after`, first replays the kept events newer than that id."""
+        sub = Subscription(session_id)
+        if after is not None:
+            for event in self._recent.get(session_id, ()):
+                if event.id > after:
+                    sub.put(event)
+        self._subscribers.setdefault(session_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        subs = self._subscribers.get(sub.session_id)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del self._subscribers[sub.session_id]
+
+    def subscribers(self, session_id: str) -> int:
+        return len(self._subscribers.get(session_id, ()))
+
+    def forget(self, session_id: str) -> None:
+        """Drop a session's replay history (ids keep increasing)."""
+        self._recent.pop(session_id, None)
+
+
+class PaneWatcher:
+    """Turns one pane's %output stream into terminal events."""
+
+    def __init__(
+        self,
+        session_id: str,
+        tmux_session: str,
+        pane_id: str,
+        bus: EventBus,
+        socket_name: str | None = None,
+        long_running_after: float = settings.terminal_long_running,
+        cols: int | None = None,
+    ):
+        self.session_id = session_id
+        self.tmux_session = tmux_session
+        self.pane_id = pane_id  # %N, as %output names it
+        self.bus = bus
+        self.socket_name = socket_name
+        self.long_running_after = long_running_after
+        self.cols = cols  # pane width, for output that has to be replayed
+        self.received = 0  # bytes of pane output seen
+        self._carry = b""
+        self._seq = 0
+        self.running: shell_marks.CommandRecord | None = None
+        self._tail = bytearray()  # running command's output, last OUTPUT_TAIL_BYTES
+        self._cut = False
+        self._burst = 0
+        self._burst_started = 0.0
+        self._burst_timer: asyncio.TimerHandle | None = None
+        self._long_timer: asyncio.TimerHandle | None = None
+        self._proc: asyncio.subprocess.Process | None = None
+        self.attached = asyncio.Event()
+
+    async def run(self) -> None:
+        """Follow the pane until its session (or this task) ends."""
+        server = ["-L", self.socket_name] if self.socket_name else []
+        self._proc = await asyncio.create_subprocess_exec(
+            "tmux", *server, "-C", "attach-session", "-t", self.tmux_session, "-f", "ignore-size,read-only",
+            stdin=asyncio.subprocess.PIPE,  # kept open: EOF on stdin detaches the client
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            limit=READ_LIMIT,
+        )
+        prefix = f"%output {self.pane_id} ".encode()
+        logger.info(f"[EVENTS] Watching {self.pane_id} of '{self.tmux_session}'")
+        try:
+            while True:
+                raw = await self._proc.stdout.readline()
+                if not raw or raw.startswith(b"%exit"):
+                    break
+                if raw.startswith(prefix):
+                    self.feed(_unescape(raw[len(prefix):].removesuffix(b"\n")))
+                elif raw.startswith(b"%session-changed"):
+                    self.attached.set()
+        finally:
+            self._cancel_timers()
+            await self._stop_client()
+            self.bus.publish(self.session_id, "closed", {})
+            logger.info(f"[EVENTS] Stopped watching '{self.tmux_session}'")
+
+    def feed(self, data: bytes) -> None:
+        """Process a chunk of raw pane output."""
+        self.received += len(data)
+        buf = self._carry + data
+        marks, end = shell_marks.scan_marks(buf)
+        self._carry = buf[end:]
+        pos = 0
+        for mark in marks:
+            self._output(buf[pos:mark.start])
+            pos = mark.end
+            if mark.kind == "C":
+                self._started(mark)
+            elif mark.kind == "D":
+                self._finished(mark)
+        self._output(buf[pos:end])
+
+    # ─── Internals ────────────────────────────────────────────────────────
+
+    def _publish(self, type: str, data: dict) -> None:
+        self.bus.publish(self.session_id, type, data)
+
+    def _started(self, mark: shell_marks.Mark) -> None:
+        self._seq += 1
+        self.running = shell_marks.CommandRecord.started(self._seq, mark, self.received)
+        self._tail.clear()
+        self._cut = False
+        self._cancel_timers()
+        loop = asyncio.get_running_loop()
+        self._long_timer = loop.call_later(self.long_running_after, self._long_running, self.running)
+        self._publish("command_started", {"command": self.running.command})
+
+    def _finished(self, mark: shell_marks.Mark) -> None:
+        record, self.running = self.running, None
+        if record is None:
+            return  # the prompt's first D, or a command started before we attached
+        self._cancel_timers()  # an unreported burst is part of the finished command's output
+        record.finish(mark, self.received)
+        output, truncated = shell_marks.render_output(bytes(self._tail), self._cut, cols=self.cols)
+        self._publish("command_finished", shell_marks.describe(record, output, truncated))
+
+    def _output(self, chunk: bytes) -> None:
+        if not chunk or self.running is None:
+            return  # keystroke echo and prompts are not command output
+        self._tail += chunk
+        overflow = len(self._tail) - shell_marks.OUTPUT_TAIL_BYTES
+        if overflow > 0:
+            del self._tail[:overflow]
+            self._cut = True
+        now = time.monotonic()
+        if not self._burst:
+            self._burst_started = now
+        self._burst += len(chunk)
+        if self._burst_timer is not None:
+            self._burst_timer.cancel()
+        if now - self._burst_started >= BURST_MAX_AGE:
+            self._flush_burst()
+        else:
+            self._burst_timer = asyncio.get_running_loop().call_later(BURST_QUIET, self._flush_burst)
+
+    def _flush_burst(self) -> None:
+        self._burst_timer = None
+        if not self._burst or self.running is None:
+            return
+        tail, _ = shell_marks.render_output(bytes(self._tail[-2048:]), max_lines=BURST_TAIL_LINES, cols=self.cols)
+        self._publish("output", {"command": self.running.command, "bytes": self._burst, "tail": tail})
+        self._burst = 0
+
+    def _long_running(self, record: shell_marks.CommandRecord) -> None:
+        self._long_timer = None
+        if self.running is record:
+            self._publish("long_running", {"command": record.command, "elapsed_s": round(record.duration or 0.0, 1)})
+
+    def _cancel_timers(self) -> None:
+        for timer in (self._burst_timer, self._long_timer):
+            if timer is not None:
+                timer.cancel()
+        self._burst_timer = self._long_timer = None
+        self._burst = 0
+
+    async def _stop_client(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None or proc.returncode is not None:
+            return
+        try:
+            proc.stdin.close()
+            await asyncio.wait_for(proc.wait(), 1.0)
+        except (asyncio.TimeoutError, OSError):
+            proc.kill()
+
+
+class TerminalWatchers:
+    """Starts a PaneWatcher per subscribed session and stops it when nobody listens."""
+
+    def __init__(self, registry: SessionRegistry, bus: EventBus | None = None, grace: float = WATCH_GRACE):
+        self.registry = registry
+        self.bus = bus if bus is not None else EventBus()
+        self.grace = grace
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._starting: dict[str, asyncio.Lock] = {}
+        self._stop_timers: dict[str, asyncio.TimerHandle] = {}
+
+    @asynccontextmanager
+    async def subscribe(self, session_id: str, after: int | None = None) -> AsyncIterator[Subscription]:
+        """Receive a session's events for the duration of the block."""
+        sub = self.bus.subscribe(session_id, after)
+        try:
+            await self._ensure_watching(session_id)
+            yield sub
+        finally:
+            self.bus.unsubscribe(sub)
+            if not self.bus.subscribers(session_id):
+                self._schedule_stop(session_id)
+
+    def watching(self) -> list[str]:
+        return list(self._tasks)
+
+    async def close_all(self) -> None:
+        for timer in self._stop_timers.values():
+            timer.cancel()
+        self._stop_timers.clear()
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def snapshot(self) -> dict:
+        return {"watching": self.watching(), "published": self.bus.published}
+
+    async def _ensure_watching(self, session_id: str) -> None:
+        timer = self._stop_timers.pop(session_id, None)
+        if timer is not None:
+            timer.cancel()
+        lock = self._starting.setdefault(session_id, asyncio.Lock())
+        async with lock:
+            if session_id in self._tasks:
+                return
+            sess = await self.registry.acquire(session_id)
+            client = self.registry.client
+            lines = await client.acommand(
+                f"display-message -p -t {quote(sess.student_pane)} {quote('#{pane_id} #{pane_width}')}"
+            )
+            pane_id, _, width = lines[0].strip().partition(" ")
+            watcher = PaneWatcher(
+                session_id, sess.tmux_session, pane_id, self.bus, client.socket_name,
+                cols=int(width) if width.isdigit() else None,
+            )
+            task = asyncio.create_task(watcher.run())
+            self._tasks[session_id] = task
+            sess.hold()
+            task.add_done_callback(lambda t: self._finished(session_id, t, sess))
+            # Events start once tmux has attached the watcher; don't return before that.
+            attached = asyncio.create_task(watcher.attached.wait())
+            await asyncio.wait({attached, task}, timeout=ATTACH_TIMEOUT, return_when=asyncio.FIRST_COMPLETED)
+            attached.cancel()
+
+    def _finished(self, session_id: str, task: asyncio.Task, sess: StudentSession) -> None:
+        sess.release()
+        if self._tasks.get(session_id) is task:
+            del self._tasks[session_id]
+        if not self.bus.subscribers(session_id):
+            self.bus.forget(session_id)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"[EVENTS] Watcher for '{session_id}' failed: {task.exception()!r}")
+
+    def _schedule_stop(self, session_id: str) -> None:
+        if session_id in self._stop_timers:
+            self._stop_timers[session_id].cancel()
+        self._stop_timers[session_id] = asyncio.get_running_loop().call_later(self.grace, self._stop, session_id)
+
+    def _stop(self, session_id: str) -> None:
+        self._stop_timers.pop(session_id, None)
+        if self.bus.subscribers(session_id):
+            return
+        task = self._tasks.get(session_id)
+        if task is not None:
+            task.cancel()
+
+
+_watchers: TerminalWatchers | None = None
+
+
+def get_terminal_watchers() -> TerminalWatchers:
+    global _watchers
+    if _watchers is None:
+        _watchers = TerminalWatchers(get_session_registry())
+    return _watchers
@@ -0,0 +1,380 @@
+"""Terminal reads for the ReadTerminal tool.
+
+When the STUDENT pane's pipe-pane log exists, reads are served from its
+local Scrollback (see scrollback): the last lines are sliced off a line
+index, with no request and no split of the whole buffer. Otherwise the
+"default" and "tutor" terminals go to the terminal service through shared
+keep-alive httpx clients (one sync, one async) instead of a new connection
+per call, and a pooled student's terminal is captured from its registry
+tmux session; a student without one gets NoTerminal, never another
+student's terminal.
+
+Within one agent turn the model often reads the terminal several times with
+different `lines`; `begin_turn` opens a per-turn snapshot so the first read
+fetches SNAPSHOT_LINES once and later reads with `lines` up to that are
+sliced from it locally (the same split-on-newline slice the terminal service
+does). A snapshot older than
+`ttl` is refetched, so a turn that waits on the student still sees new
+output.
+
+Reads inside an agent turn can also be diffed against a TerminalView, the
+agent's record of what it has already been shown: the longest run of lines
+it saw before is replaced by an "[N unchanged lines elided]" marker, so a
+tutor that polls the terminal is sent only new output. `full=True` returns
+the whole window.
+
+Every read is timed; `stats.snapshot()` reports fetches, snapshot hits,
+fetch/format time and the lines/bytes elided by diff reads. httpx is
+imported when the first client is opened.
+"""
+
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from difflib import SequenceMatcher
+from typing import TYPE_CHECKING
+
+from app.config import settings
+from app.services import scrollback
+from app.services.terminal_screen import DEFAULT_SCROLLBACK, needs_screen, render_terminal
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_SERVICE_URL = os.environ.get("TERMINAL_SERVICE_URL", "http://localhost:17076")
+SNAPSHOT_LINES = 100
+REQUEST_TIMEOUT = 5.0
+MIN_ELIDED_LINES = 3  # shorter repeats cost about as much as the marker
+MAX_SEEN_LINES = 2000
+
+
+@dataclass
+class ReadStats:
+    calls: int = 0
+    fetches: int = 0
+    local_fetches: int = 0  # served from the pane's Scrollback
+    snapshot_hits: int = 0
+    errors: int = 0
+    fetch_seconds: float = 0.0
+    format_seconds: float = 0.0
+    diff_reads: int = 0
+    elided_lines: int = 0
+    elided_bytes: int = 0
+
+    def snapshot(self) -> dict:
+        return {
+            **asdict(self),
+            "mean_fetch_ms": round(self.fetch_seconds / self.fetches * 1000, 3) if self.fetches else None,
+            "mean_format_ms": round(self.format_seconds / self.calls * 1000, 3) if self.calls else None,
+        }
+
+
+stats = ReadStats()
+
+
+@dataclass
+class TurnSnapshot:
+    terminal: str
+    ttl: float
+    raw: str | None = None
+    lines: float = 0  # lines the fetch asked for; inf for the whole buffer
+    fetched_at: float = 0.0
+    formatted: dict[int, str] = field(default_factory=dict)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    def covers(self, lines: int) -> bool:
+        wanted = lines if lines > 0 else float("inf")
+        return self.raw is not None and wanted <= self.lines and time.monotonic() - self.fetched_at < self.ttl
+
+    def store(self, raw: str, lines: int) -> None:
+        self.raw = raw
+        self.lines = lines if lines > 0 else float("inf")
+        self.fetched_at = time.monotonic()
+        self.formatted.clear()
+
+
+@dataclass
+class TerminalView:
+    """What one agent has already been shown of its terminal.
+
+    A diff read is only safe while the reads it builds on are still verbatim
+    in the model's context. `begin_turn` drops the baseline once the read
+    that started it is more than `horizon` turns old (ContextWindow elides
+    older tool output) or the history was folded since (`epoch` changed).
+    """
+
+    seen: list[str] = field(default_factory=list)
+    since_turn: int = 0
+    turn: int = 0
+    epoch: int = 0
+
+    def reset(self) -> None:
+        self.seen = []
+
+    def begin_turn(self, turn: int, epoch: int, horizon: int) -> None:
+        self.turn = turn
+        if self.seen and (epoch != self.epoch or turn - self.since_turn > horizon):
+            self.reset()
+        self.epoch = epoch
+
+    def observe(self, text: str, full: bool = False) -> str:
+        """`text` with the longest already-seen run of lines elided."""
+        lines = text.split("\n")
+        match = None
+        if self.seen and not full:
+            match = SequenceMatcher(None, self.seen, lines, autojunk=False).find_longest_match(
+                0, len(self.seen), 0, len(lines)
+            )
+        if match is None or match.size < MIN_ELIDED_LINES:
+            self.seen = lines[-MAX_SEEN_LINES:]
+            self.since_turn = self.turn
+            return text
+
+        before, after = lines[: match.b], lines[match.b + match.size:]
+        # A window that starts inside what was seen extends it; one that
+        # reaches further back replaces it.
+        self.seen = (self.seen[: match.a] + lines if match.b == 0 else lines)[-MAX_SEEN_LINES:]
+        stats.diff_reads += 1
+        stats.elided_lines += match.size
+        stats.elided_bytes += sum(len(line.encode("utf-8")) + 1 for line in lines[match.b: match.b + match.size])
+        if not before and not after:
+            return f"[no new output; {match.size} unchanged lines elided]"
+        return "\n".join(before + [f"[{match.size} unchanged lines elided]"] + after)
+
+
+# Terminals the terminal service has (its classic single-student setup).
+# Pooled students are read from their own pane log (scrollback), else from
+# their registry tmux session.
+SERVICE_TERMINALS = ("default", "tutor")
+
+
+class NoTerminal(LookupError):
+    """A pooled student has no pane log and no tmux session to read."""
+
+_terminal: contextvars.ContextVar[str] = contextvars.ContextVar("terminal", default="default")
+_turn: contextvars.ContextVar[TurnSnapshot | None] = contextvars.ContextVar("terminal_turn", default=None)
+_view: contextvars.ContextVar[TerminalView | None] = contextvars.ContextVar("terminal_view", default=None)
+
+_client: "httpx.Client | None" = None
+_aclient: "httpx.AsyncClient | None" = None
+
+
+def _limits() -> "httpx.Limits":
+    import httpx
+
+    return httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0)
+
+
+def _sync_client() -> "httpx.Client":
+    global _client
+    if _client is None:
+        import httpx
+
+        _client = httpx.Client(base_url=TERMINAL_SERVICE_URL, limits=_limits(), timeout=REQUEST_TIMEOUT)
+    return _client
+
+
+def _async_client() -> "httpx.AsyncClient":
+    global _aclient
+    if _aclient is None:
+        import httpx
+
+        _aclient = httpx.AsyncClient(base_url=TERMINAL_SERVICE_URL, limits=_limits(), timeout=REQUEST_TIMEOUT)
+    return _aclient
+
+
+async def close_clients() -> None:
+    global _client, _aclient
+    if _client is not None:
+        _client.close()
+        _client = None
+    if _aclient is not None:
+        await _aclient.aclose()
+        _aclient = None
+
+
+def begin_turn(terminal: str = "default", view: TerminalView | None = None) -> tuple:
+    """Start a fresh snapshot for the current agent turn (task / thread context).
+
+    With a `view`, reads in this turn are diffed against what it has seen.
+    Returns tokens for `end_turn`, which restores the caller's context.
+    """
+    return (
+        _terminal.set(terminal),
+        _turn.set(TurnSnapshot(terminal, settings.terminal_snapshot_ttl)),
+        _view.set(view),
+    )
+
+
+def end_turn(tokens: tuple) -> None:
+    """Undo `begin_turn`, so the turn's terminal does not leak into the caller."""
+    for var, token in zip((_terminal, _turn, _view), tokens):
+        try:
+            var.reset(token)
+        except ValueError:
+            pass  # closed from another context (e.g. an abandoned stream); nothing to restore
+
+
+def current_terminal() -> str:
+    """Terminal of the agent turn running in this context."""
+    return _terminal.get()
+
+
+def _observed(text: str, full: bool) -> str:
+    view = _view.get()
+    return text if view is None else view.observe(text, full)
+
+
+def _pane_cols() -> int | None:
+    """Width of the current terminal's pane, for output that has to be replayed."""
+    from app.services.session_registry import tmux_session_name
+    from app.services.tmux_service import STUDENT_PANE, TUTOR_PANE, pane_width
+
+    terminal = _terminal.get()
+    if terminal in SERVICE_TERMINALS:
+        return pane_width(TUTOR_PANE if terminal == "tutor" else STUDENT_PANE)
+    try:
+        return pane_width(f"{tmux_session_name(terminal)}:0.0")
+    except ValueError:
+        return None
+
+
+def format_output(raw: str, cols: int | None = None) -> str:
+    result_lines = []
+    for line in render_terminal(raw, cols):
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if stripped in ('─' * len(stripped),) and len(stripped) > 5:
+            continue
+        result_lines.append(stripped)
+    result = '\n'.join(result_lines)
+    return result if result else "(terminal is empty)"
+
+
+def _fetch_lines(lines: int) -> int:
+    return max(lines, SNAPSHOT_LINES) if lines > 0 else 0
+
+
+def _path(terminal: str) -> str:
+    return f"/api/terminals/{terminal}/read"
+
+
+def _student_pane(terminal: str) -> str:
+    """STUDENT pane of a pooled student's registry session; raises NoTerminal."""
+    from app.services.session_registry import get_session_registry
+
+    sess = get_session_registry().get(terminal)
+    if sess is None:
+        raise NoTerminal(f"no terminal for session {terminal!r}: it has no tmux session yet")
+    return sess.student_pane
+
+
+def _serve(snap: TurnSnapshot | None, raw: str | None, lines: int) -> str:
+    """Slice and format; memoized per `lines` within the snapshot."""
+    if snap is not None and lines in snap.formatted:
+        return snap.formatted[lines]
+    t0 = time.perf_counter()
+    if raw is None:
+        raw = snap.raw
+    if lines > 0:
+        raw = "\n".join(raw.split("\n")[-lines:])
+    result = format_output(raw, _pane_cols() if needs_screen(raw) else None)
+    stats.format_seconds += time.perf_counter() - t0
+    if snap is not None:
+        snap.formatted[lines] = result
+    return result
+
+
+def _record_fetch(t0: float) -> None:
+    stats.fetches += 1
+    stats.fetch_seconds += time.perf_counter() - t0
+
+
+def read(lines: int = 20, full: bool = False) -> str:
+    """Recent terminal output as plain text; raises httpx errors."""
+    stats.calls += 1
+    snap = _turn.get()
+    if snap is not None and snap.covers(lines):
+        stats.snapshot_hits += 1
+        return _observed(_serve(snap, None, lines), full)
+    raw = _fetch(lines)
+    if snap is None:
+        return _serve(None, raw, lines)
+    snap.store(raw, _fetch_lines(lines))
+    return _observed(_serve(snap, None, lines), full)
+
+
+async def aread(lines: int = 20, full: bool = False) -> str:
+    """Async read(); concurrent calls in one turn share a single fetch."""
+    stats.calls += 1
+    snap = _turn.get()
+    if snap is None:
+        return _serve(None, await _afetch(lines), lines)
+    async with snap.lock:
+        if snap.covers(lines):
+            stats.snapshot_hits += 1
+        else:
+            snap.store(await _afetch(lines), _fetch_lines(lines))
+        return _observed(_serve(snap, None, lines), full)
+
+
+def _local(lines: int) -> str | None:
+    """The last lines from the pane's Scrollback, or None when it has no log."""
+    if settings.scrollback_bytes <= 0:
+        return None
+    try:
+        pane = scrollback.get_scrollback(_terminal.get())
+    except ValueError:
+        return None  # not a student session id
+    raw = pane.read(_fetch_lines(lines))
+    if raw is not None:
+        stats.local_fetches += 1
+    return raw
+
+
+def _fetch(lines: int) -> str:
+    t0 = time.perf_counter()
+    try:
+        raw = _local(lines)
+        if raw is not None:
+            return raw
+        terminal = _terminal.get()
+        if terminal not in SERVICE_TERMINALS:
+            from app.services.tmux_service import capture_pane
+
+            return capture_pane(_student_pane(terminal), _fetch_lines(lines) or DEFAULT_SCROLLBACK)
+        resp = _sync_client().get(_path(terminal), params={"lines": _fetch_lines(lines)})
+        resp.raise_for_status()
+    except Exception:
+        stats.errors += 1
+        raise
+    finally:
+        _record_fetch(t0)
+    return resp.json().get("output", "")
+
+
+async def _afetch(lines: int) -> str:
+    t0 = time.perf_counter()
+    try:
+        raw = _local(lines)
+        if raw is not None:
+            return raw
+        terminal = _terminal.get()
+        if terminal not in SERVICE_TERMINALS:
+            from app.services.tmux_service import capture_pane_async
+
+            return await capture_pane_async(_student_pane(terminal), _fetch_lines(lines) or DEFAULT_SCROLLBACK)
+        resp = await _async_client().get(_path(terminal), params={"lines": _fetch_lines(lines)})
+        resp.raise_for_status()
+    except Exception:
+        stats.errors += 1
+        raise
+    finally:
+        _record_fetch(t0)
+    return resp.json().get("output", "")
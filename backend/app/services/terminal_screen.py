@@ -0,0 +1,373 @@
+"""Virtual terminal screen for rendering raw PTY output as clean text.
+
+The terminal service hands us the raw byte stream a tmux client received:
+SGR colours, cursor addressing, line erases, carriage-return progress bars and
+full TUI redraws (Claude Code repaints its input box constantly). Stripping
+escape codes with regexes flattens every redraw into the output; replaying the
+stream onto a screen model keeps only what a person would actually see.
+
+`TerminalScreen.feed` tokenizes with one compiled regex and applies each token
+in a single pass. Lines scrolled off the top go to a bounded scrollback.
+Supported: printable text with autowrap, CR/LF/BS/TAB, CSI cursor movement and
+positioning, erase in line/display, insert/delete chars and lines, scroll
+regions, save/restore cursor, the alternate screen (1049/47/1047) and
+ESC 7/8/M/c. Everything else (SGR, OSC titles, charsets, DCS, modes) is
+consumed and ignored. Wide (East Asian) characters take two cells.
+
+Most captures are plain line-oriented output: colours, titles, CRLF.
+`render_terminal` first strips every escape sequence that does not move the
+cursor with one C-level regex substitution; if no ESC, bare CR or BS is left
+(nothing addresses the cursor, scrolls, inserts/deletes, switches to the
+alternate screen or overwrites the line) that text already reads like the
+screen, and only its lines are split off. Anything else is replayed. The replay is `cols` wide; pass the
+pane's real width (tmux `pane_width`) so wrapped and addressed output lands
+where it did on screen.
+"""
+
+import re
+import unicodedata
+from collections import deque
+
+DEFAULT_COLS = 220
+DEFAULT_ROWS = 50
+DEFAULT_SCROLLBACK = 5000
+
+_TOKEN = re.compile(
+    r"(?P<text>[^\x00-\x1f\x7f]+)"
+    r"|\x1b\[(?P<csi_priv>[?>=!]?)(?P<csi_params>[0-9;:]*)[ -/]*(?P<csi_final>[@-~])"
+    r"|\x1b\](?P<osc>[^\x07\x1b]*)(?:\x07|\x1b\\)"
+    r"|\x1b[P^_X][^\x1b]*\x1b\\"
+    r"|\x1b[()*+#%][0-9A-Za-z]"
+    r"|\x1b(?P<esc>[@-~])"
+    r"|(?P<ctl>[\x00-\x1f\x7f])"
+)
+
+# Escape sequences that leave the cursor where text would: SGR, erase to end
+# of line, modes, device queries, OSC, DCS/PM/APC/SOS, charsets, keypad modes.
+# Left alone (and so still holding an ESC afterwards) is every other CSI
+# (cursor movement and addressing, scroll regions, insert/delete, erase
+# display, the alternate screen ?1049/?1047/?47) and ESC 7/8/M/c, which only
+# a TerminalScreen renders faithfully.
+_INERT_ESCAPES = re.compile(
+    r"\x1b(?:\[[0-9;:]*[ -/]*[Kcghilmnpqt~]"
+    r"|\[\?(?!(?:1049|1047|47)[hl])[0-9;:]*[ -/]*[@-~]"
+    r"|\[[>=!][0-9;:]*[ -/]*[@-~]"
+    r"|\][^\x07\x1b]*(?:\x07|\x1b\\)"
+    r"|[P^_X][^\x1b]*\x1b\\"
+    r"|[()*+#%][0-9A-Za-z]"
+    r"|[=>@-LNOQ-WYZ\\`abd-~])"
+)
+_BARE_CR = re.compile(r"\r(?!\n)")
+# Control characters other than TAB, LF and CR (ESC and BS are gone by then;
+# a CR left ends a line, and is stripped with the line's trailing blanks).
+_CONTROLS = dict.fromkeys([*range(0x09), 0x0B, 0x0C, *range(0x0E, 0x20), 0x7F])
+
+# Runs containing none of these (combining marks, East Asian wide/fullwidth,
+# emoji) can be written one cell per code point with a slice assignment.
+_CELL_SENSITIVE = re.compile(
+    "[\u0300-\u036f\u0483-\u0489\u0591-\u0e4e\u1100-\u115f\u1ab0-\u1aff"
+    "\u1dc0-\u1dff\u200b-\u200f\u20d0-\u20ff\u2300-\u23ff\u2600-\u27bf"
+    "\u2b00-\u2bff\u2e80-\ua4cf\ua960-\ua97f\uac00-\ud7a3\uf900-\ufaff"
+    "\ufe00-\ufe6f\uff00-\uffe6\U0001f000-\U0003fffd]"
+)
+
+
+def _params(raw: str, default: int = 1) -> list[int]:
+    if not raw:
+        return [default]
+    if raw.isdigit():
+        return [int(raw)]
+    return [int(p) if p.isdigit() else default for p in raw.replace(":", ";").split(";")]
+
+
+def _wide(ch: str) -> bool:
+    return unicodedata.east_asian_width(ch) in ("W", "F")
+
+
+class TerminalScreen:
+    def __init__(self, cols: int = DEFAULT_COLS, rows: int = DEFAULT_ROWS, scrollback: int = DEFAULT_SCROLLBACK):
+        self.cols = cols
+        self.rows = rows
+        self.scrollback: deque[str] = deque(maxlen=scrollback)
+        self.reset()
+
+    def reset(self) -> None:
+        self.grid = self._blank_grid()
+        self.x = 0
+        self.y = 0
+        self.top = 0
+        self.bottom = self.rows - 1
+        self.pending_wrap = False
+        self.saved = (0, 0)
+        self._main: tuple[list[list[str]], int, int] | None = None  # set while on the alt screen
+
+    def _blank_grid(self) -> list[list[str]]:
+        return [[" "] * self.cols for _ in range(self.rows)]
+
+    # ─── Input ────────────────────────────────────────────────────────────
+
+    def feed(self, data: str) -> None:
+        write, csi, control, esc, osc = self._write, self._csi, self._control, self._esc, self._osc
+        for m in _TOKEN.finditer(data):
+            text, csi_priv, csi_params, csi_final, osc_body, esc_final, ctl = m.groups()
+            if text is not None:
+                write(text)
+            elif csi_final is not None:
+                if csi_final != "m":  # SGR only changes attributes
+                    csi(csi_priv, csi_params, csi_final)
+            elif ctl is not None:
+                control(ctl)
+            elif esc_final is not None:
+                esc(esc_final)
+            elif osc_body is not None:
+                osc(osc_body)
+
+    def _write(self, text: str) -> None:
+        if text.isascii() or not _CELL_SENSITIVE.search(text):
+            while text:
+                if self.pending_wrap:
+                    self._wrap()
+                row = self.grid[self.y]
+                n = min(len(text), self.cols - self.x)
+                row[self.x:self.x + n] = text[:n]
+                self.x += n
+                text = text[n:]
+                if self.x >= self.cols:
+                    self.x = self.cols - 1
+                    self.pending_wrap = True
+            return
+        for ch in text:
+            if unicodedata.combining(ch):
+                px = self.x if self.pending_wrap else self.x - 1
+                if px >= 0:
+                    self.grid[self.y][px] += ch
+                continue
+            width = 2 if _wide(ch) else 1
+            if self.pending_wrap or self.x + width > self.cols:
+                self._wrap()
+            row = self.grid[self.y]
+            row[self.x] = ch
+            if width == 2:
+                row[self.x + 1] = ""
+            self.x += width
+            if self.x >= self.cols:
+                self.x = self.cols - 1
+                self.pending_wrap = True
+
+    def _wrap(self) -> None:
+        self.pending_wrap = False
+        self.x = 0
+        self._linefeed()
+
+    def _linefeed(self) -> None:
+        if self.y == self.bottom:
+            self._scroll_up(1)
+        elif self.y < self.rows - 1:
+            self.y += 1
+
+    def _control(self, ch: str) -> None:
+        if ch == "\n" or ch == "\x0b" or ch == "\x0c":
+            self.pending_wrap = False
+            self._linefeed()
+        elif ch == "\r":
+            self.pending_wrap = False
+            self.x = 0
+        elif ch == "\b":
+            self.pending_wrap = False
+            self.x = max(0, self.x - 1)
+        elif ch == "\t":
+            self.x = min(self.cols - 1, (self.x // 8 + 1) * 8)
+
+    def _esc(self, final: str) -> None:
+        if final == "7":
+            self.saved = (self.x, self.y)
+        elif final == "8":
+            self.x, self.y = self.saved
+            self.pending_wrap = False
+        elif final == "M":  # reverse index
+            if self.y == self.top:
+                self._scroll_down(1)
+            elif self.y > 0:
+                self.y -= 1
+        elif final == "D":
+            self._linefeed()
+        elif final == "E":
+            self.x = 0
+            self._linefeed()
+        elif final == "c":
+            self.reset()
+
+    def _osc(self, body: str) -> None:
+        """Operating system commands (titles, hyperlinks) carry no screen text."""
+
+    def _csi(self, priv: str, raw: str, final: str) -> None:
+        if priv == "?":
+            if final in "hl":
+                for mode in _params(raw, 0):
+                    if mode in (47, 1047, 1049):
+                        self._alt_screen(final == "h")
+            return
+        if priv:
+            return
+        if final == "K":
+            self._erase_line(int(raw) if raw.isdigit() else 0)
+            return
+        p = _params(raw)
+        n = max(p[0], 1)
+        if final not in "JX":
+            self.pending_wrap = False
+        if final == "A":
+            self.y = max(self.top if self.y >= self.top else 0, self.y - n)
+        elif final in "Be":
+            self.y = min(self.bottom if self.y <= self.bottom else self.rows - 1, self.y + n)
+        elif final in "Ca":
+            self.x = min(self.cols - 1, self.x + n)
+        elif final == "D":
+            self.x = max(0, self.x - n)
+        elif final == "E":
+            self.x, self.y = 0, min(self.rows - 1, self.y + n)
+        elif final == "F":
+            self.x, self.y = 0, max(0, self.y - n)
+        elif final in "G`":
+            self.x = min(self.cols - 1, n - 1)
+        elif final == "d":
+            self.y = min(self.rows - 1, n - 1)
+        elif final in "Hf":
+            row = p[0] if p[0] else 1
+            col = p[1] if len(p) > 1 and p[1] else 1
+            self.y = min(self.rows - 1, row - 1)
+            self.x = min(self.cols - 1, col - 1)
+        elif final == "J":
+            self._erase_display(_params(raw, 0)[0])
+        elif final == "X":
+            row = self.grid[self.y]
+            end = min(self.cols, self.x + n)
+            row[self.x:end] = [" "] * (end - self.x)
+        elif final == "P":
+            row = self.grid[self.y]
+            del row[self.x:self.x + n]
+            row.extend([" "] * (self.cols - len(row)))
+        elif final == "@":
+            row = self.grid[self.y]
+            row[self.x:self.x] = [" "] * n
+            del row[self.cols:]
+        elif final == "L":
+            if self.top <= self.y <= self.bottom:
+                self._scroll_down(n, start=self.y)
+        elif final == "M":
+            if self.top <= self.y <= self.bottom:
+                self._scroll_up(n, start=self.y, keep=False)
+        elif final == "S":
+            self._scroll_up(n)
+        elif final == "T":
+            self._scroll_down(n)
+        elif final == "r":
+            top = p[0] if p[0] else 1
+            bottom = p[1] if len(p) > 1 and p[1] else self.rows
+            if top < bottom <= self.rows:
+                self.top, self.bottom = top - 1, bottom - 1
+                self.x, self.y = 0, 0
+        elif final == "s":
+            self.saved = (self.x, self.y)
+        elif final == "u":
+            self.x, self.y = self.saved
+
+    # ─── Screen operations ────────────────────────────────────────────────
+
+    def _scroll_up(self, n: int, start: int | None = None, keep: bool = True) -> None:
+        start = self.top if start is None else start
+        n = min(n, self.bottom - start + 1)
+        # Only lines leaving a full-screen region on the main screen are history.
+        if keep and start == 0 and self.bottom == self.rows - 1 and self._main is None:
+            for row in self.grid[:n]:
+                self.scrollback.append("".join(row).rstrip())
+        del self.grid[start:start + n]
+        for _ in range(n):
+            self.grid.insert(self.bottom - n + 1, [" "] * self.cols)
+
+    def _scroll_down(self, n: int, start: int | None = None) -> None:
+        start = self.top if start is None else start
+        n = min(n, self.bottom - start + 1)
+        del self.grid[self.bottom - n + 1:self.bottom + 1]
+        for _ in range(n):
+            self.grid.insert(start, [" "] * self.cols)
+
+    def _erase_line(self, mode: int) -> None:
+        row = self.grid[self.y]
+        if mode == 0:
+            row[self.x:] = [" "] * (self.cols - self.x)
+        elif mode == 1:
+            row[:self.x + 1] = [" "] * (self.x + 1)
+        else:
+            row[:] = [" "] * self.cols
+
+    def _erase_display(self, mode: int) -> None:
+        if mode == 0:
+            self._erase_line(0)
+            for y in range(self.y + 1, self.rows):
+                self.grid[y] = [" "] * self.cols
+        elif mode == 1:
+            self._erase_line(1)
+            for y in range(self.y):
+                self.grid[y] = [" "] * self.cols
+        elif mode == 2:
+            self.grid = self._blank_grid()
+        elif mode == 3:
+            self.scrollback.clear()
+
+    def _alt_screen(self, enter: bool) -> None:
+        if enter and self._main is None:
+            self._main = (self.grid, self.x, self.y)
+            self.grid = self._blank_grid()
+        elif not enter and self._main is not None:
+            self.grid, self.x, self.y = self._main
+            self._main = None
+
+    # ─── Output ───────────────────────────────────────────────────────────
+
+    def screen_lines(self) -> list[str]:
+        return ["".join(row).rstrip() for row in self.grid]
+
+    def lines(self) -> list[str]:
+        """Scrollback plus the visible screen, trailing blank rows dropped."""
+        out = list(self.scrollback) + self.screen_lines()
+        while out and not out[-1]:
+            out.pop()
+        return out
+
+    def text(self) -> str:
+        return "\n".join(self.lines())
+
+
+def _stripped(raw: str) -> str | None:
+    """`raw` without its inert escapes, or None when it positions the cursor."""
+    text = _INERT_ESCAPES.sub("", raw)
+    if "\x1b" in text or "\x08" in text or _BARE_CR.search(text):
+        return None  # a CR not ending the line rewrites it
+    return text.translate(_CONTROLS)
+
+
+def needs_screen(raw: str) -> bool:
+    """Whether `raw` positions the cursor, so only a replay renders it faithfully."""
+    return _stripped(raw) is None
+
+
+def render_terminal(raw: str, cols: int | None = None, rows: int = DEFAULT_ROWS) -> list[str]:
+    """Rendered lines of raw terminal output; replayed on a `cols`-wide screen only if needed.
+
+    Lines of output that needs no replay keep their trailing blanks and the
+    CR of a CRLF (every caller strips them); tabs are expanded only when
+    there are any.
+    """
+    text = _stripped(raw)
+    if text is not None:
+        if "\t" in text:
+            text = text.expandtabs()
+        lines = text.split("\n")
+        del lines[:-(DEFAULT_SCROLLBACK + rows)]
+        while lines and (not lines[-1] or lines[-1].isspace()):
+            lines.pop()
+        return lines
+    screen = TerminalScreen(cols or DEFAULT_COLS, rows)
+    screen.feed(raw)
+    return screen.lines()
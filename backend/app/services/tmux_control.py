@@ -0,0 +1,253 @@
+"""Persistent tmux control-mode client.
+
+A single long-lived `tmux -C` process replaces the fork-per-call subprocesses
+in tmux_service. Commands are written to its stdin one per line; tmux answers
+each with a `%begin ... %end` (or `%error`) block, always in the order the
+commands were sent, so a FIFO of futures is enough to hand every reply back to
+its caller. Lines outside a block are notifications (`%output`,
+`%sessions-changed`, ...) and are passed to registered listeners.
+
+Connecting waits for tmux's reply to the startup command (the control
+session's `new-session`) before sending anything, so the first command never
+races the session into existence.
+
+The client owns a private event loop thread so sync FastAPI handlers and async
+code can share the same connection. If tmux exits (server killed, control
+session closed) pending callers fail with TmuxUnavailable and the next command
+reconnects.
+"""
+
+import asyncio
+import logging
+import threading
+from collections import deque
+from collections.abc import Callable, Coroutine
+from concurrent.futures import Future
+from typing import Any, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CONTROL_SESSION = "guided_control"
+COMMAND_TIMEOUT = 5.0
+RECONNECT_BACKOFF = 0.25
+RECONNECT_BACKOFF_MAX = 5.0
+READ_LIMIT = 1 << 20  # longest reply line (joined capture-pane lines can be wide)
+
+
+class TmuxCommandError(RuntimeError):
+    """tmux replied to a command with %error."""
+
+
+class TmuxUnavailable(ConnectionError):
+    """The control-mode connection could not be (re)established."""
+
+
+def quote(arg: str) -> str:
+    """Quote an argument for the tmux command parser.
+
+    Single quotes disable every expansion; newlines and carriage returns are
+    emitted as escapes outside the quotes because the control protocol is
+    line-based.
+    """
+    body = arg.replace("'", "'\\''").replace("\n", "'\\n'").replace("\r", "'\\r'")
+    return f"'{body}'"
+
+
+class TmuxControlClient:
+    """Multiplexes tmux commands over one `tmux -C` connection."""
+
+    def __init__(
+        self,
+        session: str = CONTROL_SESSION,
+        timeout: float = COMMAND_TIMEOUT,
+        socket_name: str | None = None,
+    ):
+        self.session = session
+        self.socket_name = socket_name  # tmux -L; None = default server
+        self.timeout = timeout
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._proc: asyncio.subprocess.Process | None = None
+        self._pending: deque[asyncio.Future] = deque()
+        self._connect_lock: asyncio.Lock | None = None
+        self._listeners: list[Callable[[str], None]] = []
+        self._backoff = 0.0
+        self._closing = False
+
+    # ─── Lifecycle ────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        """Start the loop thread (idempotent). The tmux process connects lazily."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._closing = False
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="tmux-control", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        if not self._loop:
+            return
+        self._closing = True
+        asyncio.run_coroutine_threadsafe(self._disconnect(), self._loop).result(self.timeout)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(self.timeout)
+        self._loop.close()
+        self._loop = None
+        self._thread = None
+
+    @property
+    def connected(self) -> bool:
+        return self._proc is not None and self._proc.returncode is None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        self.start()
+        return self._loop
+
+    def add_listener(self, callback: Callable[[str], None]) -> None:
+        """Register a callback for notification lines. Runs on the client loop thread."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[str], None]) -> None:
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    # ─── Public API ───────────────────────────────────────────────────────
+
+    def submit(self, coro: Coroutine[Any, Any, T]) -> Future[T]:
+        """Schedule a coroutine on the client loop from any thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def command(self, cmd: str) -> list[str]:
+        """Run a tmux command and return its output lines (blocking)."""
+        return self.submit(self.execute(cmd)).result()
+
+    async def acommand(self, cmd: str) -> list[str]:
+        """Run a tmux command from any event loop."""
+        return await asyncio.wrap_future(self.submit(self.execute(cmd)))
+
+    async def execute(self, cmd: str) -> list[str]:
+        """Run a tmux command. Must be awaited on the client loop (see `loop`)."""
+        await self._ensure_connected()
+        reply = self._loop.create_future()
+        # Append before writing: replies arrive in send order.
+        self._pending.append(reply)
+        try:
+            self._proc.stdin.write(cmd.encode() + b"\n")
+            await self._proc.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError) as e:
+            await self._disconnect()
+            raise TmuxUnavailable(f"tmux control connection lost: {e}") from e
+        # Shield so a timed-out caller leaves the future in the FIFO for its reply.
+        return await asyncio.wait_for(asyncio.shield(reply), self.timeout)
+
+    # ─── Internals (client loop thread only) ──────────────────────────────
+
+    async def _ensure_connected(self) -> None:
+        if self.connected:
+            return
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self.connected:
+                return
+            if self._backoff:
+                await asyncio.sleep(self._backoff)
+            try:
+                server = ["-L", self.socket_name] if self.socket_name else []
+                self._proc = await asyncio.create_subprocess_exec(
+                    "tmux", *server, "-C", "new-session", "-A", "-s", self.session,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.DEVNULL,
+                    limit=READ_LIMIT,
+                )
+            except OSError as e:
+                self._backoff = min(max(self._backoff * 2, RECONNECT_BACKOFF), RECONNECT_BACKOFF_MAX)
+                raise TmuxUnavailable(f"cannot start tmux control client: {e}") from e
+            ready = self._loop.create_future()
+            self._loop.create_task(self._read_loop(self._proc, ready))
+            # tmux answers the startup command (new-session) with its own
+            # %begin/%end once the session exists; commands sent before that
+            # can fail with "no such session".
+            try:
+                await asyncio.wait_for(ready, self.timeout)
+            except (asyncio.TimeoutError, TmuxUnavailable) as e:
+                await self._disconnect()
+                self._backoff = min(max(self._backoff * 2, RECONNECT_BACKOFF), RECONNECT_BACKOFF_MAX)
+                raise TmuxUnavailable(f"tmux control client did not start: {e!r}") from e
+            logger.info(f"[TMUX] Control client attached to '{self.session}'")
+        # The control session only exists to host this client.
+        await self.execute(f"set-option -t {quote(self.session)} destroy-unattached on")
+
+    async def _disconnect(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc and proc.returncode is None:
+            try:
+                proc.stdin.close()
+                await asyncio.wait_for(proc.wait(), 1.0)
+            except (asyncio.TimeoutError, OSError):
+                proc.kill()
+        self._fail_pending(TmuxUnavailable("tmux control connection closed"))
+
+    def _fail_pending(self, exc: Exception) -> None:
+        while self._pending:
+            fut = self._pending.popleft()
+            if not fut.done():
+                fut.set_exception(exc)
+
+    async def _read_loop(self, proc: asyncio.subprocess.Process, ready: asyncio.Future) -> None:
+        begin: list[str] | None = None
+        body: list[str] = []
+        while True:
+            raw = await proc.stdout.readline()
+            if not raw:
+                break
+            line = raw.decode(errors="replace").removesuffix("\n")
+            if begin is None:
+                if line.startswith("%begin "):
+                    begin, body = line.split(" "), []
+                else:
+                    self._notify(line)
+                continue
+            parts = line.split(" ")
+            if parts[0] in ("%end", "%error") and parts[1:3] == begin[1:3]:
+                # flags == 1 marks replies to commands this client sent;
+                # 0 is the reply to the startup command.
+                if begin[3:4] == ["1"] and self._pending:
+                    fut = self._pending.popleft()
+                    if not fut.done():
+                        if parts[0] == "%end":
+                            fut.set_result(body)
+                        else:
+                            fut.set_exception(TmuxCommandError("\n".join(body)))
+                elif not ready.done():
+                    if parts[0] == "%end":
+                        ready.set_result(None)
+                    else:
+                        ready.set_exception(TmuxUnavailable("\n".join(body)))
+                begin = None
+            else:
+                body.append(line)
+
+        if self._proc is proc:
+            self._proc = None
+            self._backoff = 0.0 if self._closing else RECONNECT_BACKOFF
+            logger.warning("[TMUX] Control client exited; will reconnect on next command")
+        if not ready.done():
+            ready.set_exception(TmuxUnavailable("tmux control client exited"))
+        self._fail_pending(TmuxUnavailable("tmux control client exited"))
+        self._notify("%exit")
+
+    def _notify(self, line: str) -> None:
+        if line.startswith("%session-changed") or line.startswith("%sessions-changed"):
+            # A successful attach resets the reconnect backoff.
+            self._backoff = 0.0
+        for callback in list(self._listeners):
+            try:
+                callback(line)
+            except Exception as e:
+                logger.error(f"[TMUX] Listener error: {e}")
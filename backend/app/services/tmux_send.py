@@ -0,0 +1,121 @@
+"""Ordered, non-blocking keystroke delivery to tmux panes.
+
+Every pane target gets its own FIFO drained by one worker task on the tmux
+control client's loop, so sends to one pane stay ordered while different panes
+proceed concurrently. A message's text and its first Enter go out as one
+send-keys command; the trailing Enter that Claude Code's TUI needs after a
+paste is scheduled with a loop timer instead of a blocking sleep. The next
+message is typed only after that Enter, so every message is submitted on its
+own (coalescing two would leave the first one's text unsubmitted in the TUI).
+
+Each submission gets two futures: `typed` resolves once the text (and its
+first Enter) reached tmux, `delivered` once the trailing Enter was sent too.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+
+from app.services.tmux_control import TmuxControlClient, quote
+
+logger = logging.getLogger(__name__)
+
+ENTER_DELAY = 0.3
+
+
+@dataclass
+class SendTicket:
+    pane_target: str
+    text: str
+    typed: Future = field(default_factory=Future)
+    delivered: Future = field(default_factory=Future)
+
+    # Callers may cancel either future (asyncio.wrap_future does when its
+    # awaiting task is cancelled), so every transition checks done() first.
+    def fail(self, exc: BaseException) -> None:
+        for fut in (self.typed, self.delivered):
+            if not fut.done():
+                fut.set_exception(exc)
+
+    def mark_typed(self) -> None:
+        if not self.typed.done():
+            self.typed.set_result(None)
+
+    def mark_delivered(self) -> None:
+        if not self.delivered.done():
+            self.delivered.set_result(None)
+
+
+class SendPipeline:
+    def __init__(self, client: TmuxControlClient, enter_delay: float = ENTER_DELAY):
+        self.client = client
+        self.enter_delay = enter_delay
+        self._queues: dict[str, deque[SendTicket]] = {}
+        self._workers: dict[str, asyncio.Task] = {}
+
+    def submit(self, pane_target: str, text: str) -> SendTicket:
+        """Queue text for a pane. Thread-safe; returns immediately."""
+        ticket = SendTicket(pane_target, text)
+        self.client.loop.call_soon_threadsafe(self._enqueue, ticket)
+        return ticket
+
+    async def send(self, pane_target: str, text: str) -> None:
+        """Queue text and wait until the trailing Enter has been delivered."""
+        await asyncio.wrap_future(self.submit(pane_target, text).delivered)
+
+    def pending(self, pane_target: str) -> int:
+        return len(self._queues.get(pane_target, ()))
+
+    def _enqueue(self, ticket: SendTicket) -> None:
+        pane = ticket.pane_target
+        self._queues.setdefault(pane, deque()).append(ticket)
+        if pane not in self._workers:
+            self._workers[pane] = self.client.loop.create_task(self._drain(pane))
+
+    async def _drain(self, pane: str) -> None:
+        queue = self._queues[pane]
+        loop = asyncio.get_running_loop()
+        try:
+            while queue:
+                ticket = queue.popleft()
+                # One failing ticket must not end the worker: the rest of the
+                # queue would wait forever.
+                try:
+                    await self._deliver(pane, ticket, loop)
+                except Exception as e:
+                    logger.error(f"[TMUX] delivery to {pane} failed: {e}")
+                    ticket.fail(e)
+        finally:
+            del self._workers[pane]
+            if not queue:
+                del self._queues[pane]
+
+    async def _deliver(self, pane: str, ticket: SendTicket, loop: asyncio.AbstractEventLoop) -> None:
+        try:
+            await self.client.execute(f"send-keys -t {quote(pane)} {quote(ticket.text)} C-m")
+        except Exception as e:
+            logger.error(f"[TMUX] send-keys to {pane} failed: {e}")
+            ticket.fail(e)
+            return
+        ticket.mark_typed()
+
+        enter_sent = loop.create_future()
+        loop.call_later(
+            self.enter_delay,
+            lambda: loop.create_task(self._send_enter(pane, ticket, enter_sent)),
+        )
+        await enter_sent
+
+    async def _send_enter(self, pane: str, ticket: SendTicket, done: asyncio.Future) -> None:
+        try:
+            await self.client.execute(f"send-keys -t {quote(pane)} C-m")
+        except Exception as e:
+            logger.error(f"[TMUX] trailing Enter to {pane} failed: {e}")
+            ticket.fail(e)
+        else:
+            ticket.mark_delivered()
+        finally:
+            if not done.done():
+                done.set_result(None)
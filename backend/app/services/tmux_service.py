@@ -1,12 +1,92 @@
 import asyncio
+import logging
 import subprocess
 
+from app.services.pane_cursor import PaneDelta, read_delta
+from app.services.session_cache import SessionStateCache
+from app.services.tmux_control import TmuxCommandError, TmuxControlClient, TmuxUnavailable, quote
+from app.services.tmux_send import SendPipeline
+
+logger = logging.getLogger(__name__)
+
 SESSION_NAME = "guided_ai_coding"
 TUTOR_PANE = f"{SESSION_NAME}:1.0"
 STUDENT_PANE = f"{SESSION_NAME}:0.0"
 
+_control = TmuxControlClient()
+_sender = SendPipeline(_control)
+_sessions = SessionStateCache(_control)
+
+
+def get_control_client() -> TmuxControlClient:
+    return _control
+
+
+def get_session_cache() -> SessionStateCache:
+    return _sessions
+
+
+def _capture_cmd(pane_target: str, lines: int) -> str:
+    return f"capture-pane -t {quote(pane_target)} -p -e -J -S -{int(lines)}"
+
+
+def _join(lines: list[str]) -> str:
+    return "".join(f"{line}\n" for line in lines)
+
 
 def session_exists() -> bool:
+    try:
+        return _sessions.has_session(SESSION_NAME)
+    except TmuxUnavailable:
+        return _session_exists_subprocess()
+
+
+def pane_width(pane_target: str) -> int | None:
+    """Columns of a pane per the session cache, or None if it isn't known yet."""
+    pane = _sessions.pane(pane_target)
+    return pane.width if pane is not None else None
+
+
+def capture_pane(pane_target: str = TUTOR_PANE, lines: int = 100) -> str:
+    try:
+        return _join(_control.command(_capture_cmd(pane_target, lines)))
+    except TmuxCommandError:
+        return ""
+    except TmuxUnavailable:
+        return _capture_pane_subprocess(pane_target, lines)
+
+
+def send_keys(pane_target: str, text: str) -> None:
+    """Type text into a pane. Returns once the keys reached tmux; the trailing
+    Enter follows on a timer (await send_keys_async to wait for it)."""
+    _sender.submit(pane_target, text).typed.result()
+
+
+async def send_keys_async(pane_target: str, text: str) -> None:
+    await _sender.send(pane_target, text)
+
+
+async def capture_pane_async(pane_target: str = TUTOR_PANE, lines: int = 100) -> str:
+    try:
+        return _join(await _control.acommand(_capture_cmd(pane_target, lines)))
+    except TmuxCommandError:
+        return ""
+    except TmuxUnavailable:
+        return await _capture_pane_subprocess_async(pane_target, lines)
+
+
+def capture_since(pane_target: str = TUTOR_PANE, token: str | None = None, lines: int = 100) -> PaneDelta:
+    """Rows appended since `token` (None = start a cursor with the last `lines` rows)."""
+    return _control.submit(read_delta(_control, pane_target, token, lines)).result()
+
+
+async def capture_since_async(pane_target: str = TUTOR_PANE, token: str | None = None, lines: int = 100) -> PaneDelta:
+    return await asyncio.wrap_future(_control.submit(read_delta(_control, pane_target, token, lines)))
+
+
+# ─── Subprocess path (fallback when control mode is unavailable) ─────────────
+
+def _session_exists_subprocess() -> bool:
     result = subprocess.run(
         ["tmux", "has-session", "-t", SESSION_NAME],
         capture_output=True,
@@ -14,7 +94,7 @@ def session_exists() -> bool:
     return result.returncode == 0
 
 
-def capture_pane(pane_target: str = TUTOR_PANE, lines: int = 100) -> str:
+def _capture_pane_subprocess(pane_target: str = TUTOR_PANE, lines: int = 100) -> str:
     result = subprocess.run(
         ["tmux", "capture-pane", "-t", pane_target, "-p", "-e", "-J", "-S", f"-{lines}"],
         capture_output=True,
@@ -23,20 +103,7 @@ def capture_pane(pane_target: str = TUTOR_PANE, lines: int = 100) -> str:
     return result.stdout
 
 
-def send_keys(pane_target: str, text: str) -> None:
-    import time
-    subprocess.run(
-        ["tmux", "send-keys", "-t", pane_target, text, "C-m"],
-        check=True,
-    )
-    time.sleep(0.3)
-    subprocess.run(
-        ["tmux", "send-keys", "-t", pane_target, "C-m"],
-        check=True,
-    )
-
-
-async def capture_pane_async(pane_target: str = TUTOR_PANE, lines: int = 100) -> str:
+async def _capture_pane_subprocess_async(pane_target: str = TUTOR_PANE, lines: int = 100) -> str:
     proc = await asyncio.create_subprocess_exec(
         "tmux", "capture-pane", "-t", pane_target, "-p", "-e", "-J", "-S", f"-{lines}",
         stdout=asyncio.subprocess.PIPE,
@@ -3,27 +3,59 @@ Tutor Agent — Power Agent pattern with terminal awareness.
 
 The system prompt and agent loop are copied EXACTLY from the Power Agent Creator skill.
 DO NOT modify the system prompt or tool docstrings.
-Only additions: tutor specialization message + read_terminal tool.
+Only additions: tutor specialization message + read_terminal, last_commands and
+search_history tools, and
+`achat`, an async copy of the loop that runs a turn's tool calls concurrently
+(and `astream_chat`, the same loop on the model's streaming interface, which
+yields tokens and tool events for /api/tutor/chat),
+and a ContextWindow that keeps the history within a token budget before
+each turn.
+
+Prompt layout is arranged for provider prefix caching: the system message is
+coding_agent_prompt with its <env> block (date, working directory, OS) cut
+out, so it is byte-identical for every student and every day, and is shared
+by content hash. The env block and progress.md go at the end of the pinned
+tutor message, after the stable TUTOR_PROMPT.md text.
+
+Agents are per student (see tutor_pool). The model, its tool binding and the
+static prefix are shared between them; an agent owns only its messages.
+
+This module is imported on the first tutor request, not at server startup
+(see tutor_pool); the provider SDKs load with the first model binding.
 """
 
+import asyncio
+import hashlib
+import logging
 import os
 import platform
-import re
-import httpx
+import time
 from datetime import datetime
-from typing import List, Dict, Any, Optional
-from dotenv import load_dotenv
-from langchain_core.messages import SystemMessage, HumanMessage, ToolMessage
+from typing import AsyncIterator, List, Dict, Any, Optional
+from langchain_core.messages import AIMessage, SystemMessage, HumanMessage, ToolMessage, message_chunk_to_message
 from langchain_core.tools import tool, BaseTool
-from langchain.chat_models import init_chat_model
 
-load_dotenv(os.path.expanduser("~/dev/.env"))
+from app.config import settings
+from app.services.context_window import ContextWindow, render_transcript
+from app.services import history_index, shell_marks, terminal_reader
+
+logger = logging.getLogger(__name__)
 
 
-TERMINAL_SERVICE_URL = os.environ.get("TERMINAL_SERVICE_URL", "http://localhost:17076")
 TUTOR_PROMPT_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "..", "tutor", "TUTOR_PROMPT.md")
 TUTOR_MEMORY_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "..", "tutor", "memory")
 
+# Seconds a single tool call may run in achat before it is abandoned and the
+# model is told it timed out.
+TOOL_TIMEOUTS: Dict[str, float] = {"ReadTerminal": 10.0}
+DEFAULT_TOOL_TIMEOUT = 30.0
+TOOL_OUTPUT_PREVIEW = 2000  # chars of tool output included in streamed tool_end events
+
+SUMMARY_PROMPT = """You keep the running notes of a one-on-one coding lesson between a tutor and a student.
+Merge the previous notes with the new part of the transcript into updated notes of at most 150 words:
+what the student has done so far, the current exercise and step, open problems or errors,
+and what the tutor last asked the student to do. Keep the student's language. Output only the notes."""
+
 
 # ─── System Prompt (DO NOT MODIFY) ────────────────────────────────────────────
 
@@ -167,10 +199,38 @@ assistant: Clients are marked as failed in the  function in src/services/process
 Remember: Be direct, efficient, and respect the user's existing codebase conventions."""
 
 
+ENV_BLOCK_START = "Here is useful information about the environment you are running in:\n"
+ENV_BLOCK_END = "</env>\n"
+
+_prefix_messages: Dict[str, SystemMessage] = {}
+
+
+def split_prompt(working_dir: str = None) -> tuple[str, str]:
+    """coding_agent_prompt split into (static text, <env> block)."""
+    prompt = coding_agent_prompt(working_dir)
+    start = prompt.index(ENV_BLOCK_START)
+    end = prompt.index(ENV_BLOCK_END, start) + len(ENV_BLOCK_END)
+    return prompt[:start] + prompt[end:], prompt[start:end].strip()
+
+
+def prompt_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def static_system_message(text: str) -> SystemMessage:
+    """One shared SystemMessage per distinct static prompt text."""
+    key = prompt_hash(text)
+    message = _prefix_messages.get(key)
+    if message is None:
+        message = _prefix_messages[key] = SystemMessage(content=text)
+        logger.info(f"[TUTOR] Static prompt prefix {key} ({len(text)} chars)")
+    return message
+
+
 # ─── Tools ────────────────────────────────────────────────────────────────────
 
 @tool("ReadTerminal")
-def read_terminal(lines: int = 20) -> str:
+def read_terminal(lines: int = 20, full: bool = False) -> str:
     """Reads the current output from the student's terminal (left panel).
 
     Use this tool to observe what the student is doing in the terminal.
@@ -182,39 +242,108 @@ def read_terminal(lines: int = 20) -> str:
     The terminal is a live Linux bash session. Output includes command prompts,
     commands typed by the student, and their output. ANSI escape codes are stripped.
 
+    Lines you were already shown by an earlier ReadTerminal call are replaced by
+    a "[N unchanged lines elided]" marker, so you only receive new output.
+
     Args:
         lines: Number of recent lines to read from the terminal buffer (default 20)
+        full: Return every line, including ones you have already seen (default False)
 
     Returns:
         Recent terminal output as plain text, or error message
     """
     try:
-        resp = httpx.get(
-            f"{TERMINAL_SERVICE_URL}/api/terminals/default/read",
-            params={"lines": lines},
-            timeout=5.0,
-        )
-        resp.raise_for_status()
-        raw = resp.json().get("output", "")
-        clean = re.sub(r'\x1b\][^\x07]*\x07', '', raw)
-        clean = re.sub(r'\x1b\[[0-9;?]*[a-zA-Z~]', '', clean)
-        clean = re.sub(r'\x1b[()][0-9A-B]', '', clean)
-        clean = re.sub(r'\x1b[=>]', '', clean)
-        clean = clean.replace('\r', '')
-        result_lines = []
-        for line in clean.split('\n'):
-            stripped = line.strip()
-            if not stripped:
-                continue
-            if stripped in ('─' * len(stripped),) and len(stripped) > 5:
-                continue
-            result_lines.append(stripped)
-        result = '\n'.join(result_lines)
-        return result if result else "(terminal is empty)"
+        return terminal_reader.read(lines, full)
+    except Exception as e:
+        return f"Error reading terminal: {e}"
+
+
+async def _aread_terminal(lines: int = 20, full: bool = False) -> str:
+    """Async body of ReadTerminal, used by TutorAgent.achat."""
+    try:
+        return await terminal_reader.aread(lines, full)
     except Exception as e:
         return f"Error reading terminal: {e}"
 
 
+read_terminal.coroutine = _aread_terminal
+
+
+@tool("LastCommands")
+def last_commands(k: int = 1) -> str:
+    """Returns the student's most recent terminal commands as structured records.
+
+    Use this to check what the student ran and whether it worked, instead of
+    reading raw terminal lines. Each record has the command line, its exit status
+    (0 means success), whether it is still running, how long it took and the tail
+    of its output.
+
+    Args:
+        k: Number of most recent commands to return (default 1, at most 20)
+
+    Returns:
+        JSON list of command records, oldest first, or error message
+    """
+    try:
+        return shell_marks.last_commands(terminal_reader.current_terminal(), k)
+    except Exception as e:
+        return f"Error reading command history: {e}"
+
+
+@tool("SearchHistory")
+def search_history(
+    query: str = "",
+    kind: str = "all",
+    failed_only: bool = False,
+    since_hours: float = 0,
+    limit: int = 5,
+) -> str:
+    """Searches everything the student has run in the terminal and everything said in this tutoring conversation, including earlier days.
+
+    Use this instead of re-reading terminal output when you need to know whether the
+    student ever did something ("has the student run git init?") or what happened
+    earlier ("what error did they hit yesterday?"). Words are matched regardless of
+    Vietnamese accents; results are ranked best first.
+
+    Args:
+        query: Words to look for; empty lists the newest entries matching the filters
+        kind: "command" (terminal commands with exit status and output), "student",
+            "tutor", or "all" (default)
+        failed_only: Only commands that exited with a non-zero status (default False)
+        since_hours: Only entries from the last N hours; 0 means all time (default 0)
+        limit: Maximum number of results (default 5, at most 20)
+
+    Returns:
+        JSON list of matches with how many hours ago each happened, or a message if nothing matched
+    """
+    try:
+        return history_index.search_history(
+            terminal_reader.current_terminal(), query, kind, failed_only, since_hours, limit
+        )
+    except Exception as e:
+        return f"Error searching history: {e}"
+
+
+TOOLS: List[BaseTool] = [read_terminal, last_commands, search_history]
+TOOLS_MAP: Dict[str, BaseTool] = {t.name: t for t in TOOLS}
+
+_bindings: Dict[str, tuple[Any, Any]] = {}
+
+
+def model_bindings(model_name: str) -> tuple[Any, Any]:
+    """(model, model with TOOLS bound), built once per model name and shared by all agents."""
+    if model_name not in _bindings:
+        # Deferred: the provider keys and langchain's model registry are only
+        # needed once a student actually talks to the tutor.
+        from dotenv import load_dotenv
+        from langchain.chat_models import init_chat_model
+
+        load_dotenv(os.path.expanduser("~/dev/.env"))
+        llm = init_chat_model(model_name)
+        _bindings[model_name] = (llm, llm.bind_tools(TOOLS))
+    return _bindings[model_name]
+
+
 # ─── Agent (DO NOT MODIFY the loop) ──────────────────────────────────────────
 
 class TutorAgent:
@@ -224,20 +353,34 @@ class TutorAgent:
         self,
         model_name: str = "grok-4-fast-non-reasoning",
         working_dir: str = None,
+        terminal: str = "default",
     ):
-        self.tools: List[BaseTool] = [read_terminal]
-        self.tools_map: Dict[str, BaseTool] = {t.name: t for t in self.tools}
+        self.tools: List[BaseTool] = TOOLS
+        self.tools_map: Dict[str, BaseTool] = TOOLS_MAP
+        self.terminal = terminal
 
-        llm = init_chat_model(model_name)
-        self.llm_with_tools = llm.bind_tools(self.tools)
+        self.llm, self.llm_with_tools = model_bindings(model_name)
 
         wd = working_dir or os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
-        self.messages: List[Any] = [SystemMessage(content=coding_agent_prompt(wd))]
+        static_prompt, env_block = split_prompt(wd)
+        self.prefix_hash = prompt_hash(static_prompt)
+        self.messages: List[Any] = [static_system_message(static_prompt)]
 
-        tutor_prompt = self._load_tutor_prompt()
+        tutor_prompt = self._load_tutor_prompt(env_block)
         self.messages.append(HumanMessage(content=tutor_prompt))
+        self.turn_start = len(self.messages)  # first message of the latest turn; tutor_pool logs from here
+
+        # achat turns on one agent must not interleave their messages.
+        self._turn_lock = asyncio.Lock()
+        self.context = ContextWindow(
+            budget=settings.tutor_context_budget,
+            pinned=2,
+            keep_turns=settings.tutor_keep_turns,
+            tool_keep_turns=settings.tutor_tool_keep_turns,
+        )
+        self.terminal_view = terminal_reader.TerminalView() if settings.terminal_diff_reads else None
 
-    def _load_tutor_prompt(self) -> str:
+    def _load_tutor_prompt(self, env_block: str = "") -> str:
         prompt_path = os.path.abspath(TUTOR_PROMPT_PATH)
         try:
             with open(prompt_path, "r") as f:
@@ -253,46 +396,189 @@ class TutorAgent:
         except FileNotFoundError:
             pass
 
-        return tutor_md + progress
+        # Stable text first; the per-day / per-student parts go last so the
+        # provider can reuse the cached prefix up to here.
+        env = f"\n\n{env_block}" if env_block else ""
+        return tutor_md + env + progress
 
     def chat(self, user_input: str) -> str:
-        self.messages.append(HumanMessage(content=user_input))
+        self.messages = self.context.fit(self.messages, self._summarize)
+        turn = self._begin_turn()
+        try:
+            start = self.turn_start = len(self.messages)
+            self.messages.append(HumanMessage(content=user_input))
 
-        response = self.llm_with_tools.invoke(self.messages)
-        self.messages.append(response)
+            response = self.llm_with_tools.invoke(self.messages)
+            self.messages.append(response)
 
-        while hasattr(response, "tool_calls") and response.tool_calls:
-            for tool_call in response.tool_calls:
-                tool_name = tool_call["name"]
-                tool_args = tool_call["args"]
-                tool_id = tool_call["id"]
+            while hasattr(response, "tool_calls") and response.tool_calls:
+                for tool_call in response.tool_calls:
+                    tool_name = tool_call["name"]
+                    tool_args = tool_call["args"]
+                    tool_id = tool_call["id"]
+
+                    if tool_name in self.tools_map:
+                        result = self.tools_map[tool_name].invoke(tool_args)
+                    else:
+                        result = f"Error: Unknown tool '{tool_name}'"
+
+                    self.messages.append(
+                        ToolMessage(content=str(result), tool_call_id=tool_id)
+                    )
+
+                response = self.llm_with_tools.invoke(self.messages)
+                self.messages.append(response)
+
+            self.context.record_turn(self.messages, start)
+            return response.content
+        finally:
+            terminal_reader.end_turn(turn)
+
+    async def achat(self, user_input: str) -> str:
+        """Async variant of chat: ainvoke, with a turn's tool calls run concurrently."""
+        async with self._turn_lock:
+            self.messages = await self.context.afit(self.messages, self._asummarize)
+            turn = self._begin_turn()
+            try:
+                start = self.turn_start = len(self.messages)
+                self.messages.append(HumanMessage(content=user_input))
+
+                response = await self._ainvoke(self.messages)
+                self.messages.append(response)
+
+                while hasattr(response, "tool_calls") and response.tool_calls:
+                    results = await asyncio.gather(*(self._arun_tool(tc) for tc in response.tool_calls))
+                    for tool_call, result in zip(response.tool_calls, results):
+                        self.messages.append(
+                            ToolMessage(content=result, tool_call_id=tool_call["id"])
+                        )
+
+                    response = await self._ainvoke(self.messages)
+                    self.messages.append(response)
+
+                self.context.record_turn(self.messages, start)
+                return response.content
+            finally:
+                terminal_reader.end_turn(turn)
+
+    async def astream_chat(self, user_input: str) -> AsyncIterator[tuple[str, Dict[str, Any]]]:
+        """Streaming variant of achat, yielding (event, data) while the loop runs.
+
+        Events: "token" {"text"} as the model produces text; "tool_start"
+        {"id", "name", "args"} and "tool_end" {"id", "name", "ms", "output"}
+        around each tool call; "final" {"content"} when the loop ends.
+        """
+        async with self._turn_lock:
+            self.messages = await self.context.afit(self.messages, self._asummarize)
+            turn = self._begin_turn()
+            start = self.turn_start = len(self.messages)
+            self.messages.append(HumanMessage(content=user_input))
+            pending: set = set()
+            try:
+                while True:
+                    chunks = None
+                    t0 = time.perf_counter()
+                    async for chunk in self.llm_with_tools.astream(self.messages):
+                        chunks = chunk if chunks is None else chunks + chunk
+                        if isinstance(chunk.content, str) and chunk.content:
+                            yield "token", {"text": chunk.content}
+                    response = message_chunk_to_message(chunks) if chunks is not None else AIMessage(content="")
+                    self.context.record_call(response, time.perf_counter() - t0)
+                    self.messages.append(response)
+                    if not response.tool_calls:
+                        break
+
+                    for tool_call in response.tool_calls:
+                        yield "tool_start", {"id": tool_call["id"], "name": tool_call["name"], "args": tool_call["args"]}
+                    t0 = time.perf_counter()
+                    tasks = {asyncio.ensure_future(self._arun_tool(tc)): tc for tc in response.tool_calls}
+                    pending = set(tasks)
+                    results: Dict[str, str] = {}
+                    while pending:
+                        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                        for task in done:
+                            tool_call = tasks[task]
+                            results[tool_call["id"]] = task.result()
+                            yield "tool_end", {
+                                "id": tool_call["id"],
+                                "name": tool_call["name"],
+                                "ms": round((time.perf_counter() - t0) * 1000, 1),
+                                "output": results[tool_call["id"]][:TOOL_OUTPUT_PREVIEW],
+                            }
+                    for tool_call in response.tool_calls:
+                        self.messages.append(
+                            ToolMessage(content=results[tool_call["id"]], tool_call_id=tool_call["id"])
+                        )
+            finally:
+                for task in pending:
+                    task.cancel()
+                self._close_dangling_tool_calls()
+                terminal_reader.end_turn(turn)
+
+            self.context.record_turn(self.messages, start)
+            yield "final", {"content": response.content}
+
+    def _begin_turn(self) -> tuple:
+        """Open the turn's terminal snapshot; call after the context is fitted.
+
+        Returns the tokens to pass to terminal_reader.end_turn when the turn ends.
+        """
+        if self.terminal_view is not None:
+            stats = self.context.stats
+            self.terminal_view.begin_turn(stats.turns, stats.summaries, self.context.tool_keep_turns)
+        return terminal_reader.begin_turn(self.terminal, self.terminal_view)
+
+    def _close_dangling_tool_calls(self) -> None:
+        """After an interrupted turn, answer tool calls left without a ToolMessage.
+
+        Providers reject a history whose last tool calls have no results, which
+        would break every later turn of this student.
+        """
+        for i in range(len(self.messages) - 1, -1, -1):
+            message = self.messages[i]
+            if isinstance(message, AIMessage):
+                answered = {m.tool_call_id for m in self.messages[i + 1:] if isinstance(m, ToolMessage)}
+                for tool_call in message.tool_calls:
+                    if tool_call["id"] not in answered:
+                        self.messages.append(
+                            ToolMessage(content="Error: interrupted before the tool finished", tool_call_id=tool_call["id"])
+                        )
+                return
+
+    async def _ainvoke(self, messages: List[Any]) -> Any:
+        t0 = time.perf_counter()
+        response = await self.llm_with_tools.ainvoke(messages)
+        self.context.record_call(response, time.perf_counter() - t0)
+        return response
+
+    async def _arun_tool(self, tool_call: Dict[str, Any]) -> str:
+        tool_name = tool_call["name"]
+        if tool_name not in self.tools_map:
+            return f"Error: Unknown tool '{tool_name}'"
+        timeout = TOOL_TIMEOUTS.get(tool_name, DEFAULT_TOOL_TIMEOUT)
+        try:
+            result = await asyncio.wait_for(self.tools_map[tool_name].ainvoke(tool_call["args"]), timeout)
+        except asyncio.TimeoutError:
+            return f"Error: {tool_name} timed out after {timeout:g}s"
+        except Exception as e:
+            return f"Error running {tool_name}: {e}"
+        return str(result)
 
-                if tool_name in self.tools_map:
-                    result = self.tools_map[tool_name].invoke(tool_args)
-                else:
-                    result = f"Error: Unknown tool '{tool_name}'"
+    def _summary_request(self, previous: Optional[str], folded: List[Any]) -> List[Any]:
+        return [
+            SystemMessage(content=SUMMARY_PROMPT),
+            HumanMessage(content=f"Previous notes:\n{previous or '(none)'}\n\nTranscript:\n{render_transcript(folded)}"),
+        ]
 
-                self.messages.append(
-                    ToolMessage(content=str(result), tool_call_id=tool_id)
-                )
+    def _summarize(self, previous: Optional[str], folded: List[Any]) -> str:
+        return self.llm.invoke(self._summary_request(previous, folded)).content
 
-            response = self.llm_with_tools.invoke(self.messages)
-            self.messages.append(response)
-
-        return response.content
+    async def _asummarize(self, previous: Optional[str], folded: List[Any]) -> str:
+        return (await self.llm.ainvoke(self._summary_request(previous, folded))).content
 
     def reset(self):
         keep = 2
         self.messages = self.messages[:keep]
-
-
-# ─── Singleton ────────────────────────────────────────────────────────────────
-
-_agent: Optional[TutorAgent] = None
-
-
-def get_tutor_agent() -> TutorAgent:
-    global _agent
-    if _agent is None:
-        _agent = TutorAgent()
-    return _agent
+        self.context.reset()
+        if self.terminal_view is not None:
+            self.terminal_view.reset()
@@ -0,0 +1,347 @@
+"""Per-student pool of TutorAgents.
+
+Each session id (see session_registry) gets its own TutorAgent, built lazily
+on first use. Agents share the model bindings and the static prompt prefix,
+so one holds little beyond its own messages.
+
+An agent leaves memory when it has been idle for `idle_timeout`, when the
+pool holds `max_agents`, or when the estimated size of all conversations
+exceeds `memory_limit` bytes; the least recently used unlocked agents go
+first. Its conversation (everything after the shared system message, plus
+the rolling summary) is serialized to the store and restored the next time
+that student talks, so eviction only costs a rebuild.
+
+With `tutor_log_db` set the store is a ConversationLog: every turn's messages
+are appended as they happen, so conversations also survive a restart or a
+crash, and a compacted snapshot is written when the history is folded or the
+tail since the last one reaches `snapshot_every` messages.
+
+Each turn's student and tutor text is also added to the HistoryIndex, which
+the SearchHistory tool queries. A restored conversation the index knows
+nothing about (an in-memory index after a restart) is indexed again from the
+store.
+
+Turns for one student run under that agent's lock; different students run
+in parallel.
+
+tutor_agent and langchain are imported when the first agent is built, so a
+server that never sees a tutor request never loads them.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import Callable
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from app.config import settings
+from app.services.conversation_log import ConversationLog
+from app.services.history_index import HistoryIndex, get_history_index
+from app.services.session_registry import DEFAULT_SESSION_ID, SESSION_ID_PATTERN
+
+if TYPE_CHECKING:
+    from app.services.tutor_agent import TutorAgent
+
+logger = logging.getLogger(__name__)
+
+AGENT_OVERHEAD = 16 * 1024  # rough fixed cost of an agent and its bookkeeping
+
+_session_id_re = re.compile(SESSION_ID_PATTERN)
+
+
+def _content_bytes(message) -> int:
+    content = message.content
+    return len(content.encode("utf-8")) if isinstance(content, str) else len(json.dumps(content))
+
+
+def agent_bytes(agent: "TutorAgent") -> int:
+    """Estimated memory held by one agent; the shared system message is not counted."""
+    return AGENT_OVERHEAD + sum(_content_bytes(m) for m in agent.messages[1:])
+
+
+def default_factory(session_id: str) -> "TutorAgent":
+    from app.services.tutor_agent import TutorAgent
+
+    # ReadTerminal reads the student's own pane log, else captures the
+    # student's registry tmux session (terminal_reader).
+    return TutorAgent(terminal=session_id)
+
+
+@dataclass
+class PooledAgent:
+    session_id: str
+    agent: "TutorAgent"
+    bytes: int = 0
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+    users: int = 0  # turns running or waiting for the lock; evictable only at 0
+    folds: int = 0  # ContextWindow folds as of the last snapshot
+
+    def touch(self) -> None:
+        self.last_used = time.monotonic()
+
+
+@dataclass
+class PoolStats:
+    created: int = 0
+    restored: int = 0
+    evicted_idle: int = 0
+    evicted_lru: int = 0
+    evicted_memory: int = 0
+
+
+class ConversationStore:
+    """Serialized conversations of evicted agents: a directory of JSON files, or memory."""
+
+    def __init__(self, directory: str | None = None):
+        self.directory = Path(directory) if directory else None
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self._memory: dict[str, bytes] = {}
+
+    def __len__(self) -> int:
+        if self.directory is not None:
+            return sum(1 for _ in self.directory.glob("*.json"))
+        return len(self._memory)
+
+    def save(self, session_id: str, state: dict) -> None:
+        data = json.dumps(state, ensure_ascii=False).encode("utf-8")
+        if self.directory is None:
+            self._memory[session_id] = zlib.compress(data)
+            return
+        path = self.directory / f"{session_id}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(data)
+        tmp.replace(path)
+
+    def append(self, session_id: str, messages: list[dict]) -> int:
+        """Conversations are only written on eviction; nothing is logged per turn."""
+        return 0
+
+    def load(self, session_id: str) -> dict | None:
+        if self.directory is None:
+            data = self._memory.pop(session_id, None)
+            return json.loads(zlib.decompress(data)) if data is not None else None
+        path = self.directory / f"{session_id}.json"
+        try:
+            return json.loads(path.read_bytes())
+        except FileNotFoundError:
+            return None
+
+
+def default_store() -> ConversationStore | ConversationLog:
+    if settings.tutor_log_db:
+        return ConversationLog(settings.tutor_log_db)
+    return ConversationStore(settings.tutor_store_dir or None)
+
+
+class TutorPool:
+    def __init__(
+        self,
+        factory: Callable[[str], "TutorAgent"] = default_factory,
+        max_agents: int = settings.tutor_pool_size,
+        idle_timeout: float = settings.tutor_idle_timeout,
+        memory_limit: int = settings.tutor_pool_memory_mb * 1024 * 1024,
+        store: ConversationStore | ConversationLog | None = None,
+        snapshot_every: int = settings.tutor_snapshot_every,
+        index: HistoryIndex | None = None,
+    ):
+        self.factory = factory
+        self.max_agents = max_agents
+        self.idle_timeout = idle_timeout
+        self.memory_limit = memory_limit
+        self.store = store if store is not None else default_store()
+        self.snapshot_every = snapshot_every
+        self.index = index if index is not None else get_history_index()
+        self.stats = PoolStats()
+        self._agents: OrderedDict[str, PooledAgent] = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._agents)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, session_id: str) -> PooledAgent | None:
+        return self._agents.get(session_id)
+
+    def acquire(self, session_id: str) -> PooledAgent:
+        """Return the student's agent, building or restoring it on first use."""
+        entry = self._agents.get(session_id)
+        if entry is None:
+            if not _session_id_re.match(session_id):
+                raise ValueError(f"Invalid session id: {session_id!r}")
+            if len(self._agents) >= self.max_agents:
+                # When every agent is mid-turn the pool grows past the cap
+                # rather than refusing the student.
+                self._evict_lru("lru")
+            entry = PooledAgent(session_id, self._build(session_id))
+            entry.bytes = agent_bytes(entry.agent)
+            self._bytes += entry.bytes
+            self._agents[session_id] = entry
+        self._agents.move_to_end(session_id)
+        entry.touch()
+        return entry
+
+    @asynccontextmanager
+    async def session(self, session_id: str = DEFAULT_SESSION_ID):
+        """Hold a student's agent exclusively for the duration of the block."""
+        entry = self.acquire(session_id)
+        entry.users += 1
+        try:
+            async with entry.lock:
+                entry.touch()
+                entry.agent.turn_start = len(entry.agent.messages)
+                try:
+                    yield entry.agent
+                finally:
+                    entry.touch()
+                    self._resize(entry)
+                    self._log_turn(entry)
+        finally:
+            entry.users -= 1
+        self._enforce_memory()
+
+    async def chat(self, session_id: str, user_input: str) -> str:
+        async with self.session(session_id) as agent:
+            return await agent.achat(user_input)
+
+    def evict_idle(self) -> list[str]:
+        """Serialize and drop agents idle for longer than idle_timeout."""
+        cutoff = time.monotonic() - self.idle_timeout
+        idle = [e for e in self._agents.values() if not e.users and e.last_used < cutoff]
+        for entry in idle:
+            self._evict(entry, "idle")
+        return [e.session_id for e in idle]
+
+    def close_all(self) -> None:
+        """Serialize every agent, e.g. on shutdown."""
+        for entry in list(self._agents.values()):
+            self._evict(entry, None)
+
+    async def run_evictor(self, interval: float = 60.0) -> None:
+        """Background task: periodically evict idle agents."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.evict_idle()
+            except Exception as e:
+                logger.warning(f"[TUTOR] Idle agent eviction failed: {e}")
+
+    def snapshot(self) -> dict:
+        return {
+            **asdict(self.stats),
+            "agents": len(self._agents),
+            "max_agents": self.max_agents,
+            "memory_bytes": self._bytes,
+            "memory_limit": self.memory_limit,
+            "stored_conversations": len(self.store),
+        }
+
+    def _build(self, session_id: str) -> "TutorAgent":
+        from langchain_core.messages import messages_from_dict, messages_to_dict
+
+        agent = self.factory(session_id)
+        state = self.store.load(session_id)
+        if state is None:
+            self.store.append(session_id, messages_to_dict(agent.messages[1:agent.context.pinned]))
+            self.stats.created += 1
+            return agent
+        restored = messages_from_dict(state["messages"])
+        # The stored tutor message carries the <env> block and progress.md as
+        # they were when it was saved; keep the fresh one the factory built.
+        head = agent.messages[:agent.context.pinned]
+        if state.get("summary"):
+            head.append(agent.context.restore_summary(state["summary"]))
+        agent.messages = head + restored[agent.context.pinned - 1:]
+        agent.turn_start = len(agent.messages)
+        self._backfill(session_id, state["messages"])
+        self.stats.restored += 1
+        logger.info(f"[TUTOR] Restored conversation for '{session_id}' ({len(restored)} messages)")
+        return agent
+
+    def _backfill(self, session_id: str, messages: list[dict]) -> None:
+        """Index a restored conversation's turns if the index has none of them."""
+        try:
+            if self.index.has_turns(session_id):
+                return
+            if isinstance(self.store, ConversationLog):
+                messages = self.store.history(session_id)  # everything, not just what survived folding
+            added = self.index.add_messages(session_id, messages)
+            if added:
+                logger.info(f"[TUTOR] Re-indexed {added} messages for '{session_id}'")
+        except Exception as e:
+            logger.warning(f"[TUTOR] Could not re-index history for '{session_id}': {e}")
+
+    def _resize(self, entry: PooledAgent) -> None:
+        size = agent_bytes(entry.agent)
+        self._bytes += size - entry.bytes
+        entry.bytes = size
+
+    def _enforce_memory(self) -> None:
+        while self._bytes > self.memory_limit and len(self._agents) > 1:
+            if not self._evict_lru("memory"):
+                return
+
+    def _evict_lru(self, reason: str) -> bool:
+        for entry in self._agents.values():  # oldest first
+            if not entry.users:
+                self._evict(entry, reason)
+                return True
+        return False
+
+    def _state(self, agent: "TutorAgent") -> dict:
+        from langchain_core.messages import messages_to_dict
+
+        _, body = agent.context.split(agent.messages)
+        return {
+            "summary": agent.context.summary,
+            "messages": messages_to_dict(agent.messages[1:agent.context.pinned] + body),
+        }
+
+    def _log_turn(self, entry: PooledAgent) -> None:
+        """Append and index the turn's messages; snapshot after a fold or a long tail."""
+        from langchain_core.messages import messages_to_dict
+
+        agent = entry.agent
+        messages = messages_to_dict(agent.messages[agent.turn_start:])
+        try:
+            tail = self.store.append(entry.session_id, messages)
+            folds = agent.context.stats.summaries
+            if tail and (tail >= self.snapshot_every or folds != entry.folds):
+                self.store.save(entry.session_id, self._state(agent))
+                entry.folds = folds
+        except Exception as e:
+            logger.error(f"[TUTOR] Failed to log turn for '{entry.session_id}': {e}")
+        try:
+            self.index.add_messages(entry.session_id, messages)
+        except Exception as e:
+            logger.error(f"[TUTOR] Failed to index turn for '{entry.session_id}': {e}")
+
+    def _evict(self, entry: PooledAgent, reason: str | None) -> None:
+        self.store.save(entry.session_id, self._state(entry.agent))
+        self._agents.pop(entry.session_id, None)
+        self._bytes -= entry.bytes
+        if reason is not None:
+            setattr(self.stats, f"evicted_{reason}", getattr(self.stats, f"evicted_{reason}") + 1)
+            logger.info(f"[TUTOR] Evicted agent '{entry.session_id}' ({reason}, {entry.bytes} bytes)")
+
+
+_pool: TutorPool | None = None
+
+
+def get_tutor_pool() -> TutorPool:
+    global _pool
+    if _pool is None:
+        _pool = TutorPool()
+    return _pool
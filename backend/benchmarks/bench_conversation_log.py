@@ -0,0 +1,150 @@
+"""Benchmark: durable conversation log — append throughput and resume time.
+
+- append: `sessions` students x `turns` turns written straight to a
+  ConversationLog, one transaction per turn of four messages (student, model
+  with a tool call, ~2 KB terminal output, answer). Reports turns/s,
+  messages/s and write amplification (bytes on disk incl. WAL / payload).
+- resume: one student runs `long-turns` turns through a TutorPool backed by
+  the log (stub model, small context budget so history folds), then a new
+  pool on the same file stands in for a restarted server. Times rebuilding
+  that student's agent and fitting its context for the next model call,
+  from snapshot + tail against replaying the full log (snapshots dropped),
+  and checks the resumed conversation matches (tool outputs aside: the log
+  keeps them verbatim and the next turn elides stale ones again).
+
+    cd backend && uv run python -m benchmarks.bench_conversation_log [sessions] [turns] [long-turns]
+"""
+
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage, messages_to_dict
+
+from app.services import tutor_agent
+from app.services.conversation_log import ConversationLog
+from app.services.history_index import HistoryIndex
+from app.services.tutor_pool import TutorPool
+
+TERMINAL = "\n".join(f"student@box:~/project$ output line {i}" for i in range(50))
+
+
+class StubModel:
+    async def ainvoke(self, messages):
+        if isinstance(messages[0], SystemMessage) and messages[0].content == tutor_agent.SUMMARY_PROMPT:
+            return AIMessage(content="Student is working through the lesson.")
+        if isinstance(messages[-1], HumanMessage):
+            return AIMessage(content="", tool_calls=[{"name": "ReadTerminal", "args": {"lines": 50}, "id": f"c{len(messages)}"}])
+        return AIMessage(content="Tốt lắm! Bước tiếp theo: chạy `git status` rồi báo mình nhé.")
+
+
+async def fake_terminal(lines: int = 20, full: bool = False) -> str:
+    return TERMINAL
+
+
+def turn_messages(turn: int) -> list[dict]:
+    call_id = f"c{turn}"
+    return messages_to_dict([
+        HumanMessage(content=f"xong bước {turn}"),
+        AIMessage(content="", tool_calls=[{"name": "ReadTerminal", "args": {"lines": 50}, "id": call_id}]),
+        ToolMessage(content=TERMINAL, tool_call_id=call_id, name="ReadTerminal"),
+        AIMessage(content="Tốt lắm! Bước tiếp theo: chạy `git status` rồi báo mình nhé."),
+    ])
+
+
+def disk_bytes(path: str) -> int:
+    return sum(os.path.getsize(p) for p in (path, f"{path}-wal") if os.path.exists(p))
+
+
+def bench_append(directory: str, sessions: int, turns: int) -> None:
+    path = os.path.join(directory, "append.db")
+    log = ConversationLog(path)
+    payload = 0
+    latencies = []
+    t0 = time.perf_counter()
+    for turn in range(turns):
+        for s in range(sessions):
+            messages = turn_messages(turn)
+            payload += sum(len(json.dumps(m, ensure_ascii=False).encode()) for m in messages)
+            t1 = time.perf_counter()
+            log.append(f"student{s}", messages)
+            latencies.append((time.perf_counter() - t1) * 1e6)
+    elapsed = time.perf_counter() - t0
+    total = sessions * turns
+    print(f"append: {total} turns ({total * 4} messages) in {elapsed:.2f}s -> "
+          f"{total / elapsed:,.0f} turns/s, {total * 4 / elapsed:,.0f} messages/s")
+    print(f"  per-turn commit p50 {statistics.median(latencies):.0f} us   "
+          f"p99 {sorted(latencies)[int(len(latencies) * 0.99)]:.0f} us")
+    print(f"  write amplification {disk_bytes(path) / payload:.2f}x ({disk_bytes(path) / 1e6:.1f} MB on disk incl. WAL)")
+    log.close()
+
+
+def signature(message) -> tuple:
+    return (message.type, "" if isinstance(message, ToolMessage) else message.content)
+
+
+# One index for every pool, as the persistent default would be across restarts:
+# resumes find the turns already indexed.
+INDEX = HistoryIndex()
+
+
+def make_pool(log: ConversationLog) -> TutorPool:
+    return TutorPool(factory=lambda sid: tutor_agent.TutorAgent(model_name="stub", terminal=sid), store=log, index=INDEX)
+
+
+def timed_resume(path: str) -> tuple[float, list]:
+    log = ConversationLog(path)
+    pool = make_pool(log)
+    t0 = time.perf_counter()
+    entry = pool.acquire("longrun")
+    messages = list(entry.agent.messages)
+    entry.agent.context.fit(entry.agent.messages)
+    elapsed = (time.perf_counter() - t0) * 1000
+    log.close()
+    return elapsed, messages
+
+
+async def run_long_session(path: str, turns: int) -> list:
+    log = ConversationLog(path)
+    pool = make_pool(log)
+    for turn in range(turns):
+        await pool.chat("longrun", f"xong bước {turn}")
+    agent = pool.get("longrun").agent
+    print(f"resume: {turns} turns logged, {agent.context.stats.summaries} folds, "
+          f"{len(agent.messages)} messages live, tail since snapshot {log.tail_length('longrun')}")
+    messages = list(agent.messages)
+    log.close()  # no close_all(): the process "crashes" without a final snapshot
+    return messages
+
+
+def main() -> None:
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    long_turns = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+
+    tutor_agent._bindings["stub"] = (StubModel(), StubModel())
+    tutor_agent.read_terminal.coroutine = fake_terminal
+    tutor_agent.settings.tutor_context_budget = 4000
+
+    with tempfile.TemporaryDirectory() as directory:
+        bench_append(directory, sessions, turns)
+
+        path = os.path.join(directory, "resume.db")
+        live = asyncio.run(run_long_session(path, long_turns))
+        snapshot_ms, resumed = timed_resume(path)
+        same = [signature(m) for m in resumed] == [signature(m) for m in live]
+        print(f"  snapshot + tail resume {snapshot_ms:8.1f} ms   (conversation matches: {same})")
+
+        db = ConversationLog(path)
+        db._db.execute("DELETE FROM snapshots")
+        db.close()
+        replay_ms, _ = timed_resume(path)
+        print(f"  full-log replay        {replay_ms:8.1f} ms   ({long_turns * 4 + 1} messages)")
+
+
+if __name__ == "__main__":
+    main()
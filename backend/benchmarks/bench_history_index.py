@@ -0,0 +1,131 @@
+"""Benchmark: HistoryIndex — indexing cost and query latency.
+
+Writes shell-integration logs for `sessions` students with `commands`
+commands each (a lesson's mix of git, python, pytest, pip; some fail) and
+indexes them together with two tutor turns per command. Reports:
+
+- initial sync: parsing each log and indexing its commands, commands/s;
+- incremental sync: one more command appended to a log, then a search
+  (search syncs the student's log first);
+- query latency for typical tutor questions, and the tokens a result costs
+  against rereading the student's history as ReadTerminal would show it.
+
+    cd backend && uv run python -m benchmarks.bench_history_index [sessions] [commands] [--db path]
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from urllib.parse import quote
+
+from app.config import settings
+from app.services import history_index, shell_marks
+from app.services.context_window import estimate_tokens
+from app.services.history_index import HistoryIndex, search_history
+
+COMMANDS = [
+    ("git init", 0, "Initialized empty Git repository in /home/student/project/.git/"),
+    ("git status", 0, "On branch main\nnothing to commit, working tree clean"),
+    ("python app.py", 1, "Traceback (most recent call last):\n  File \"app.py\", line 9, in main\nZeroDivisionError: division by zero"),
+    ("python app.py", 0, "Average: 4.5"),
+    ("pytest -q", 1, "FAILED tests/test_app.py::test_empty - assert 0 == None\n1 failed, 5 passed in 0.12s"),
+    ("pytest -q", 0, "6 passed in 0.11s"),
+    ("pip install flask", 0, "Successfully installed flask-3.0.0"),
+    ("git commit -m \"Handle empty input\"", 0, "[main 3f2a1c9] Handle empty input"),
+    ("npm start", 127, "bash: npm: command not found"),
+]
+TURNS = [
+    ("xong rồi ạ", "Tốt lắm! Giờ chạy `pytest -q` và báo mình kết quả nhé."),
+    ("em bị lỗi ZeroDivisionError", "Lỗi này do chia cho 0: kiểm tra `count` trước khi chia."),
+]
+QUERIES = [
+    ("has the student run git init?", {"query": "git init", "kind": "command"}),
+    ("errors since yesterday", {"failed_only": True, "since_hours": 24}),
+    ("ZeroDivisionError anywhere", {"query": "ZeroDivisionError"}),
+    ("accent-free chat search", {"query": "loi chia"}),
+]
+
+
+def command_bytes(command: str, status: int, output: str, t: float) -> bytes:
+    body = output.replace("\n", "\r\n") + "\r\n"
+    return (
+        f"\x1b]133;A\x07student@box:~/project$ \x1b]133;B\x07{command}\r\n"
+        f"\x1b]133;C;cmdline_url={quote(command)};t={t:.3f}\x07{body}\x1b]133;D;{status};t={t + 0.2:.3f}\x07"
+    ).encode()
+
+
+def session_id(s: int) -> str:
+    return f"student{s}"
+
+
+def write_logs(sessions: int, commands: int) -> int:
+    rng = random.Random(0)
+    start = time.time() - 3 * 86400
+    size = 0
+    for s in range(sessions):
+        path = shell_marks.log_path(f"guided_ai_coding_{session_id(s)}")
+        with open(path, "wb") as f:
+            for i in range(commands):
+                f.write(command_bytes(*rng.choice(COMMANDS), start + i * 3 * 86400 / commands))
+        size += os.path.getsize(path)
+    return size
+
+
+def timed_ms(fn, reps: int = 50) -> float:
+    samples = []
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    sessions = int(args[0]) if args else 20
+    commands = int(args[1]) if len(args) > 1 else 1000
+    db = sys.argv[sys.argv.index("--db") + 1] if "--db" in sys.argv else ""
+
+    with tempfile.TemporaryDirectory() as directory:
+        settings.shell_marks_dir = directory
+        size = write_logs(sessions, commands)
+        index = history_index._index = HistoryIndex(db)
+
+        t0 = time.perf_counter()
+        for s in range(sessions):
+            index.sync_terminal(session_id(s))
+            for _ in range(commands // 2):
+                for student, tutor in TURNS:
+                    index.add_messages(session_id(s), [
+                        {"type": "human", "data": {"content": student}},
+                        {"type": "ai", "data": {"content": tutor}},
+                    ])
+        elapsed = time.perf_counter() - t0
+        print(f"{sessions} students x {commands} commands ({size / 1e6:.1f} MB of logs), {len(index)} documents")
+        print(f"  initial sync + turns   {elapsed:7.2f} s   ({sessions * commands / elapsed:,.0f} commands/s incl. log parsing)")
+
+        sid = session_id(0)
+        path = shell_marks.log_path(f"guided_ai_coding_{sid}")
+
+        def append_and_search() -> None:
+            with open(path, "ab") as f:
+                f.write(command_bytes("git status", 0, "On branch main", time.time()))
+            index.search("git status", sid, limit=5)
+
+        print(f"  append 1 command + search   p50 {timed_ms(append_and_search):6.2f} ms")
+
+        history_tokens = sum(estimate_tokens(shell_marks.get_command_index(sid).to_dict(r)["output"])
+                             for r in shell_marks.get_command_index(sid).records)
+        for label, kwargs in QUERIES:
+            latency = timed_ms(lambda: search_history(sid, **kwargs))
+            tokens = estimate_tokens(search_history(sid, **kwargs))
+            print(f"  {label:<32} p50 {latency:6.2f} ms   {tokens:5d} tokens "
+                  f"(history {history_tokens:,} tokens)")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
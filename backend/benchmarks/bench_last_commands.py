@@ -0,0 +1,100 @@
+"""Benchmark: LastCommands over shell-integration marks.
+
+Writes synthetic STUDENT pane logs (prompt, OSC 133 marks, command output as
+bash + tmux pipe-pane produce them) with a growing number of commands, then:
+
+- index: full parse of the log on first use, and an incremental refresh after
+  one more command is appended (only the new bytes are read);
+- last(k): latency of taking the newest k records, which should not grow with
+  the history;
+- tokens: one LastCommands(1) result against the ReadTerminal(20) text the
+  model had to read to find the same command and exit status.
+
+    cd backend && uv run python -m benchmarks.bench_last_commands [commands...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from urllib.parse import quote
+
+from app.services import shell_marks
+from app.services.context_window import estimate_tokens
+from app.services.terminal_screen import render_terminal
+
+PROMPT = "\x1b[32mstudent@box\x1b[0m:\x1b[34m~/project\x1b[0m$ "
+STEPS = [
+    ("git status", 0, ["On branch main", "Changes not staged for commit:", "  modified:   app.py"]),
+    ("python app.py", 1, ["Traceback (most recent call last):", "  File \"app.py\", line 9, in main",
+                          "    print(total / count)", "ZeroDivisionError: division by zero"]),
+    ("pytest -q", 0, ["......", "6 passed in 0.11s"]),
+    ("ls", 0, ["app.py  requirements.txt  tests"]),
+]
+
+
+def command_bytes(i: int, t: float) -> bytes:
+    command, status, output = STEPS[i % len(STEPS)]
+    body = "".join(f"{line}\r\n" for line in output)
+    return (
+        f"\x1b]133;A\x07{PROMPT}\x1b]133;B\x07{command}\r\n"
+        f"\x1b]133;C;cmdline_url={quote(command)};t={t:.6f}\x07{body}"
+        f"\x1b]133;D;{status};t={t + 0.05:.6f}\x07"
+    ).encode()
+
+
+def write_log(path: str, commands: int) -> None:
+    t = time.time() - commands
+    with open(path, "wb") as f:
+        f.write(b"".join(command_bytes(i, t + i) for i in range(commands)))
+
+
+def bench(directory: str, commands: int) -> None:
+    path = os.path.join(directory, f"{commands}.log")
+    write_log(path, commands)
+    size = os.path.getsize(path)
+
+    index = shell_marks.CommandIndex(path, max_records=max(commands, shell_marks.MAX_RECORDS))
+    t0 = time.perf_counter()
+    index.refresh()
+    parse_ms = (time.perf_counter() - t0) * 1000
+
+    with open(path, "ab") as f:
+        f.write(command_bytes(commands, time.time()))
+    t0 = time.perf_counter()
+    index.refresh()
+    refresh_us = (time.perf_counter() - t0) * 1e6
+
+    reps = 10_000
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        index.last(5)
+    last_us = (time.perf_counter() - t0) / reps * 1e6
+
+    print(f"{commands:>7} commands {size / 1e6:7.1f} MB   first parse {parse_ms:8.1f} ms   "
+          f"refresh +1 {refresh_us:6.0f} us   last(5) {last_us:5.2f} us")
+
+
+def token_comparison(directory: str) -> None:
+    path = os.path.join(directory, "tokens.log")
+    write_log(path, 12)
+    index = shell_marks.CommandIndex(path)
+    index.refresh()
+    structured = index.to_dict(index.last(1)[0])
+    with open(path, "rb") as f:
+        screen = render_terminal(f.read().decode())
+    raw = "\n".join(line.rstrip() for line in screen[-20:])
+    print(f"tokens: LastCommands(1) {estimate_tokens(str(structured))}   "
+          f"ReadTerminal(20) {estimate_tokens(raw)}")
+
+
+def main() -> None:
+    sizes = [int(a) for a in sys.argv[1:]] or [100, 1_000, 10_000, 100_000]
+    with tempfile.TemporaryDirectory() as directory:
+        for commands in sizes:
+            bench(directory, commands)
+        token_comparison(directory)
+
+
+if __name__ == "__main__":
+    main()
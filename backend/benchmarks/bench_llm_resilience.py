@@ -0,0 +1,124 @@
+"""Benchmark: voice correction latency under injected LLM faults.
+
+Starts benchmarks.fake_llm on a local port, points the LLM client at it and
+drives /api/voice/correct in-process through several fault profiles:
+
+- healthy: every call answered quickly
+- slow tail: a fraction of calls stall; compares hedging off vs on
+- outage: every call fails; the circuit breaker should open and
+  short-circuit to the raw transcript
+- recovery: the provider comes back; after the cooldown one half-open probe
+  goes through (the rest still short-circuit) and closes the breaker
+
+Reports p50/p99 latency, how many requests fell back to the raw transcript
+and the resilience counters (cumulative per caller) after each phase.
+
+    cd backend && uv run python -m benchmarks.bench_llm_resilience [requests] [concurrency]
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+PORT = 18999
+os.environ.setdefault("XAI_API_KEY", "fake")
+os.environ["XAI_BASE_URL"] = f"http://127.0.0.1:{PORT}/v1"
+os.environ["PRECORRECT_THRESHOLD"] = "2"  # send everything to the (fake) LLM
+os.environ["CORRECTION_CACHE_SIZE"] = "1"
+
+import httpx  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.services import llm_resilience  # noqa: E402
+from app.services.llm_resilience import CircuitBreaker, ResilientCaller  # noqa: E402
+from benchmarks import fake_llm  # noqa: E402
+
+BUDGET = 1.0
+
+
+def reset_caller(hedge: bool, reset_timeout: float = 30.0) -> ResilientCaller:
+    caller = ResilientCaller(budget=BUDGET, hedge=hedge, breaker=CircuitBreaker(5, reset_timeout))
+    llm_resilience._caller = caller
+    return caller
+
+
+async def set_profile(fake: httpx.AsyncClient, **profile) -> None:
+    defaults = {"latency": 0.05, "jitter": 0.02, "slow_rate": 0.0, "slow_latency": 5.0, "error_rate": 0.0}
+    await fake.post("/control", json={**defaults, **profile})
+
+
+async def run_phase(api: httpx.AsyncClient, label: str, n: int, concurrency: int) -> None:
+    sem = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    fallbacks = 0
+
+    async def one(i: int) -> None:
+        nonlocal fallbacks
+        transcript = f"{label} request number {i} please"
+        async with sem:
+            t0 = time.perf_counter()
+            resp = await api.post("/api/voice/correct", json={"transcript": transcript})
+            latencies.append((time.perf_counter() - t0) * 1000)
+        if resp.json()["corrected"] == transcript:
+            fallbacks += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n)))
+    wall = time.perf_counter() - t0
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    stats = llm_resilience.get_llm_resilience().snapshot()
+    print(
+        f"{label:<22} p50 {statistics.median(latencies):7.1f} ms   p99 {p99:7.1f} ms   max {latencies[-1]:7.1f} ms   "
+        f"fallback {fallbacks:4d}/{n}   {n / wall:6.1f} req/s"
+    )
+    print(
+        f"{'':<22} hedges {stats['hedges']} (won {stats['hedge_wins']})   deadline {stats['deadline_exceeded']}   "
+        f"failures {stats['failures']}   short-circuited {stats['short_circuited']}   breaker {stats['breaker']['state']}"
+    )
+
+
+async def run(n: int, concurrency: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with (
+        httpx.AsyncClient(transport=transport, base_url="http://test") as api,
+        httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}") as fake,
+    ):
+        await set_profile(fake)
+        reset_caller(hedge=True)
+        await run_phase(api, "healthy", n, concurrency)
+
+        for hedge in (False, True):
+            caller = reset_caller(hedge=hedge)
+            await set_profile(fake)  # warm the latency window before the tail appears
+            await run_phase(api, "warmup", caller.hedge_min_samples, concurrency)
+            await set_profile(fake, slow_rate=0.05)
+            await run_phase(api, f"slow tail, hedge {'on' if hedge else 'off'}", n, concurrency)
+
+        reset_caller(hedge=True, reset_timeout=0.5)
+        await set_profile(fake, error_rate=1.0)
+        await run_phase(api, "outage", n, concurrency)
+
+        await set_profile(fake)
+        await asyncio.sleep(0.6)
+        await run_phase(api, "recovery", n, concurrency)
+        await run_phase(api, "recovered", n, concurrency)
+
+        status = (await fake.get("/control")).json()
+        print(f"fake server: {status['requests']} requests, {status['errors']} errors, {status['slow']} slow")
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    server = fake_llm.serve_in_thread(PORT)
+    try:
+        asyncio.run(run(n, concurrency))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
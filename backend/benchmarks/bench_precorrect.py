@@ -0,0 +1,55 @@
+"""Benchmark: local pre-corrector skip rate, accuracy and latency.
+
+Each corpus line holds a raw transcript and the correction we expect from the
+LLM. Reports how many transcripts the pre-corrector would answer locally at
+the configured threshold, how many of those match the expected text exactly,
+and the local per-call latency. Exits with status 1 if any local answer
+differs from the expected text: a rule that does not round-trip the whole
+corpus must not skip the LLM.
+
+    cd backend && uv run python -m benchmarks.bench_precorrect [corpus.jsonl] [threshold]
+"""
+
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from app.config import settings
+from app.services.precorrect import precorrect
+
+DEFAULT_CORPUS = Path(__file__).parent / "data" / "precorrect_corpus.jsonl"
+
+
+def main() -> None:
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CORPUS
+    threshold = float(sys.argv[2]) if len(sys.argv) > 2 else settings.precorrect_threshold
+    corpus = [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+
+    skipped = correct = 0
+    latencies = []
+    wrong = []
+    for item in corpus:
+        t0 = time.perf_counter()
+        result = precorrect(item["transcript"])
+        latencies.append((time.perf_counter() - t0) * 1e6)
+        if result.confidence >= threshold:
+            skipped += 1
+            if result.text == item["expected"]:
+                correct += 1
+            else:
+                wrong.append((item["transcript"], result.text, item["expected"]))
+
+    print(f"corpus: {len(corpus)} transcripts, threshold {threshold}")
+    print(f"skip rate: {skipped / len(corpus):.1%} ({skipped} answered locally)")
+    print(f"accuracy of local answers: {correct / skipped:.1%}" if skipped else "accuracy: n/a")
+    print(f"latency: median {statistics.median(latencies):.1f} µs, max {max(latencies):.1f} µs")
+    for raw, got, expected in wrong:
+        print(f"  mismatch: {raw!r} -> {got!r} (expected {expected!r})")
+    if wrong:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
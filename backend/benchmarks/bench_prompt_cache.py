@@ -0,0 +1,50 @@
+"""Benchmark: provider prefix-cache hits and call latency for the tutor prompt.
+
+Needs XAI_API_KEY (real provider calls). Creates agents for several
+different working directories, as different students would get, and sends
+each a short message, so every call after the first can reuse the shared
+static prefix. Reports the cached-token ratio the provider reports and mean
+call latency for calls with and without a cache hit.
+
+    cd backend && uv run python -m benchmarks.bench_prompt_cache [agents] [turns]
+"""
+
+import asyncio
+import sys
+
+from app.services.tutor_agent import TutorAgent
+
+
+async def run(agents: int, turns: int) -> None:
+    tutors = [TutorAgent(working_dir=f"/home/student{i}/project") for i in range(agents)]
+    print(f"static prefix {tutors[0].prefix_hash}, shared by all agents: {all(t.messages[0] is tutors[0].messages[0] for t in tutors)}")
+    for turn in range(turns):
+        for tutor in tutors:
+            await tutor.achat(f"Chào thầy, em đang ở bước {turn + 1}. Trả lời ngắn thôi nhé.")
+
+    totals = {"input": 0, "cached": 0, "cached_calls": 0, "cached_s": 0.0, "uncached_calls": 0, "uncached_s": 0.0}
+    for tutor in tutors:
+        s = tutor.context.stats
+        totals["input"] += s.reported_input_tokens
+        totals["cached"] += s.cached_input_tokens
+        totals["cached_calls"] += s.cached_calls
+        totals["cached_s"] += s.cached_call_seconds
+        totals["uncached_calls"] += s.uncached_calls
+        totals["uncached_s"] += s.uncached_call_seconds
+
+    ratio = totals["cached"] / totals["input"] if totals["input"] else 0.0
+    print(f"input tokens {totals['input']}, cached {totals['cached']} ({ratio:.1%})")
+    for kind in ("cached", "uncached"):
+        calls = totals[f"{kind}_calls"]
+        mean = totals[f"{kind}_s"] / calls * 1000 if calls else float("nan")
+        print(f"{kind:<9} calls {calls:4d}   mean latency {mean:8.1f} ms")
+
+
+def main() -> None:
+    agents = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    asyncio.run(run(agents, turns))
+
+
+if __name__ == "__main__":
+    main()
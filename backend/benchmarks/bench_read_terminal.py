@@ -0,0 +1,113 @@
+"""Benchmark: ReadTerminal per turn, bare requests vs pooled client + snapshot.
+
+Serves a fake terminal service (the same /api/terminals/<name>/read slicing
+as terminal-service/server.js) on a local port, then replays agent turns in
+which the model reads the terminal several times with different `lines`:
+
+- bare: a new httpx.get (new connection) and a render for every read, as
+  ReadTerminal did before
+- pooled: terminal_reader with its keep-alive client and per-turn snapshot
+
+    cd backend && uv run python -m benchmarks.bench_read_terminal [turns]
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+
+PORT = 18997
+os.environ["TERMINAL_SERVICE_URL"] = f"http://127.0.0.1:{PORT}"
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+from app.services import terminal_reader  # noqa: E402
+
+READS_PER_TURN = (20, 50, 20, 100, 30)
+BUFFER = "\r\n".join(
+    f"\x1b[32mstudent@box\x1b[0m:\x1b[34m~/project\x1b[0m$ ls -la   # output line {i}" for i in range(2000)
+)
+
+fake = FastAPI()
+
+
+@fake.get("/api/terminals/{name}/read")
+def read(name: str, lines: int = 0):
+    output = BUFFER
+    if lines > 0:
+        output = "\n".join(output.split("\n")[-lines:])
+    return {"output": output}
+
+
+def serve() -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(fake, port=PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def bare_turn() -> None:
+    for lines in READS_PER_TURN:
+        resp = httpx.get(f"http://127.0.0.1:{PORT}/api/terminals/default/read", params={"lines": lines}, timeout=5.0)
+        terminal_reader.format_output(resp.json()["output"])
+
+
+def pooled_turn() -> None:
+    terminal_reader.begin_turn("default")
+    for lines in READS_PER_TURN:
+        terminal_reader.read(lines)
+
+
+async def pooled_turn_async() -> None:
+    terminal_reader.begin_turn("default")
+    await asyncio.gather(*(terminal_reader.aread(lines) for lines in READS_PER_TURN))
+
+
+def timed(fn, turns: int) -> list[float]:
+    samples = []
+    for _ in range(turns):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+async def timed_async(turns: int) -> list[float]:
+    samples = []
+    for _ in range(turns):
+        t0 = time.perf_counter()
+        await pooled_turn_async()
+        samples.append((time.perf_counter() - t0) * 1000)
+    await terminal_reader.close_clients()
+    return samples
+
+
+def report(label: str, samples: list[float]) -> None:
+    print(f"{label:<28} mean {statistics.mean(samples):7.2f} ms/turn   p50 {statistics.median(samples):7.2f} ms")
+
+
+def main() -> None:
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    terminal_reader.settings.scrollback_bytes = 0  # measure the terminal-service path, not a local pane log
+    server = serve()
+    try:
+        print(f"{turns} turns, reads per turn: {READS_PER_TURN}")
+        report("bare httpx.get", timed(bare_turn, turns))
+        report("pooled + snapshot", timed(pooled_turn, turns))
+        report("pooled + snapshot (async)", asyncio.run(timed_async(turns)))
+        s = terminal_reader.stats.snapshot()
+        print(
+            f"terminal_reader: {s['calls']} reads, {s['fetches']} fetches, {s['snapshot_hits']} snapshot hits, "
+            f"fetch {s['mean_fetch_ms']} ms, format {s['mean_format_ms']} ms"
+        )
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark: Scrollback line index vs split-based tail reads.
+
+Generates a multi-megabyte terminal capture (prompts, colored output, long
+and short lines, CRLF like a pty), then for each buffer size:
+
+- split: keep the last `size` characters as one string and answer a read of
+  the last N lines the way the terminal service and terminal_reader do,
+  `"\\n".join(buffer.split("\\n")[-N:])`;
+- scrollback: append the capture to a Scrollback in pty-sized chunks and
+  answer the same read with `tail(N)` (memoryview) and `text(N)` (decoded).
+
+Reports ingest throughput, per-read latency and the memory each holds, and
+checks both return the same text.
+
+    cd backend && uv run python -m benchmarks.bench_scrollback [capture MB]
+"""
+
+import random
+import statistics
+import sys
+import time
+
+from app.services.scrollback import Scrollback
+
+SIZES = [64 * 1024, 1024 * 1024, 8 * 1024 * 1024]
+READS = [20, 100]
+CHUNK = 4096  # bytes per pty read
+
+
+def capture(megabytes: float) -> bytes:
+    rng = random.Random(0)
+    words = ["build", "test", "error:", "ok", "src/app.py", "\x1b[32mPASSED\x1b[0m", "warning", "line", "42"]
+    out, size = [], 0
+    while size < megabytes * 1e6:
+        if rng.random() < 0.1:
+            line = "\x1b[32mstudent@box\x1b[0m:~/project$ " + " ".join(rng.choices(words, k=3))
+        else:
+            line = " ".join(rng.choices(words, k=rng.choice([2, 8, 30])))
+        out.append(line)
+        size += len(line) + 2
+    return ("\r\n".join(out)).encode()
+
+
+def per_read_us(fn, reps: int) -> float:
+    samples = []
+    for _ in range(5):
+        t0 = time.perf_counter()
+        for _ in range(reps):
+            fn()
+        samples.append((time.perf_counter() - t0) / reps * 1e6)
+    return statistics.median(samples)
+
+
+def bench(data: bytes, size: int) -> None:
+    t0 = time.perf_counter()
+    sb = Scrollback(size)
+    for i in range(0, len(data), CHUNK):
+        sb.append(data[i:i + CHUNK])
+    ingest = len(data) / (time.perf_counter() - t0) / 1e6
+
+    t0 = time.perf_counter()
+    buffer = ""
+    text = data.decode()
+    for i in range(0, len(text), CHUNK):
+        buffer = (buffer + text[i:i + CHUNK])[-size:]
+    string_ingest = len(data) / (time.perf_counter() - t0) / 1e6
+
+    print(f"buffer {size / 1024:6.0f} KB ({sb.line_count} lines): ingest scrollback {ingest:6.0f} MB/s, "
+          f"string {string_ingest:6.0f} MB/s; memory {2 * size / 1024:.0f} KB + index vs {len(buffer) / 1024:.0f} KB str")
+    for n in READS:
+        expected = "\n".join(buffer.split("\n")[-n:])
+        assert sb.text(n) == expected, "scrollback and split disagree"
+        reps = max(10, 2_000_000 // size)
+        split = per_read_us(lambda: "\n".join(buffer.split("\n")[-n:]), reps)
+        view = per_read_us(lambda: sb.tail(n), reps * 10)
+        decoded = per_read_us(lambda: sb.text(n), reps * 10)
+        print(f"  tail {n:>3} lines   split {split:10.1f} us   scrollback view {view:6.2f} us   "
+              f"text {decoded:6.2f} us   ({split / decoded:,.0f}x)")
+
+
+def main() -> None:
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 16
+    data = capture(megabytes)
+    print(f"capture {len(data) / 1e6:.1f} MB")
+    for size in SIZES:
+        bench(data, size)
+
+
+if __name__ == "__main__":
+    main()
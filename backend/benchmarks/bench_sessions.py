@@ -0,0 +1,61 @@
+"""Benchmark: session registry with hundreds of simulated students.
+
+Creates N student sessions concurrently on a private local tmux server
+(`tmux -L guided_bench`, plain `bash --norc` panes so shell startup files do
+not dominate), then runs rounds where every student captures its pane under
+its session lock, and finally evicts everything.
+
+    cd backend && uv run python -m benchmarks.bench_sessions [students] [rounds]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+from app.services import tmux_service
+from app.services.session_registry import SessionRegistry
+from app.services.tmux_control import TmuxControlClient
+
+
+async def main(students: int, rounds: int) -> None:
+    control = TmuxControlClient(socket_name="guided_bench", timeout=30.0)
+    await control.acommand("set-option -g default-command 'bash --norc'")
+    registry = SessionRegistry(control, max_sessions=students + 1, idle_timeout=0)
+    ids = [f"bench-{i}" for i in range(students)]
+    latencies: list[float] = []
+
+    async def work(session_id: str) -> None:
+        t0 = time.perf_counter()
+        async with registry.session(session_id) as sess:
+            await control.acommand(tmux_service._capture_cmd(sess.student_pane, 50))
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    try:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(registry.acquire(i) for i in ids))
+        created = time.perf_counter() - t0
+        print(f"create {students} sessions: {created * 1000:8.1f} ms ({created / students * 1000:.2f} ms/session)")
+
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            await asyncio.gather(*(work(i) for i in ids))
+        elapsed = time.perf_counter() - t0
+        latencies.sort()
+        p99 = latencies[int(len(latencies) * 0.99)]
+        print(
+            f"{len(latencies)} locked captures: {elapsed * 1000:8.1f} ms total, "
+            f"{len(latencies) / elapsed:8.0f} ops/s, p50 {statistics.median(latencies):.2f} ms, p99 {p99:.2f} ms"
+        )
+    finally:
+        t0 = time.perf_counter()
+        evicted = await registry.evict_idle()
+        print(f"evict {len(evicted)} sessions: {(time.perf_counter() - t0) * 1000:8.1f} ms")
+        await control.acommand("kill-server")
+        control.close()
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    r = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    asyncio.run(main(n, r))
@@ -0,0 +1,113 @@
+"""Benchmark: backend cold start, with a budget that fails on regression.
+
+- imports: `python -X importtime -c "import app.main"` in a fresh interpreter;
+  reports the cumulative time and the heaviest top-level packages, and fails
+  if any SDK that should load lazily (DEFERRED) is imported at startup
+- first response: spawns `uvicorn app.main:app` and times from spawn until
+  GET /health first answers
+
+Both numbers are the median over `runs` cold processes. The exit status is 1
+when a budget is exceeded, so this can gate CI or a pre-deploy check.
+
+    cd backend && uv run python -m benchmarks.bench_startup [runs] [import-budget-ms] [first-response-budget-ms]
+"""
+
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+
+IMPORT_BUDGET_MS = 900.0
+FIRST_RESPONSE_BUDGET_MS = 2500.0
+DEFERRED = ("openai", "httpx", "langchain", "langchain_core", "langsmith")
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def importtime() -> tuple[float, dict[str, float], set[str]]:
+    """(cumulative ms for app.main, self ms per top-level package, modules imported)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True, check=True,
+    )
+    total = 0.0
+    by_package: dict[str, float] = defaultdict(float)
+    modules = set()
+    for line in result.stderr.splitlines():
+        m = IMPORTTIME_LINE.match(line)
+        if not m:
+            continue
+        self_us, cumulative_us, _, name = m.groups()
+        modules.add(name)
+        by_package[name.split(".")[0]] += int(self_us) / 1000
+        if name == "app.main":
+            total = int(cumulative_us) / 1000
+    return total, by_package, modules
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def first_response() -> float:
+    """ms from spawning uvicorn until /health answers."""
+    port = free_port()
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env={**os.environ, "WARM_IMPORTS": "false"},
+    )
+    try:
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {proc.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as resp:
+                    resp.read()
+                return (time.perf_counter() - t0) * 1000
+            except OSError:
+                time.sleep(0.005)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main() -> None:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    import_budget = float(sys.argv[2]) if len(sys.argv) > 2 else IMPORT_BUDGET_MS
+    response_budget = float(sys.argv[3]) if len(sys.argv) > 3 else FIRST_RESPONSE_BUDGET_MS
+
+    samples = [importtime() for _ in range(runs)]
+    import_ms = statistics.median(total for total, _, _ in samples)
+    _, by_package, modules = samples[-1]
+    print(f"import app.main: {import_ms:.0f} ms (median of {runs}, budget {import_budget:.0f} ms)")
+    for package, ms in sorted(by_package.items(), key=lambda kv: -kv[1])[:8]:
+        print(f"  {package:<24} {ms:7.1f} ms self")
+
+    response_ms = statistics.median(first_response() for _ in range(runs))
+    print(f"spawn -> first /health response: {response_ms:.0f} ms (median of {runs}, budget {response_budget:.0f} ms)")
+
+    failures = []
+    eager = sorted(p for p in DEFERRED if p in modules)
+    if eager:
+        failures.append(f"imported at startup but should be deferred: {', '.join(eager)}")
+    if import_ms > import_budget:
+        failures.append(f"import time {import_ms:.0f} ms over budget {import_budget:.0f} ms")
+    if response_ms > response_budget:
+        failures.append(f"first response {response_ms:.0f} ms over budget {response_budget:.0f} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: startup within budget")
+
+
+if __name__ == "__main__":
+    main()
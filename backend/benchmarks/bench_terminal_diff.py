@@ -0,0 +1,139 @@
+"""Benchmark: token savings of diff-based ReadTerminal over a lesson.
+
+Replays scripted lessons through a real TutorAgent (stub model, default
+ContextWindow): before each student message the student runs the next
+commands of the lesson in a simulated terminal; the model reads the terminal
+with lines=20 every turn and again with lines=60 when it sees an error, then
+answers. Each lesson runs twice, with full reads and with diff reads, and
+reports the terminal output tokens added to the history and the prompt tokens
+billed over the lesson (every model call re-sends the history).
+
+With `--log path.db` it also replays the ReadTerminal results recorded in a
+ConversationLog (sessions recorded with full reads) through a TerminalView.
+
+    cd backend && uv run python -m benchmarks.bench_terminal_diff [lessons] [turns] [--log path.db]
+"""
+
+import asyncio
+import random
+import sys
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from app.services import terminal_reader, tutor_agent
+from app.services.context_window import estimate_tokens
+
+PROMPT = "\x1b[32mstudent@box\x1b[0m:\x1b[34m~/project\x1b[0m$ "
+STEPS = [
+    ("ls -la", ["total 24", "drwxr-xr-x 3 student student 4096 .", "drwxr-xr-x 9 student student 4096 ..",
+                "-rw-r--r-- 1 student student  312 app.py", "-rw-r--r-- 1 student student   58 requirements.txt",
+                "drwxr-xr-x 2 student student 4096 tests"]),
+    ("git status", ["On branch main", "Changes not staged for commit:", "  modified:   app.py", "",
+                    "no changes added to commit (use \"git add\" and/or \"git commit -a\")"]),
+    ("python app.py", ["Traceback (most recent call last):", "  File \"/home/student/project/app.py\", line 12, in <module>",
+                       "    main()", "  File \"/home/student/project/app.py\", line 9, in main",
+                       "    print(total / count)", "ZeroDivisionError: division by zero"]),
+    ("python app.py", ["Average: 4.5"]),
+    ("pytest -q", [".....F", "FAILED tests/test_app.py::test_empty - assert 0 == None", "1 failed, 5 passed in 0.12s"]),
+    ("pytest -q", ["......", "6 passed in 0.11s"]),
+    ("git add app.py", []),
+    ("git commit -m \"Handle empty input\"", ["[main 3f2a1c9] Handle empty input", " 1 file changed, 4 insertions(+), 1 deletion(-)"]),
+    ("cat requirements.txt", ["flask==3.0.0", "pytest==8.0.0"]),
+    ("pip install -r requirements.txt", [f"Requirement already satisfied: {p}" for p in ("flask", "pytest", "jinja2", "click")]),
+    ("git log --oneline", ["3f2a1c9 Handle empty input", "8b1e4d2 Add average", "1a0c3e5 Initial commit"]),
+]
+
+
+class LessonTerminal:
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.lines = [PROMPT]
+
+    def run_next(self) -> None:
+        command, output = self.rng.choice(STEPS)
+        self.lines[-1] = PROMPT + command
+        self.lines.extend(output)
+        self.lines.append(PROMPT)
+
+    async def fetch(self, lines: int) -> str:
+        fetch = terminal_reader._fetch_lines(lines)
+        return "\r\n".join(self.lines[-fetch:] if fetch else self.lines)
+
+
+class StubModel:
+    async def ainvoke(self, messages):
+        if isinstance(messages[0], SystemMessage) and messages[0].content == tutor_agent.SUMMARY_PROMPT:
+            return AIMessage(content="Student is working through the lesson.")
+        last = messages[-1]
+        if isinstance(last, HumanMessage):
+            return AIMessage(content="", tool_calls=[{"name": "ReadTerminal", "args": {"lines": 20}, "id": f"c{len(messages)}"}])
+        if isinstance(last, ToolMessage) and "Error" in last.content and messages[-2].tool_calls[0]["args"]["lines"] == 20:
+            return AIMessage(content="", tool_calls=[{"name": "ReadTerminal", "args": {"lines": 60}, "id": f"c{len(messages)}"}])
+        return AIMessage(content="Tốt lắm! Bước tiếp theo: chạy lệnh tiếp theo rồi báo mình nhé.")
+
+
+async def run_lesson(seed: int, turns: int, diff: bool) -> tuple[int, int]:
+    """(terminal output tokens added to history, prompt tokens billed)."""
+    terminal = LessonTerminal(seed)
+    terminal_reader._afetch = terminal.fetch
+    agent = tutor_agent.TutorAgent(model_name="stub")
+    if not diff:
+        agent.terminal_view = None
+    tool_tokens = 0
+    for turn in range(turns):
+        for _ in range(terminal.rng.randint(1, 2)):
+            terminal.run_next()
+        start = len(agent.messages)
+        await agent.achat(f"xong bước {turn + 1}")
+        tool_tokens += sum(estimate_tokens(m.content) for m in agent.messages[start:] if isinstance(m, ToolMessage))
+    return tool_tokens, agent.context.stats.prompt_tokens
+
+
+def replay_log(path: str) -> None:
+    from app.services.conversation_log import ConversationLog
+
+    log = ConversationLog(path)
+    sessions = [row[0] for row in log._db.execute("SELECT DISTINCT session_id FROM messages")]
+    full_tokens = diff_tokens = 0
+    for session_id in sessions:
+        view = terminal_reader.TerminalView()
+        names = {}
+        for message in log.history(session_id):
+            data = message["data"]
+            for call in data.get("tool_calls") or []:
+                names[call["id"]] = call["name"]
+            if message["type"] == "tool" and names.get(data.get("tool_call_id")) == "ReadTerminal":
+                full_tokens += estimate_tokens(data["content"])
+                diff_tokens += estimate_tokens(view.observe(data["content"]))
+    log.close()
+    if full_tokens:
+        print(f"log replay ({len(sessions)} sessions): terminal tokens {full_tokens} -> {diff_tokens} "
+              f"({1 - diff_tokens / full_tokens:.0%} saved)")
+
+
+def main() -> None:
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    lessons = int(args[0]) if args else 20
+    turns = int(args[1]) if len(args) > 1 else 30
+
+    tutor_agent._bindings["stub"] = (StubModel(), StubModel())
+    totals = {False: [0, 0], True: [0, 0]}
+    for seed in range(lessons):
+        for diff in (False, True):
+            tool_tokens, prompt_tokens = asyncio.run(run_lesson(seed, turns, diff))
+            totals[diff][0] += tool_tokens
+            totals[diff][1] += prompt_tokens
+
+    print(f"{lessons} lessons x {turns} turns (per-lesson averages)")
+    for label, i in (("terminal output tokens", 0), ("prompt tokens billed", 1)):
+        full, diff = totals[False][i] / lessons, totals[True][i] / lessons
+        print(f"  {label:<24} full {full:9.0f}   diff {diff:9.0f}   saved {1 - diff / full:.0%}")
+    s = terminal_reader.stats.snapshot()
+    print(f"  diff reads {s['diff_reads']}, {s['elided_lines']} lines / {s['elided_bytes']} bytes elided")
+
+    if "--log" in sys.argv:
+        replay_log(sys.argv[sys.argv.index("--log") + 1])
+
+
+if __name__ == "__main__":
+    main()
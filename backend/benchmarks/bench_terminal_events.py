@@ -0,0 +1,98 @@
+"""Benchmark: pushed terminal events vs polling capture-pane.
+
+Creates a throwaway student session (bash with shell integration) through
+the SessionRegistry and runs `echo tick-<i>` in it `n` times. Each command's
+completion is detected two ways:
+
+- events: a TerminalWatchers subscription, waiting for `command_finished`;
+- polling: capture-pane over the control connection every `interval`
+  seconds until the command's output shows up (what a tutor polling the pane
+  has to do).
+
+Reports detection latency from send-keys, and the tmux commands each way
+costs per watched student.
+
+    cd backend && uv run python -m benchmarks.bench_terminal_events [n] [interval]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+from app.services import tmux_service
+from app.services.session_registry import SessionRegistry
+from app.services.terminal_events import TerminalWatchers
+from app.services.tmux_control import quote
+
+SESSION_ID = "bench_events"
+
+
+def report(label: str, samples: list[float], tmux_calls: int, elapsed: float) -> None:
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{label:<8} p50 {statistics.median(samples):7.1f} ms   p99 {p99:7.1f} ms   "
+          f"tmux commands {tmux_calls / elapsed:6.1f}/s")
+
+
+async def send(control, pane: str, text: str) -> None:
+    await control.acommand(f"send-keys -t {quote(pane)} {quote(text)} Enter")
+
+
+async def by_events(watchers: TerminalWatchers, pane: str, n: int) -> None:
+    control = watchers.registry.client
+    samples = []
+    t_start = time.perf_counter()
+    async with watchers.subscribe(SESSION_ID) as sub:
+        for i in range(n):
+            t0 = time.perf_counter()
+            await send(control, pane, f"echo tick-{i}")
+            while True:
+                event = await asyncio.wait_for(sub.get(), 5)
+                if event.type == "command_finished" and event.data["output"] == f"tick-{i}":
+                    break
+            samples.append((time.perf_counter() - t0) * 1000)
+    report("events", samples, 0, time.perf_counter() - t_start)
+
+
+async def by_polling(control, pane: str, n: int, interval: float) -> None:
+    samples = []
+    calls = 0
+    t_start = time.perf_counter()
+    for i in range(n):
+        t0 = time.perf_counter()
+        await send(control, pane, f"echo tock-{i}")
+        while True:
+            await asyncio.sleep(interval)
+            calls += 1
+            lines = await control.acommand(f"capture-pane -p -t {quote(pane)} -S -5")
+            if f"tock-{i}" in lines:
+                break
+        samples.append((time.perf_counter() - t0) * 1000)
+    report("polling", samples, calls, time.perf_counter() - t_start)
+
+
+async def run(n: int, interval: float) -> None:
+    control = tmux_service.get_control_client()
+    registry = SessionRegistry(control)
+    watchers = TerminalWatchers(registry)
+    try:
+        sess = await registry.acquire(SESSION_ID)
+        await asyncio.sleep(1.0)  # let bash print its first prompt
+        await by_events(watchers, sess.student_pane, n)
+        await by_polling(control, sess.student_pane, n, interval)
+    finally:
+        await watchers.close_all()
+        await registry.close_all()
+        control.close()
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    interval = float(sys.argv[2]) if len(sys.argv) > 2 else 0.25
+    print(f"{n} commands, polling every {interval * 1000:.0f} ms")
+    asyncio.run(run(n, interval))
+
+
+if __name__ == "__main__":
+    main()
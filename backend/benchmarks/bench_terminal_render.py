@@ -0,0 +1,105 @@
+"""Micro-benchmark: ReadTerminal cleanup, regex stripping vs the screen renderer.
+
+Runs the old regex pipeline, render_terminal (strip fast path, replay only
+when the output positions the cursor) and a forced screen replay over
+terminal captures and reports time per call plus output size (chars and a
+rough chars/4 token estimate). Without arguments it uses two synthetic
+captures: "plain" (coloured prompts and command output) and "tui" (adding a
+carriage-return progress bar and a TUI that repaints its input box with
+cursor addressing). Pass files holding
+raw output (e.g. recorded with `tmux pipe-pane -o 'cat >> /tmp/cap.raw'`) to
+benchmark real sessions.
+
+    cd backend && uv run python -m benchmarks.bench_terminal_render [capture ...]
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+
+from app.services.terminal_screen import TerminalScreen, render_terminal
+
+
+def legacy_clean(raw: str) -> str:
+    """The regex pipeline read_terminal used before the screen renderer."""
+    clean = re.sub(r'\x1b\][^\x07]*\x07', '', raw)
+    clean = re.sub(r'\x1b\[[0-9;?]*[a-zA-Z~]', '', clean)
+    clean = re.sub(r'\x1b[()][0-9A-B]', '', clean)
+    clean = re.sub(r'\x1b[=>]', '', clean)
+    clean = clean.replace('\r', '')
+    return "\n".join(line.strip() for line in clean.split('\n') if line.strip())
+
+
+def render_clean(raw: str) -> str:
+    return "\n".join(line.strip() for line in render_terminal(raw) if line.strip())
+
+
+def replay_clean(raw: str) -> str:
+    screen = TerminalScreen()
+    screen.feed(raw)
+    return "\n".join(line.strip() for line in screen.lines() if line.strip())
+
+
+def plain_capture(repeats: int = 40) -> str:
+    prompt = "\x1b]0;student@box: ~/game\x07\x1b[01;32mstudent@box\x1b[00m:\x1b[01;34m~/game\x1b[00m$ "
+    parts = []
+    for i in range(repeats):
+        parts.append(prompt + "ls --color\r\n")
+        parts.append("\x1b[0m\x1b[01;34msrc\x1b[0m  index.html  \x1b[01;32mrun.sh\x1b[0m  style.css\r\n")
+        parts.append(prompt + "python game.py\r\n")
+        parts.append("Traceback (most recent call last):\r\n")
+        for depth in range(20):
+            parts.append(f'  File "game.py", line {depth + 10}, in step_{depth}\r\n    board = tick(board)\r\n')
+        parts.append(f"\x1b[31mNameError\x1b[0m: name 'tick' is not defined ({i})\r\n")
+    return "".join(parts)
+
+
+def synthetic_capture(repeats: int = 40) -> str:
+    prompt = "\x1b]0;student@box: ~/game\x07\x1b[01;32mstudent@box\x1b[00m:\x1b[01;34m~/game\x1b[00m$ "
+    parts = []
+    for i in range(repeats):
+        parts.append(prompt + "ls --color\r\n")
+        parts.append("\x1b[0m\x1b[01;34msrc\x1b[0m  index.html  \x1b[01;32mrun.sh\x1b[0m  style.css\r\n")
+        parts.append(prompt + "npm install\r\n")
+        for pct in range(0, 101, 2):
+            bar = "#" * (pct // 5)
+            parts.append(f"\r\x1b[K[{bar:<20}] {pct:3d}% fetching packages")
+        parts.append("\r\nadded 120 packages in 3s\r\n")
+        # TUI input box repainted in place, like Claude Code while typing
+        for n in range(1, 30):
+            parts.append(
+                "\x1b7\x1b[45;1H\x1b[2K╭" + "─" * 60 + "╮"
+                f"\x1b[46;1H\x1b[2K│ > {'make the board bigger'[:n]:<56} │"
+                "\x1b[47;1H\x1b[2K╰" + "─" * 60 + "╯\x1b8"
+            )
+        parts.append(f"\x1b[48;1H\x1b[2K✻ Thinking… ({i}s)\r\n")
+    return "".join(parts)
+
+
+def bench(fn, raw: str, iterations: int, rounds: int = 5) -> float:
+    """Best of `rounds` mean times, in ms; the minimum is the least noisy estimate."""
+    best = float("inf")
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        for _ in range(iterations):
+            fn(raw)
+        best = min(best, (time.perf_counter() - t0) / iterations * 1000)
+    return best
+
+
+def main() -> None:
+    captures = {p: Path(p).read_text(errors="replace") for p in sys.argv[1:]}
+    if not captures:
+        captures = {"plain": plain_capture(), "tui": synthetic_capture()}
+    for name, raw in captures.items():
+        iterations = max(3, int(2_000_000 / max(len(raw), 1)))
+        print(f"{name}: {len(raw):,} raw chars, {iterations} iterations")
+        for label, fn in (("regex strip", legacy_clean), ("render_terminal", render_clean), ("screen replay", replay_clean)):
+            ms = bench(fn, raw, iterations)
+            out = fn(raw)
+            print(f"  {label:<15} {ms:8.3f} ms/call   {len(out):8,} chars   ~{len(out) // 4:7,} tokens")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark: tmux control-mode client vs fork-per-call subprocesses.
+
+Creates a throwaway tmux session, then times has-session and capture-pane
+through both paths (sequential, plus concurrent async captures).
+
+    cd backend && uv run python -m benchmarks.bench_tmux [iterations]
+"""
+
+import asyncio
+import statistics
+import subprocess
+import sys
+import time
+
+from app.services import tmux_service
+
+BENCH_SESSION = "guided_bench"
+PANE = f"{BENCH_SESSION}:0.0"
+
+
+def timed(fn, n: int) -> list[float]:
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def report(label: str, samples: list[float]) -> None:
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{label:<36} mean {statistics.mean(samples):7.3f} ms   p50 {statistics.median(samples):7.3f} ms   p99 {p99:7.3f} ms")
+
+
+async def concurrent(capture, n: int) -> float:
+    t0 = time.perf_counter()
+    await asyncio.gather(*(capture(PANE, 100) for _ in range(n)))
+    return (time.perf_counter() - t0) * 1000
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    subprocess.run(["tmux", "new-session", "-d", "-s", BENCH_SESSION], check=True)
+    subprocess.run(["tmux", "send-keys", "-t", PANE, "seq 1 500", "C-m"], check=True)
+    time.sleep(0.5)
+    control = tmux_service.get_control_client()
+    try:
+        control.command("display-message -p ok")  # connect outside the timings
+
+        report("has-session  subprocess", timed(tmux_service._session_exists_subprocess, n))
+        report("has-session  control", timed(tmux_service.session_exists, n))
+        report("capture-pane subprocess", timed(lambda: tmux_service._capture_pane_subprocess(PANE), n))
+        report("capture-pane control", timed(lambda: tmux_service.capture_pane(PANE), n))
+
+        sub = asyncio.run(concurrent(tmux_service._capture_pane_subprocess_async, n))
+        ctl = asyncio.run(concurrent(tmux_service.capture_pane_async, n))
+        print(f"{n} concurrent async captures:  subprocess {sub:8.1f} ms   control {ctl:8.1f} ms")
+    finally:
+        control.close()
+        subprocess.run(["tmux", "kill-session", "-t", BENCH_SESSION])
+
+
+if __name__ == "__main__":
+    main()
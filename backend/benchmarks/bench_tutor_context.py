@@ -0,0 +1,77 @@
+"""Benchmark: tutor prompt tokens per turn with and without the context window.
+
+Replays a scripted lesson through TutorAgent.achat with a stub model: every
+student message makes the tutor read the terminal (a synthetic dump of
+`dump_lines` lines) and then answer. Reports estimated prompt tokens per turn
+and the largest single-call context, first with no budget and no elision
+(the old unbounded history), then with the configured settings.
+
+    cd backend && uv run python -m benchmarks.bench_tutor_context [turns] [dump_lines]
+"""
+
+import asyncio
+import sys
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from app.config import settings
+from app.services import tutor_agent
+from app.services.context_window import ContextWindow
+
+
+class StubModel:
+    """Reads the terminal on every student message, then answers; summaries are canned."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        if isinstance(messages[0], SystemMessage) and messages[0].content == tutor_agent.SUMMARY_PROMPT:
+            return AIMessage(content="Student finished the setup exercises and is now on git basics.")
+        if isinstance(messages[-1], HumanMessage):
+            return AIMessage(content="", tool_calls=[{"name": "ReadTerminal", "args": {"lines": 50}, "id": f"call{self.calls}"}])
+        return AIMessage(content="Tốt lắm! Bây giờ hãy chạy `git status` và cho mình biết kết quả nhé.")
+
+
+def make_agent(budget: int, tool_keep_turns: int) -> tutor_agent.TutorAgent:
+    tutor_agent._bindings["stub"] = (StubModel(), StubModel())
+    agent = tutor_agent.TutorAgent(model_name="stub")
+    agent.context = ContextWindow(
+        budget=budget,
+        keep_turns=settings.tutor_keep_turns,
+        tool_keep_turns=tool_keep_turns,
+    )
+    return agent
+
+
+async def run(label: str, budget: int, tool_keep_turns: int, turns: int) -> None:
+    agent = make_agent(budget, tool_keep_turns)
+    checkpoints = {turns // 4, turns // 2, turns}
+    for turn in range(1, turns + 1):
+        await agent.achat(f"xong bước {turn}")
+        if turn in checkpoints:
+            print(f"  {label:<10} turn {turn:4d}: {agent.context.stats.last_turn_tokens:7d} prompt tokens this turn")
+    stats = agent.context.snapshot()
+    print(
+        f"  {label:<10} total {stats['prompt_tokens']:9d}   per turn {stats['tokens_per_turn']:9.1f}   "
+        f"max context {stats['max_context_tokens']:7d}   summaries {stats['summaries']}   "
+        f"elided tool outputs {stats['elided_tool_messages']}"
+    )
+
+
+def main() -> None:
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 80
+    dump_lines = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    async def dump(lines: int = 20, full: bool = False) -> str:
+        return "\n".join(f"student@box:~/project$ ls -la  # line {i} of terminal output" for i in range(dump_lines))
+
+    tutor_agent.read_terminal.coroutine = dump
+    print(f"{turns} turns, {dump_lines}-line terminal read per turn, budget {settings.tutor_context_budget}")
+    asyncio.run(run("unbounded", 10**9, 10**9, turns))
+    asyncio.run(run("budgeted", settings.tutor_context_budget, settings.tutor_tool_keep_turns, turns))
+
+
+if __name__ == "__main__":
+    main()
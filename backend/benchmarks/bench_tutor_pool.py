@@ -0,0 +1,95 @@
+"""Load test: hundreds of concurrent students through the TutorAgent pool.
+
+Every simulated student sends `turns` messages with random think time in
+between; a stub model (fixed latency) reads the terminal once per message and
+answers. The pool is smaller than the class and has a memory ceiling, so
+agents are evicted and restored while the lesson runs. Reports turn latency,
+throughput, pool counters and peak RSS, then checks that no student lost a
+message across evictions.
+
+    cd backend && uv run python -m benchmarks.bench_tutor_pool [students] [turns] [pool-size] [memory-mb]
+"""
+
+import asyncio
+import random
+import resource
+import statistics
+import sys
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from app.services import tutor_agent
+from app.services.history_index import HistoryIndex
+from app.services.tutor_pool import TutorPool
+
+MODEL_LATENCY = 0.05
+THINK_TIME = (0.0, 0.5)
+
+
+class StubModel:
+    """Reads the terminal on every student message, then answers."""
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(MODEL_LATENCY)
+        if isinstance(messages[0], SystemMessage) and messages[0].content == tutor_agent.SUMMARY_PROMPT:
+            return AIMessage(content="Student is working through the lesson.")
+        if isinstance(messages[-1], HumanMessage):
+            return AIMessage(content="", tool_calls=[{"name": "ReadTerminal", "args": {"lines": 30}, "id": f"c{random.getrandbits(32)}"}])
+        return AIMessage(content="Tốt lắm! Bước tiếp theo: chạy `git status` rồi báo mình nhé.")
+
+
+async def fake_terminal(lines: int = 20, full: bool = False) -> str:
+    return "\n".join(f"student@box:~/project$ output line {i}" for i in range(lines))
+
+
+async def run(students: int, turns: int, pool: TutorPool) -> None:
+    latencies: list[float] = []
+
+    async def student(i: int) -> None:
+        for turn in range(turns):
+            await asyncio.sleep(random.uniform(*THINK_TIME))
+            t0 = time.perf_counter()
+            await pool.chat(f"student{i}", f"xong bước {turn + 1}")
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(student(i) for i in range(students)))
+    elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{len(latencies)} turns in {elapsed:.2f}s ({len(latencies) / elapsed:.1f} turns/s)")
+    print(f"turn latency p50 {statistics.median(latencies):.1f} ms   p99 {p99:.1f} ms   (model {MODEL_LATENCY * 1000:.0f} ms x 2 calls)")
+    print(f"pool: {pool.snapshot()}")
+    print(f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+
+    lost = 0
+    for i in range(students):
+        async with pool.session(f"student{i}") as agent:
+            _, body = agent.context.split(agent.messages)
+            if sum(isinstance(m, HumanMessage) for m in body) != turns:
+                lost += 1
+    print(f"students with an incomplete conversation after evictions: {lost}")
+
+
+def main() -> None:
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    size = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    memory_mb = int(sys.argv[4]) if len(sys.argv) > 4 else 8
+
+    tutor_agent._bindings["stub"] = (StubModel(), StubModel())
+    tutor_agent.read_terminal.coroutine = fake_terminal
+    pool = TutorPool(
+        factory=lambda session_id: tutor_agent.TutorAgent(model_name="stub", terminal=session_id),
+        max_agents=size,
+        memory_limit=memory_mb * 1024 * 1024,
+        index=HistoryIndex(),
+    )
+    print(f"{students} students x {turns} turns, pool size {size}, memory ceiling {memory_mb} MB")
+    asyncio.run(run(students, turns, pool))
+
+
+if __name__ == "__main__":
+    main()
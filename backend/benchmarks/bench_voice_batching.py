@@ -0,0 +1,105 @@
+"""Load test: voice correction throughput vs p99 latency, batching off and on.
+
+Starts benchmarks.fake_llm with a fixed provider capacity (concurrent requests
+served, the rest queue, like a per-key rate limit) and a small per-item cost
+for batched requests. Transcripts arrive open-loop at increasing rates; for
+each rate the achieved throughput and p50/p99 latency of
+/api/voice/correct are reported with micro-batching off and on.
+
+    cd backend && uv run python -m benchmarks.bench_voice_batching [seconds-per-rate] [capacity]
+"""
+
+import asyncio
+import itertools
+import os
+import statistics
+import sys
+import time
+
+PORT = 18999
+os.environ.setdefault("XAI_API_KEY", "fake")
+os.environ["XAI_BASE_URL"] = f"http://127.0.0.1:{PORT}/v1"
+os.environ["PRECORRECT_THRESHOLD"] = "2"  # send everything to the (fake) LLM
+os.environ["CORRECTION_CACHE_SIZE"] = "1"
+
+import httpx  # noqa: E402
+
+from app.api import voice  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services import llm_resilience  # noqa: E402
+from app.services.llm_resilience import ResilientCaller  # noqa: E402
+from benchmarks import fake_llm  # noqa: E402
+
+RATES = (25, 50, 100, 200, 400)
+_ids = itertools.count()
+
+
+async def run_rate(api: httpx.AsyncClient, rate: int, seconds: float) -> tuple[float, float, float, int]:
+    latencies: list[float] = []
+    fallbacks = 0
+
+    async def one() -> None:
+        nonlocal fallbacks
+        transcript = f"student {next(_ids)} says chay lai di"
+        t0 = time.perf_counter()
+        resp = await api.post("/api/voice/correct", json={"transcript": transcript})
+        latencies.append((time.perf_counter() - t0) * 1000)
+        if resp.json()["corrected"] == transcript:
+            fallbacks += 1
+
+    tasks = []
+    start = time.perf_counter()
+    for i in range(int(rate * seconds)):
+        await asyncio.sleep(max(0.0, start + i / rate - time.perf_counter()))
+        tasks.append(asyncio.create_task(one()))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return len(latencies) / elapsed, statistics.median(latencies), p99, fallbacks
+
+
+async def run(seconds: float, capacity: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with (
+        httpx.AsyncClient(transport=transport, base_url="http://test", timeout=60) as api,
+        httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}") as fake,
+    ):
+        await fake.post("/control", json={"latency": 0.1, "jitter": 0.02, "per_item": 0.005, "capacity": capacity})
+        print(f"fake provider: 100±20 ms per request, +5 ms per batched item, capacity {capacity}")
+        for batching in (False, True):
+            settings.correction_batching = batching
+            voice._batcher = None
+            # Measure queueing, not fallbacks: a generous budget and no hedging.
+            llm_resilience._caller = ResilientCaller(budget=30.0, hedge=False)
+            label = (
+                f"batching on (max {settings.correction_batch_max}, wait {settings.correction_batch_wait * 1000:.0f} ms)"
+                if batching
+                else "batching off"
+            )
+            print(label)
+            for rate in RATES:
+                throughput, p50, p99, fallbacks = await run_rate(api, rate, seconds)
+                print(
+                    f"  offered {rate:4d} req/s   achieved {throughput:6.1f} req/s   "
+                    f"p50 {p50:8.1f} ms   p99 {p99:8.1f} ms   fallback {fallbacks}"
+                )
+            if voice._batcher is not None:
+                print(f"  {voice._batcher.snapshot()}")
+        status = (await fake.get("/control")).json()
+        print(f"fake server: {status['requests']} requests for {status['items']} transcripts")
+
+
+def main() -> None:
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    capacity = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    server = fake_llm.serve_in_thread(PORT)
+    try:
+        asyncio.run(run(seconds, capacity))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
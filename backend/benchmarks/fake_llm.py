@@ -0,0 +1,123 @@
+"""Fake OpenAI-compatible chat endpoint with injectable latency and errors.
+
+Answers with the last user message upper-cased (so callers can tell a real
+answer from a raw-transcript fallback), as a plain or streamed completion. The
+fault profile is changed at runtime through POST /control:
+
+    {"latency": 0.05, "jitter": 0.02, "slow_rate": 0.05, "slow_latency": 5.0, "error_rate": 0.0}
+
+- latency/jitter: base delay before the response (uniform +- jitter)
+- slow_rate/slow_latency: fraction of requests delayed by slow_latency instead
+- error_rate: fraction of requests answered with HTTP 500
+- per_item: extra delay per transcript in a batched (JSON-mode) request
+- capacity: requests served concurrently, the rest queue (0 = unlimited);
+  models a provider's per-key concurrency/rate limit
+
+JSON-mode requests carrying {"transcripts": [...]} get {"corrections": [...]}
+back, as the voice route's batch prompt expects.
+
+    cd backend && uv run uvicorn benchmarks.fake_llm:app --port 18999
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class FaultProfile:
+    latency: float = 0.05
+    jitter: float = 0.02
+    slow_rate: float = 0.0
+    slow_latency: float = 5.0
+    error_rate: float = 0.0
+    per_item: float = 0.0
+    capacity: int = 0
+
+
+profile = FaultProfile()
+counters = {"requests": 0, "errors": 0, "slow": 0, "items": 0}
+_slots: asyncio.Semaphore | None = None
+
+app = FastAPI()
+
+
+@app.post("/control")
+async def control(request: Request):
+    global _slots
+    for name, value in (await request.json()).items():
+        setattr(profile, name, type(getattr(profile, name))(value))
+    _slots = asyncio.Semaphore(profile.capacity) if profile.capacity else None
+    return asdict(profile)
+
+
+@app.get("/control")
+def status():
+    return {**asdict(profile), **counters}
+
+
+def _delay() -> float:
+    if random.random() < profile.slow_rate:
+        counters["slow"] += 1
+        return profile.slow_latency
+    return max(0.0, profile.latency + random.uniform(-profile.jitter, profile.jitter))
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    counters["requests"] += 1
+    text = body["messages"][-1]["content"]
+    batch = json.loads(text)["transcripts"] if body.get("response_format", {}).get("type") == "json_object" else None
+    counters["items"] += len(batch) if batch else 1
+
+    delay = _delay() + (profile.per_item * len(batch) if batch else 0.0)
+    slots = _slots
+    if slots is None:
+        await asyncio.sleep(delay)
+    else:
+        async with slots:
+            await asyncio.sleep(delay)
+    if random.random() < profile.error_rate:
+        counters["errors"] += 1
+        return JSONResponse({"error": {"message": "injected failure", "type": "server_error"}}, status_code=500)
+
+    if batch is not None:
+        text = json.dumps({"corrections": [t.upper() for t in batch]}, ensure_ascii=False)
+    else:
+        text = text.upper()
+    base = {"id": "fake", "created": int(time.time()), "model": body.get("model", "fake")}
+    if not body.get("stream"):
+        return {
+            **base,
+            "object": "chat.completion",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        }
+
+    async def events():
+        for word in text.split(" "):
+            chunk = {
+                **base,
+                "object": "chat.completion.chunk",
+                "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def serve_in_thread(port: int) -> uvicorn.Server:
+    """Run the fake server on a daemon thread; set .should_exit to stop it."""
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
@@ -43,10 +43,66 @@ function float32ToInt16(float32Array: Float32Array): Int16Array {
   return int16Array
 }
 
+/**
+ * Stream a correction from /api/voice/correct/stream (Server-Sent Events),
+ * calling onText for every delta. Returns true once any text was delivered;
+ * false means the caller should fall back to /api/voice/correct.
+ */
+async function streamCorrection(
+  rawText: string,
+  onText: (text: string) => void
+): Promise<boolean> {
+  const res = await fetch(`${API_URL}/api/voice/correct/stream`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ transcript: rawText }),
+  })
+  if (!res.ok || !res.body) throw new Error(`Streaming correction failed: ${res.status}`)
+
+  const reader = res.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ""
+  let delivered = false
+
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+
+    let boundary
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const block = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+      let event = "message"
+      let data = ""
+      for (const line of block.split("\n")) {
+        if (line.startsWith("event: ")) event = line.slice(7)
+        else if (line.startsWith("data: ")) data += line.slice(6)
+      }
+      if (!data) continue
+      const payload = JSON.parse(data)
+      if (event === "delta" && payload.text) {
+        onText(payload.text)
+        delivered = true
+      } else if (event === "done") {
+        // Fallback/empty results arrive only in `done`
+        if (!delivered && payload.corrected) {
+          onText(payload.corrected)
+          delivered = true
+        }
+        return delivered
+      } else if (event === "error") {
+        return delivered
+      }
+    }
+  }
+  return delivered
+}
+
 /**
  * Simplified voice input hook for guided-AI-coding.
  *
- * Flow: Mic → Soniox STT → stop word detection → Grok correction → fill input
+ * Flow: Mic → Soniox STT → stop word detection → Grok correction (streamed) → fill input
  */
 export function useVoiceInput(
   onCorrectedText: (text: string) => void
@@ -92,19 +148,32 @@ export function useVoiceInput(
       }
       updateState({ status: "processing", transcript: rawText })
 
+      // Stream first so corrected text is typed as it arrives
+      let typed = false
       try {
-        const res = await fetch(`${API_URL}/api/voice/correct`, {
-          method: "POST",
-          headers: { "Content-Type": "application/json" },
-          body: JSON.stringify({ transcript: rawText }),
+        typed = await streamCorrection(rawText, (text) => {
+          typed = true
+          onCorrectedText(text)
         })
-        if (!res.ok) throw new Error(`Correction failed: ${res.status}`)
-        const data = await res.json()
-        onCorrectedText(data.corrected || rawText)
       } catch (err) {
-        console.error("[Voice] Correction error:", err)
-        // Fallback: use raw transcript
-        onCorrectedText(rawText)
+        console.error("[Voice] Streaming correction error:", err)
+      }
+
+      if (!typed) {
+        try {
+          const res = await fetch(`${API_URL}/api/voice/correct`, {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ transcript: rawText }),
+          })
+          if (!res.ok) throw new Error(`Correction failed: ${res.status}`)
+          const data = await res.json()
+          onCorrectedText(data.corrected || rawText)
+        } catch (err) {
+          console.error("[Voice] Correction error:", err)
+          // Fallback: use raw transcript
+          onCorrectedText(rawText)
+        }
       }
       updateState({ status: "idle", transcript: "" })
     },
@@ -11,6 +11,9 @@ PROJECT_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
 SESSION_NAME="guided_ai_coding"
 PROMPTS_DIR="$PROJECT_ROOT/prompts"
 TUTOR_WORKSPACE="$HOME/tutor-workspace"
+# Raw STUDENT pane output with shell-integration marks, read by the backend (shell_marks_dir)
+TERMINAL_LOG_DIR="$TUTOR_WORKSPACE/.terminal"
+STUDENT_SHELL="bash --rcfile '$PROJECT_ROOT/scripts/shell-integration.bash' -i"
 
 # Window sizing
 WINDOW_WIDTH=220
@@ -41,7 +44,7 @@ fi
 
 # 2. Provision tutor workspace (outside project tree)
 echo "Provisioning tutor workspace..."
-mkdir -p "$TUTOR_WORKSPACE"/{prompts,memory,projects,.claude/hooks}
+mkdir -p "$TUTOR_WORKSPACE"/{prompts,memory,projects,.claude/hooks,.terminal}
 
 # Migrate memory on first run (if not already present)
 if [ ! -f "$TUTOR_WORKSPACE/memory/progress.md" ] && [ -f "$PROJECT_ROOT/tutor/memory/progress.md" ]; then
@@ -57,7 +60,8 @@ cp "$PROJECT_ROOT/scripts/tutor-hooks/settings.json" "$TUTOR_WORKSPACE/.claude/s
 # 3. Start new tmux session
 echo "Creating tmux session '$SESSION_NAME'..."
 cd "$PROJECT_ROOT"
-tmux new-session -d -s $SESSION_NAME
+# STUDENT window runs bash with OSC 133 shell integration (command/exit-status marks)
+tmux new-session -d -s $SESSION_NAME "$STUDENT_SHELL"
 
 # 4. Rename window 0 to STUDENT and create window 1 for TUTOR
 echo "Creating 2-window layout (STUDENT + TUTOR)..."
@@ -87,6 +91,12 @@ echo "Pane IDs:"
 echo "  STUDENT (Window 0): $STUDENT_PANE"
 echo "  TUTOR   (Window 1): $TUTOR_PANE"
 
+# 7a. Pipe the STUDENT pane's raw output (including the shell-integration marks)
+# to the log the backend indexes into command records
+echo "Piping STUDENT pane output to $TERMINAL_LOG_DIR/$SESSION_NAME.log..."
+: > "$TERMINAL_LOG_DIR/$SESSION_NAME.log"
+tmux pipe-pane -O -t $STUDENT_PANE "cat >> '$TERMINAL_LOG_DIR/$SESSION_NAME.log'"
+
 # 7b. Create linked sessions for independent terminal viewing
 echo "Creating linked sessions..."
 tmux new-session -d -s guided_student -t $SESSION_NAME
@@ -0,0 +1,76 @@
+# Shell integration for the student's bash (loaded with `bash --rcfile`).
+#
+# Emits OSC 133 semantic prompt marks so the backend can split the terminal
+# stream into commands without guessing from the text:
+#   ESC ] 133 ; A BEL                                   prompt start
+#   ESC ] 133 ; B BEL                                   command input start
+#   ESC ] 133 ; C ; cmdline_url=<cmd> ; t=<epoch> BEL   command started (output follows)
+#   ESC ] 133 ; D ; <exit status> ; t=<epoch> BEL       command finished
+# tmux does not forward these to the web terminal; the backend reads them from
+# the pane's raw output (tmux pipe-pane, see setup-tutor.sh).
+
+[ -f ~/.bashrc ] && . ~/.bashrc
+
+# Every command line must reach history, the only place preexec can read it
+# from: ~/.bashrc often sets HISTCONTROL=ignoreboth (Ubuntu's default), which
+# would drop a repeated command or one typed after a space.
+HISTCONTROL=
+HISTIGNORE=
+set -o history
+
+__tutor_now() {
+    if [ -n "$EPOCHREALTIME" ]; then
+        printf '%s' "$EPOCHREALTIME"
+    else
+        date +%s.%N
+    fi
+}
+
+__tutor_urlencode() {
+    local LC_ALL=C s="$1" i c out=""
+    for (( i = 0; i < ${#s}; i++ )); do
+        c="${s:i:1}"
+        case "$c" in
+            [a-zA-Z0-9.~_-]) out+="$c" ;;
+            *) printf -v c '%%%02X' "'$c"; out+="$c" ;;
+        esac
+    done
+    printf '%s' "$out"
+}
+
+# Newest history entry, number included (empty with history off).
+__tutor_last_entry() {
+    HISTTIMEFORMAT= history 1
+}
+
+# Expanded by PS0 (in a subshell) after a command line is read, before it runs.
+# The line is only in history if bash saved it (HISTCONTROL is cleared above,
+# but the student may set it again or turn history off): a skipped line leaves
+# the previous command as the newest entry. Unless the newest entry (number
+# and text) differs from the one seen at the last prompt, the command text is
+# unknown and cmdline_url is left empty rather than naming the previous one.
+__tutor_preexec() {
+    local cmd="" entry
+    entry="$(__tutor_last_entry)"
+    if [ -n "$entry" ] && [ "$entry" != "$__tutor_seen_entry" ]; then
+        cmd="${entry#"${entry%%[![:space:]]*}"}"   # leading blanks
+        cmd="${cmd#*[0-9] }"                       # history number
+        cmd="${cmd#"${cmd%%[![:space:]]*}"}"
+    fi
+    printf '\e]133;C;cmdline_url=%s;t=%s\a' "$(__tutor_urlencode "$cmd")" "$(__tutor_now)"
+}
+
+__tutor_precmd() {
+    local status=$?
+    printf '\e]133;D;%s;t=%s\a' "$status" "$(__tutor_now)"
+    printf '\e]133;A\a'
+    __tutor_seen_entry="$(__tutor_last_entry)"
+    return $status
+}
+
+if [ -z "$__TUTOR_SHELL_INTEGRATION" ]; then
+    __TUTOR_SHELL_INTEGRATION=1
+    PROMPT_COMMAND="__tutor_precmd${PROMPT_COMMAND:+; $PROMPT_COMMAND}"
+    PS0='$(__tutor_preexec)'"${PS0}"
+    PS1="${PS1}"'\[\e]133;B\a\]'
+fi